@@ -0,0 +1,83 @@
+"""
+Fixtures for the benchmarks.
+
+Synthetic inputs are created once per scale and shared by every
+benchmark. Run the 1k scale with::
+
+    pytest benchmarks --no-cov
+
+and every scale with ``--scales all`` (or ex. ``--scales 1000 10000``).
+There are 5 sample annotations per file, so the instance benchmarks use 10M
+annotations with ``--scales 2000000 -k instance``.
+
+``tox -e benchmark`` compares the minimum time of each benchmark to the
+latest baseline in ``benchmarks/baselines``. The stored baseline is only a
+sample of the 1k scale from a shared 1 CPU VM, where the benchmarks that
+read and write files varied by up to 2x between runs. Regenerate it on the
+machine the comparisons run on (and at the scales they use) before relying
+on the comparison::
+
+    pytest benchmarks --no-cov --benchmark-save=baseline \
+        --benchmark-storage=file://./benchmarks/baselines
+"""
+
+import pytest
+
+from universal_devkit.scripts.create_synthetic_scene import (
+    create_synthetic_logs,
+    create_synthetic_sample_annotations,
+    create_synthetic_scene,
+    create_synthetic_supervisely,
+    create_synthetic_yolo,
+)
+from universal_devkit.utils.utils import read_json
+
+# The number of files the benchmarks can be run with
+SCALES = [1000, 10000, 100000]
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--scales",
+        nargs="+",
+        default=["1000"],
+        help="The numbers of files to benchmark with or 'all' for {}".format(SCALES),
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "num_files" in metafunc.fixturenames:
+        scales = metafunc.config.getoption("scales")
+        scales = SCALES if scales == ["all"] else [int(scale) for scale in scales]
+        metafunc.parametrize("num_files", scales, scope="session")
+
+
+@pytest.fixture(scope="session")
+def rounds(num_files):
+    """The number of rounds to run each benchmark for, with a single call per
+    round. The 1k scale runs enough rounds for a stable minimum (the tox
+    benchmark environment compares the minimums) while the larger scales,
+    which take seconds per call, only run a few."""
+    return max(3, 20000 // num_files)
+
+
+@pytest.fixture(scope="session")
+def synthetic_dir(tmp_path_factory, num_files):
+    """A directory with synthetic inputs of every type for a scale"""
+    directory = tmp_path_factory.mktemp("synthetic-{}".format(num_files))
+    create_synthetic_scene(str(directory / "scene"), num_files=num_files)
+    create_synthetic_logs(str(directory / "logs"), num_files=num_files)
+    create_synthetic_supervisely(str(directory / "supervisely"), num_files=num_files)
+    create_synthetic_yolo(str(directory / "yolo"), num_files=num_files)
+    return directory
+
+
+@pytest.fixture(scope="session")
+def sample_annotations(num_files):
+    # The synthetic scenes have 5 objects annotated in every sample
+    return create_synthetic_sample_annotations(5 * num_files, num_objects=50)
+
+
+@pytest.fixture(scope="session")
+def ego_pose_list(synthetic_dir):
+    return read_json(str(synthetic_dir / "scene" / "ego_pose.json"))
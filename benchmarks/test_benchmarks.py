@@ -0,0 +1,116 @@
+import pytest
+
+from universal_devkit.prepare_data.create_logs_json import get_logs
+from universal_devkit.prepare_data.ego_pose import (
+    get_ego_pose_validation_report,
+    validate_ego_pose,
+)
+from universal_devkit.prepare_data.instance import (
+    get_instance_data,
+    get_instance_data_columnar,
+    group_instances,
+)
+from universal_devkit.prepare_data.scene import Scene
+from universal_devkit.scripts.convert_yolo_to_xyxy import (
+    convert_images_from_yolo_to_xyxy,
+)
+from universal_devkit.scripts.supervisely_3d_to_universal import (
+    convert_supervisely_3d_to_universal,
+)
+from universal_devkit.utils.utils import TokenGenerator
+
+
+def test_scene(benchmark, rounds, synthetic_dir):
+    scene = benchmark.pedantic(
+        Scene,
+        args=(str(synthetic_dir / "scene"),),
+        kwargs={"token_generator": TokenGenerator("benchmark")},
+        rounds=rounds,
+        iterations=1,
+    )
+    assert scene.SAMPLE_TIMESTAMPS
+
+
+def test_get_logs(benchmark, rounds, synthetic_dir, num_files):
+    count = benchmark.pedantic(
+        get_logs, args=(str(synthetic_dir / "logs"),), rounds=rounds, iterations=1
+    )
+    assert count == num_files
+
+
+def test_convert_supervisely_3d_to_universal(benchmark, rounds, synthetic_dir):
+    benchmark.pedantic(
+        convert_supervisely_3d_to_universal,
+        args=(str(synthetic_dir / "supervisely"), str(synthetic_dir / "universal")),
+        rounds=rounds,
+        iterations=1,
+    )
+
+
+def test_convert_images_from_yolo_to_xyxy(benchmark, rounds, synthetic_dir):
+    benchmark.pedantic(
+        convert_images_from_yolo_to_xyxy,
+        args=(str(synthetic_dir / "yolo"), str(synthetic_dir / "xyxy")),
+        kwargs={"extension": ".png"},
+        rounds=rounds,
+        iterations=1,
+    )
+
+
+def test_get_instance_data(benchmark, rounds, sample_annotations):
+    instance_data = benchmark.pedantic(
+        get_instance_data, args=(sample_annotations,), rounds=rounds, iterations=1
+    )
+    assert len(instance_data) == 50
+
+
+def test_get_instance_data_columnar(benchmark, rounds, sample_annotations):
+    instance_data = benchmark.pedantic(
+        get_instance_data_columnar,
+        args=(sample_annotations,),
+        rounds=rounds,
+        iterations=1,
+    )
+    assert len(instance_data) == 50
+
+
+def test_group_instances(benchmark, rounds, sample_annotations):
+    # The grouping alone, for annotations that are already in columns
+    instance_tokens = [
+        annotation["instance_token"] for annotation in sample_annotations
+    ]
+    timestamps = [annotation["timestamp"] for annotation in sample_annotations]
+
+    instances, *_ = benchmark.pedantic(
+        group_instances,
+        args=(instance_tokens, timestamps),
+        rounds=rounds,
+        iterations=1,
+    )
+    assert len(instances) == 50
+
+
+def validate_ego_pose_loop(ego_pose_list):
+    # The per-pose loop validate_ego_pose used to run, for comparison
+    for ego_pose in ego_pose_list:
+        assert "timestamp" in ego_pose
+        assert isinstance(ego_pose["timestamp"], int)
+        assert "rotation" in ego_pose
+        assert len(ego_pose["rotation"]) == 4
+        assert "translation" in ego_pose
+        assert len(ego_pose["translation"]) == 3
+
+
+@pytest.mark.parametrize("validate", [validate_ego_pose, validate_ego_pose_loop])
+def test_validate_ego_pose(benchmark, rounds, ego_pose_list, validate):
+    benchmark.pedantic(validate, args=(ego_pose_list,), rounds=rounds, iterations=1)
+
+
+def test_get_ego_pose_validation_report(benchmark, rounds, ego_pose_list):
+    report = benchmark.pedantic(
+        get_ego_pose_validation_report,
+        args=(ego_pose_list,),
+        rounds=rounds,
+        iterations=1,
+    )
+    assert not any(report.values())
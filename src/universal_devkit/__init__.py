@@ -1,16 +1,23 @@
-import sys
+def __getattr__(name):
+    # The version is looked up on first use because importing
+    # importlib.metadata slows down the start of every command line tool
+    if name != "__version__":
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
-if sys.version_info[:2] >= (3, 8):
-    # TODO: Import directly (no need for conditional) when `python_requires = >= 3.8`
-    from importlib.metadata import PackageNotFoundError, version  # pragma: no cover
-else:
-    from importlib_metadata import PackageNotFoundError, version  # pragma: no cover
+    import sys
 
-try:
-    # Change here if project is renamed and does not equal the package name
-    dist_name = "universal-devkit"
-    __version__ = version(dist_name)
-except PackageNotFoundError:  # pragma: no cover
-    __version__ = "unknown"
-finally:
-    del version, PackageNotFoundError
+    if sys.version_info[:2] >= (3, 8):
+        # TODO: Import directly when `python_requires = >= 3.8`
+        from importlib.metadata import PackageNotFoundError, version  # pragma: no cover
+    else:
+        from importlib_metadata import PackageNotFoundError, version  # pragma: no cover
+
+    try:
+        # Change here if project is renamed and does not equal the package name
+        dist_name = "universal-devkit"
+        __version__ = version(dist_name)
+    except PackageNotFoundError:  # pragma: no cover
+        __version__ = "unknown"
+
+    globals()["__version__"] = __version__
+    return __version__
@@ -0,0 +1,4 @@
+"""Runs the command line tool with ``python -m universal_devkit``"""
+from universal_devkit.cli import run
+
+run()
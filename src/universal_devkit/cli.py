@@ -0,0 +1,209 @@
+"""
+The ``universal-devkit`` command line tool.
+
+Every tool in the devkit is a subcommand::
+
+    universal-devkit scene -i single-scene -o output
+    universal-devkit yolo2xyxy -i yolo -o output -w 8
+
+Only the standard library is imported when the command starts. The
+arguments of each subcommand are defined by the ``add_arguments`` function of
+the module it runs, which is only imported (with its dependencies, ex. numpy
+or OpenCV) when the subcommand is used, so ``--help`` and the lightweight
+commands start quickly.
+"""
+
+import argparse
+import importlib
+import sys
+
+
+class _VersionAction(argparse.Action):
+    """Prints the version. It is only looked up if --version is passed."""
+
+    def __init__(self, option_strings, dest, **kwargs):
+        super().__init__(
+            option_strings,
+            dest=dest,
+            default=argparse.SUPPRESS,
+            nargs=0,
+            help="show the version and exit",
+        )
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        from universal_devkit import __version__
+
+        parser.exit(message="universal-devkit {}\n".format(__version__))
+
+
+def run_scene(args):
+    from universal_devkit.prepare_data.scene import main
+
+    main(
+        args.input,
+        args.output,
+        workers=args.workers,
+        namespace=args.namespace,
+        json_lines=args.json_lines,
+        profile=args.profile,
+        profile_report=args.profile_report,
+        trace_memory=args.trace_memory,
+        tracking_cost=args.tracking_cost,
+        tracking_method=args.tracking_method,
+    )
+
+
+def run_logs(args):
+    from universal_devkit.prepare_data.create_logs_json import get_logs
+
+    get_logs(args.input, json_lines=args.json_lines)
+
+
+def run_supervisely(args):
+    from universal_devkit.scripts.supervisely_3d_to_universal import (
+        convert_supervisely_3d_to_universal,
+    )
+    from universal_devkit.utils.utils import TokenGenerator
+
+    convert_supervisely_3d_to_universal(
+        args.input,
+        args.output,
+        token_generator=TokenGenerator(args.namespace),
+        pointcloud_directory=args.pointclouds,
+    )
+
+
+def run_yolo2xyxy(args):
+    from universal_devkit.scripts.convert_yolo_to_xyxy import (
+        convert_images_from_yolo_to_xyxy,
+    )
+
+    convert_images_from_yolo_to_xyxy(
+        args.input,
+        args.output,
+        args.extension,
+        image_mode=args.image_mode,
+        workers=args.workers,
+    )
+
+
+def run_extrinsics(args):
+    from universal_devkit.scripts.calculate_extrinsic_matrix import (
+        print_relative_transformation,
+    )
+
+    print_relative_transformation(args.source, args.target)
+
+
+def run_imu_pose(args):
+    from universal_devkit.scripts.ros_imu_pose import ros_imu_pose
+
+    ros_imu_pose(
+        args.input_bag,
+        args.topic,
+        args.output,
+        output_format=args.format,
+        chunk_size=args.chunk_size,
+    )
+
+
+def run_correct_timestamps(args):
+    from universal_devkit.scripts.correct_timestamps import correct_timestamps
+
+    correct_timestamps(args.input, args.bag, args.output, topics=args.topics)
+
+
+# The subcommand names mapped to their help text, the module with the
+# add_arguments function that adds their arguments and the function that
+# runs them. A module is only imported when its subcommand is used.
+COMMANDS = {
+    "scene": (
+        "Convert a scene to the universal format",
+        "universal_devkit.prepare_data.scene",
+        run_scene,
+    ),
+    "logs": (
+        "Describe the log files in a directory",
+        "universal_devkit.prepare_data.create_logs_json",
+        run_logs,
+    ),
+    "supervisely": (
+        "Convert supervisely.io 3D annotations to the universal format",
+        "universal_devkit.scripts.supervisely_3d_to_universal",
+        run_supervisely,
+    ),
+    "yolo2xyxy": (
+        "Convert YOLO labels to xyxy labels",
+        "universal_devkit.scripts.convert_yolo_to_xyxy",
+        run_yolo2xyxy,
+    ),
+    "extrinsics": (
+        "Calculate the transformation between two static transforms",
+        "universal_devkit.scripts.calculate_extrinsic_matrix",
+        run_extrinsics,
+    ),
+    "imu-pose": (
+        "Extract the IMU poses from a bag",
+        "universal_devkit.scripts.ros_imu_pose",
+        run_imu_pose,
+    ),
+    "correct-timestamps": (
+        "Rename files to the header timestamps in a bag",
+        "universal_devkit.scripts.correct_timestamps",
+        run_correct_timestamps,
+    ),
+}
+
+
+def parse_args(args):
+    """Parse command line parameters
+
+    Args:
+      args (List[str]): command line parameters as list of strings
+          (for example  ``["scene", "--help"]``).
+
+    Returns:
+      :obj:`argparse.Namespace`: command line parameters namespace
+    """
+    parser = argparse.ArgumentParser(
+        prog="universal-devkit", description="Tools to create universal datasets"
+    )
+    parser.add_argument("--version", action=_VersionAction)
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    subparsers.required = True
+
+    # Only the arguments of the subcommand that is used are added, so the
+    # modules of the other subcommands aren't imported. The top-level
+    # options don't take values, so the first other argument is the command
+    command = next((arg for arg in args if not arg.startswith("-")), None)
+
+    for name, (help_text, module, run) in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=help_text, description=help_text)
+        subparser.set_defaults(func=run)
+        if name == command:
+            importlib.import_module(module).add_arguments(subparser)
+
+    return parser.parse_args(args)
+
+
+def main(args):
+    """Runs a subcommand
+
+    Args:
+      args (List[str]): command line parameters as list of strings
+          (for example  ``["logs", "-i", "logs"]``).
+    """
+    args = parse_args(args)
+    args.func(args)
+
+
+def run():
+    """Calls :func:`main` passing the CLI arguments extracted from :obj:`sys.argv`
+
+    This function is the entry point of the ``universal-devkit`` console script.
+    """
+    main(sys.argv[1:])
+
+
+if __name__ == "__main__":
+    run()
@@ -1,19 +1,25 @@
+import argparse
 import csv
 import os
 from glob import glob
-from pathlib import Path
 
-from universal_devkit.utils.utils import create_token, write_json
+from universal_devkit.utils.utils import JsonTableWriter, create_token
 
 
-def get_logs(logs_dir_path):
+def get_logs(logs_dir_path, json_lines=False):
     """Creates descriptions of log files in a directory.
 
+    The descriptions are written to get_logs.json (or get_logs.jsonl) in the
+    same directory as they are read, so only one row is held in memory at a
+    time.
+
     Args:
         logs_dir_path (str): the path to the directory with the log files and .csv file
+        json_lines (bool, optional): whether to write JSON Lines instead
+            of a JSON array. Defaults to False.
 
     Returns:
-        list: a list of dictionaries with information about all the logs
+        int: the number of logs written
     """
 
     # Check that only one CSV file exists
@@ -21,8 +27,12 @@ def get_logs(logs_dir_path):
     assert len(csv_files) == 1, "There should only be a single CSV file"
 
     # Read in a CSV of form: "logfile, date_captured, vehicle, location, notes"
-    log_data = []
-    with open(csv_files[0]) as csv_file:
+    output_path = os.path.join(
+        logs_dir_path, "get_logs.jsonl" if json_lines else "get_logs.json"
+    )
+    with open(csv_files[0]) as csv_file, JsonTableWriter(
+        output_path, json_lines=json_lines
+    ) as writer:
         csv_reader = csv.reader(csv_file, delimiter=",", skipinitialspace=True)
 
         for row_number, row in enumerate(csv_reader):
@@ -44,8 +54,33 @@ def get_logs(logs_dir_path):
                 "date_captured": row[1],
                 "location": row[3],
             }
-            log_data.append(csv_row_dict)
+            writer.write(csv_row_dict)
+
+    return writer.count
+
+
+def add_arguments(parser):
+    """Adds the command line arguments of :func:`get_logs` to a parser
+
+    Args:
+        parser (argparse.ArgumentParser): the parser to add the arguments to
+    """
+    parser.add_argument(
+        "-i",
+        "--input",
+        type=str,
+        required=True,
+        help="The directory with the log files and .csv file",
+    )
+    parser.add_argument(
+        "--json_lines",
+        action="store_true",
+        help="Write get_logs.jsonl instead of get_logs.json",
+    )
+
 
-    Path(logs_dir_path).mkdir(parents=True, exist_ok=True)
-    write_json(log_data, os.path.join(logs_dir_path, "get_logs.json"))
-    return log_data
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    add_arguments(ap)
+    args = vars(ap.parse_args())
+    get_logs(args["input"], json_lines=args["json_lines"])
@@ -1,4 +1,30 @@
-from utils import convert_list_to_dict, create_token, read_json
+import os
+from itertools import chain
+from operator import itemgetter
+from pathlib import Path
+
+import numpy as np
+
+from universal_devkit.utils.utils import (
+    convert_list_to_dict,
+    create_token,
+    get_closest_match_indices,
+    read_json,
+)
+
+# The checks that validate_ego_pose fails on. The other checks in the report
+# (ex. unsorted timestamps) are problems with the data rather than the format.
+FORMAT_CHECKS = [
+    "missing_timestamp",
+    "timestamp_not_int",
+    "missing_rotation",
+    "rotation_not_length_4",
+    "missing_translation",
+    "translation_not_length_3",
+]
+
+# The length of each list in a pose
+POSE_SHAPES = [("rotation", 4), ("translation", 3)]
 
 
 def validate_ego_pose(ego_pose_list):
@@ -24,48 +50,445 @@ def validate_ego_pose(ego_pose_list):
             ...
         ]
 
+    Every pose is checked and an AssertionError listing all the failing
+    indices is raised if any pose is malformed. See
+    :func:`get_ego_pose_validation_report` for the checks.
+
+    Args:
+        ego_pose_list (list(dict)): the ego poses
+    """
+    report = _get_format_report(ego_pose_list)
+
+    errors = {check: indices for check, indices in report.items() if len(indices) > 0}
+
+    assert len(errors) == 0, "Invalid ego poses (check -> indices): {}".format(
+        {check: _summarize_indices(indices) for check, indices in errors.items()}
+    )
+
+
+def get_ego_pose_validation_report(ego_pose_list, norm_tolerance=1e-3):
+    """Checks every ego pose and reports all the problems found.
+
+    The format is checked first (see :func:`validate_ego_pose`) and the
+    values of the well-formed poses are then checked as arrays. The checks
+    are:
+
+    - missing_timestamp / missing_rotation / missing_translation
+    - timestamp_not_int: the timestamp isn't an integer
+    - rotation_not_length_4 / translation_not_length_3
+    - not_finite: the rotation or translation has a NaN/inf (or non-numeric) value
+    - rotation_not_unit: the quaternion norm differs from 1 by > norm_tolerance
+    - timestamp_not_increasing: the timestamp is <= the previous pose's timestamp
+    - duplicate_timestamp: another pose has the same timestamp
+
     Args:
-        ego_pose_list ([type]): [description]
+        ego_pose_list (list(dict)): the ego poses
+        norm_tolerance (float, optional): how far the quaternion norm can be
+            from 1. Defaults to 1e-3.
+
+    Returns:
+        dict: a dictionary mapping each check -> a sorted list of the
+            indices of the poses that failed it
+    """
+    report = _get_format_report(ego_pose_list)
+
+    # Only check the values that are well-formed
+    indices, poses = _select_poses(
+        ego_pose_list, report["missing_timestamp"] + report["timestamp_not_int"]
+    )
+    timestamps = np.fromiter(
+        map(itemgetter("timestamp"), poses), dtype=np.int64, count=len(poses)
+    )
+    not_increasing = np.flatnonzero(timestamps[1:] <= timestamps[:-1]) + 1
+    report["timestamp_not_increasing"] = indices[not_increasing].tolist()
+
+    if len(not_increasing) == 0:
+        # Strictly increasing timestamps can't have duplicates
+        report["duplicate_timestamp"] = []
+    else:
+        _, inverse, counts = np.unique(
+            timestamps, return_inverse=True, return_counts=True
+        )
+        report["duplicate_timestamp"] = indices[counts[inverse] > 1].tolist()
+
+    not_finite = np.zeros(len(ego_pose_list), dtype=bool)
+    for key, length in POSE_SHAPES:
+        indices, poses = _select_poses(
+            ego_pose_list,
+            report["missing_" + key] + report["{}_not_length_{}".format(key, length)],
+        )
+        array, numeric = _to_float_array(poses, key, length)
+        valid = numeric & np.isfinite(array).all(axis=1)
+        not_finite[indices[~valid]] = True
+
+        if key == "rotation":
+            with np.errstate(invalid="ignore"):
+                not_unit = np.abs(np.linalg.norm(array, axis=1) - 1) > norm_tolerance
+            report["rotation_not_unit"] = indices[not_unit & valid].tolist()
+
+    report["not_finite"] = np.flatnonzero(not_finite).tolist()
+
+    return report
+
+
+def _get_format_report(ego_pose_list):
+    """Runs the FORMAT_CHECKS on every pose.
+
+    Each check is first run over the whole list at once. The poses are only
+    checked one at a time if one of those fails.
     """
-    for ego_pose in ego_pose_list:
-        # Check timestamp
-        assert "timestamp" in ego_pose, "Ego Pose missing timestamp"
-        assert isinstance(
-            ego_pose["timestamp"], int
-        ), "Ego Pose should be an int. Received {}".format(type(ego_pose["timestamp"]))
-
-        # Check rotation
-        assert "rotation" in ego_pose, "Ego Pose missing rotation"
-        assert (
-            len(ego_pose["rotation"]) == 4
-        ), "Ego Pose rotation should be an array of length 4"
-
-        # Check translation
-        assert "translation" in ego_pose, "Ego Pose missing translation"
-        assert (
-            len(ego_pose["translation"]) == 3
-        ), "Ego Pose translation should be an array of length 3"
-
-
-def get_ego_pose_data(ego_pose_json_path):
+    try:
+        timestamp_types = set(map(type, map(itemgetter("timestamp"), ego_pose_list)))
+        well_formed = timestamp_types <= {int} and all(
+            set(map(len, map(itemgetter(key), ego_pose_list))) <= {length}
+            for key, length in POSE_SHAPES
+        )
+    except (KeyError, TypeError):
+        well_formed = False
+
+    report = {check: [] for check in FORMAT_CHECKS}
+    if well_formed:
+        return report
+
+    for i, pose in enumerate(ego_pose_list):
+        timestamp = pose.get("timestamp")
+        if timestamp is None:
+            report["missing_timestamp"].append(i)
+        elif isinstance(timestamp, bool) or not isinstance(timestamp, int):
+            report["timestamp_not_int"].append(i)
+
+        for key, length in POSE_SHAPES:
+            value = pose.get(key)
+            if value is None:
+                report["missing_" + key].append(i)
+            elif not hasattr(value, "__len__") or len(value) != length:
+                report["{}_not_length_{}".format(key, length)].append(i)
+
+    return report
+
+
+def _select_poses(ego_pose_list, excluded):
+    # Returns the indices and poses that aren't excluded
+    if len(excluded) == 0:
+        return np.arange(len(ego_pose_list)), ego_pose_list
+
+    keep = np.ones(len(ego_pose_list), dtype=bool)
+    keep[excluded] = False
+    indices = np.flatnonzero(keep)
+    return indices, [ego_pose_list[i] for i in indices.tolist()]
+
+
+def _to_float_array(poses, key, length):
+    """Converts the rotations or translations of well-formed poses to an
+    (N, length) float array. The rows are only converted one at a time if
+    the whole list can't be converted at once.
+
+    Returns:
+        tuple: the array and a mask of the rows that are numeric (the rest
+            are NaN)
+    """
+    values = map(itemgetter(key), poses)
+    try:
+        array = np.fromiter(
+            chain.from_iterable(values), dtype=np.float64, count=len(poses) * length
+        )
+        return array.reshape(-1, length), np.ones(len(poses), dtype=bool)
+    except (TypeError, ValueError):
+        pass
+
+    array = np.full((len(poses), length), np.nan)
+    numeric = np.ones(len(poses), dtype=bool)
+    for i, value in enumerate(map(itemgetter(key), poses)):
+        try:
+            array[i] = np.array(value, dtype=np.float64)
+        except (TypeError, ValueError):
+            numeric[i] = False
+
+    return array, numeric
+
+
+def _summarize_indices(indices, limit=10):
+    # Keep the error message short for logs with millions of poses
+    if len(indices) <= limit:
+        return indices
+
+    return "{} ... ({} total)".format(indices[:limit], len(indices))
+
+
+def get_ego_pose_data(
+    ego_pose_json_path, existing_tokens={}, validate=True, token_generator=None
+):
     """Reads a list of ego pose data from a JSON file and adds unique tokens
 
     Args:
         ego_pose_json_path (str): path to the ego pose data
+        existing_tokens (dict, optional): a dictionary mapping str(timestamp)
+            -> token to re-use. Defaults to {}.
+        validate (bool, optional): whether to validate the data.
+            Defaults to True.
+        token_generator (TokenGenerator, optional): the generator to create
+            new tokens with. Defaults to None (random UUIDs).
 
     Returns:
         tuple(dict, list): a dictionary mapping timestamps -> pose dicts,
         a list of sorted ego pose timestamps
     """
     ego_pose_list = read_json(ego_pose_json_path)
-    validate_ego_pose(ego_pose_list)
+    if validate:
+        validate_ego_pose(ego_pose_list)
 
     # Add unique tokens to each entry in the list
     for pose in ego_pose_list:
-        pose["token"] = create_token()
+        pose["token"] = existing_tokens.get(str(pose["timestamp"])) or create_token(
+            token_generator, ("ego_pose", pose["timestamp"])
+        )
 
     ego_pose_dict = convert_list_to_dict(ego_pose_list, using_key="timestamp")
     ego_pose_timestamps = list(ego_pose_dict.keys())
     ego_pose_timestamps.sort()
 
     return ego_pose_dict, ego_pose_timestamps
+
+
+def get_ego_pose_data_from_table(ego_pose_table):
+    """Gets the same data as get_ego_pose_data from an EgoPoseTable
+    that has tokens
+
+    Args:
+        ego_pose_table (EgoPoseTable): the ego poses
+
+    Returns:
+        tuple(dict, list): a dictionary mapping timestamps -> pose dicts,
+        a list of sorted ego pose timestamps
+    """
+    assert ego_pose_table.tokens is not None, "The ego pose table needs tokens"
+
+    ego_pose_dict = convert_list_to_dict(
+        ego_pose_table.to_list(), using_key="timestamp"
+    )
+    return ego_pose_dict, ego_pose_table.timestamps.tolist()
+
+
+class EgoPoseTable:
+    def __init__(self, timestamps, rotations, translations, tokens=None):
+        """Ego poses stored as contiguous arrays sorted by timestamp.
+
+        Rotations are quaternions in [w, x, y, z] order (the same order as
+        the "rotation" key of ego_pose.json).
+
+        Args:
+            timestamps (array_like): (N,) int64 timestamps
+            rotations (array_like): (N, 4) quaternions
+            translations (array_like): (N, 3) translations
+            tokens (array_like, optional): (N,) tokens. Defaults to None.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        rotations = np.asarray(rotations, dtype=np.float64)
+        translations = np.asarray(translations, dtype=np.float64)
+
+        assert timestamps.ndim == 1, "Timestamps should be an (N,) array"
+        assert rotations.shape == (len(timestamps), 4), "Rotations should be (N, 4)"
+        assert translations.shape == (
+            len(timestamps),
+            3,
+        ), "Translations should be (N, 3)"
+
+        # Only sort if needed so memory-mapped arrays aren't copied
+        if np.any(timestamps[1:] < timestamps[:-1]):
+            order = np.argsort(timestamps, kind="stable")
+            timestamps = timestamps[order]
+            rotations = rotations[order]
+            translations = translations[order]
+            if tokens is not None:
+                tokens = np.asarray(tokens)[order]
+
+        self.timestamps = timestamps
+        self.rotations = rotations
+        self.translations = translations
+        self.tokens = np.asarray(tokens) if tokens is not None else None
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @classmethod
+    def from_list(cls, ego_pose_list):
+        """Creates a table from a list of ego pose dicts (see validate_ego_pose)
+
+        Args:
+            ego_pose_list (list(dict)): the ego poses
+
+        Returns:
+            EgoPoseTable: the table
+        """
+        tokens = None
+        if len(ego_pose_list) > 0 and "token" in ego_pose_list[0]:
+            tokens = [pose["token"] for pose in ego_pose_list]
+
+        return cls(
+            np.array([pose["timestamp"] for pose in ego_pose_list], dtype=np.int64),
+            np.array(
+                [pose["rotation"] for pose in ego_pose_list], dtype=np.float64
+            ).reshape(-1, 4),
+            np.array(
+                [pose["translation"] for pose in ego_pose_list], dtype=np.float64
+            ).reshape(-1, 3),
+            tokens=tokens,
+        )
+
+    def to_list(self):
+        """Converts the table back to a list of ego pose dicts
+
+        Returns:
+            list(dict): the ego poses sorted by timestamp
+        """
+        ego_pose_list = [
+            {"timestamp": timestamp, "rotation": rotation, "translation": translation}
+            for timestamp, rotation, translation in zip(
+                self.timestamps.tolist(),
+                self.rotations.tolist(),
+                self.translations.tolist(),
+            )
+        ]
+
+        if self.tokens is not None:
+            for pose, token in zip(ego_pose_list, self.tokens.tolist()):
+                pose["token"] = token
+
+        return ego_pose_list
+
+    def save(self, path):
+        """Saves the table. A path ending in ".npz" is saved as a single
+        .npz file. Any other path is saved as a directory with one .npy
+        file per array, which can be memory-mapped when loading.
+
+        Args:
+            path (str): the path to save to
+        """
+        arrays = {
+            "timestamps": self.timestamps,
+            "rotations": self.rotations,
+            "translations": self.translations,
+        }
+        if self.tokens is not None:
+            arrays["tokens"] = self.tokens.astype(str)
+
+        if str(path).endswith(".npz"):
+            np.savez(path, **arrays)
+            return
+
+        Path(path).mkdir(parents=True, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(path, name + ".npy"), array)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """Loads a table saved with save()
+
+        Args:
+            path (str): the path the table was saved to
+            mmap_mode (str, optional): the memory-map mode for .npy
+                directories (see np.load). Defaults to "r" (read-only).
+
+        Returns:
+            EgoPoseTable: the table
+        """
+        if str(path).endswith(".npz"):
+            with np.load(path) as arrays:
+                arrays = dict(arrays)
+        else:
+            arrays = {
+                file.stem: np.load(str(file), mmap_mode=mmap_mode)
+                for file in Path(path).glob("*.npy")
+            }
+
+        return cls(
+            arrays["timestamps"],
+            arrays["rotations"],
+            arrays["translations"],
+            tokens=arrays.get("tokens"),
+        )
+
+    def nearest(self, query_timestamps):
+        """Finds the closest ego pose for every query timestamp. Ties are
+        broken the same way as get_closest_match (the earlier pose wins).
+
+        Args:
+            query_timestamps (array_like): (M,) timestamps to look up
+
+        Returns:
+            np.ndarray: (M,) index of the closest ego pose for each query
+        """
+        return get_closest_match_indices(self.timestamps, query_timestamps)
+
+    def interpolate(self, query_timestamps):
+        """Interpolates the ego pose at every query timestamp. Rotations use
+        spherical linear interpolation (SLERP) and translations use linear
+        interpolation. Queries outside the table use the first/last pose.
+
+        Args:
+            query_timestamps (array_like): (M,) timestamps to interpolate at
+
+        Returns:
+            tuple(np.ndarray, np.ndarray): (M, 4) rotations, (M, 3) translations
+        """
+        query_timestamps = np.asarray(query_timestamps, dtype=np.int64)
+        assert len(self) > 0, "Unable to interpolate an empty table"
+
+        if len(self) == 1:
+            return (
+                np.repeat(self.rotations, len(query_timestamps), axis=0),
+                np.repeat(self.translations, len(query_timestamps), axis=0),
+            )
+
+        # Index of the poses before and after each query
+        after = np.clip(
+            np.searchsorted(self.timestamps, query_timestamps, side="right"),
+            1,
+            len(self) - 1,
+        )
+        before = after - 1
+
+        # How far each query is between the two poses (0 -> before, 1 -> after)
+        start = self.timestamps[before]
+        duration = (self.timestamps[after] - start).astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(duration > 0, (query_timestamps - start) / duration, 0.0)
+        t = np.clip(t, 0.0, 1.0)[:, np.newaxis]
+
+        translations = (1 - t) * self.translations[before] + t * self.translations[
+            after
+        ]
+
+        return slerp(self.rotations[before], self.rotations[after], t), translations
+
+
+def slerp(q0, q1, t):
+    """Spherical linear interpolation between two arrays of quaternions
+
+    Args:
+        q0 (np.ndarray): (M, 4) quaternions at t = 0
+        q1 (np.ndarray): (M, 4) quaternions at t = 1
+        t (np.ndarray): (M, 1) interpolation amounts between 0 and 1
+
+    Returns:
+        np.ndarray: (M, 4) unit quaternions
+    """
+    q0 = q0 / np.linalg.norm(q0, axis=1, keepdims=True)
+    q1 = q1 / np.linalg.norm(q1, axis=1, keepdims=True)
+
+    # Take the shortest path
+    dot = np.sum(q0 * q1, axis=1, keepdims=True)
+    q1 = np.where(dot < 0, -q1, q1)
+    dot = np.clip(np.abs(dot), 0.0, 1.0)
+
+    theta = np.arccos(dot)
+    sin_theta = np.sin(theta)
+
+    # Fall back to linear interpolation when the quaternions are very close
+    close = sin_theta < 1e-6
+    safe_sin_theta = np.where(close, 1.0, sin_theta)
+    w0 = np.where(close, 1 - t, np.sin((1 - t) * theta) / safe_sin_theta)
+    w1 = np.where(close, t, np.sin(t * theta) / safe_sin_theta)
+
+    result = w0 * q0 + w1 * q1
+    return result / np.linalg.norm(result, axis=1, keepdims=True)
@@ -1,8 +1,42 @@
-import cv2
+import os
+import struct
+
+# How many bytes to read from the start of a file when looking for a header.
+# This covers the PNG, BMP and PPM headers. JPEG files are walked marker by
+# marker, so large EXIF blocks are skipped over instead of being read.
+HEADER_READ_SIZE = 4096
+
+# JPEG start of frame markers that contain the image dimensions.
+# 0xC4 (DHT), 0xC8 (JPG) and 0xCC (DAC) are in the same range but are not SOF
+JPEG_SOF_MARKERS = {
+    0xC0,
+    0xC1,
+    0xC2,
+    0xC3,
+    0xC5,
+    0xC6,
+    0xC7,
+    0xC9,
+    0xCA,
+    0xCB,
+    0xCD,
+    0xCE,
+    0xCF,
+}
+
+# JPEG markers that are not followed by a length field
+JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7}
 
 
 def get_image_dimensions(image_path):
-    """Gets an image's dimensions from a file path
+    """Gets an image's dimensions from a file path.
+
+    The dimensions are read from the file header when possible (PNG, JPEG,
+    BMP, PPM/PGM/PBM). Other formats are fully decoded with OpenCV.
+
+    The header parsers return the stored dimensions and ignore the EXIF
+    orientation tag that ``cv2.imread`` applies, so a rotated JPEG reports
+    its stored width/height rather than the width/height OpenCV decodes it to.
 
     Args:
         image_path (str): file path
@@ -10,6 +44,142 @@ def get_image_dimensions(image_path):
     Returns:
         tuple: a tuple of form image_width, image_height
     """
-    img = cv2.imread(image_path)
+    dimensions = read_image_dimensions_from_header(image_path)
+
+    if dimensions is None:
+        dimensions = read_image_dimensions_with_cv2(image_path)
+
+    return dimensions
+
+
+def read_image_dimensions_with_cv2(image_path):
+    """Gets an image's dimensions by decoding it with OpenCV
+
+    Args:
+        image_path (str): file path
+
+    Returns:
+        tuple: a tuple of form image_width, image_height
+    """
+    # Only import OpenCV when a file actually needs to be decoded
+    import cv2
+
+    img = cv2.imread(str(image_path))
+    assert img is not None, "Unable to read image: {}".format(image_path)
     img_height, img_width = img.shape[:2]
     return img_width, img_height
+
+
+def read_image_dimensions_from_header(image_path):
+    """Gets an image's dimensions by parsing only the file header
+
+    The EXIF orientation tag is ignored, so the stored (unrotated)
+    dimensions are returned.
+
+    Args:
+        image_path (str): file path
+
+    Returns:
+        tuple: a tuple of form image_width, image_height or None if
+            the format is not supported
+    """
+    with open(image_path, "rb") as f:
+        head = f.read(HEADER_READ_SIZE)
+
+        if head.startswith(b"\x89PNG\r\n\x1a\n"):
+            return _get_png_dimensions(head)
+        elif head.startswith(b"\xff\xd8"):
+            return _get_jpeg_dimensions(f)
+        elif head.startswith(b"BM"):
+            return _get_bmp_dimensions(head)
+        elif head[:2] in (b"P1", b"P2", b"P3", b"P4", b"P5", b"P6"):
+            return _get_ppm_dimensions(head)
+
+    return None
+
+
+def _get_png_dimensions(head):
+    # The IHDR chunk is always first: 8 byte signature, 4 byte length,
+    # 4 byte chunk type then the big-endian width and height
+    if len(head) < 24 or head[12:16] != b"IHDR":
+        return None
+
+    img_width, img_height = struct.unpack(">II", head[16:24])
+    return img_width, img_height
+
+
+def _get_jpeg_dimensions(f):
+    # Skip the SOI marker and walk the segments until a SOF marker is found
+    f.seek(2)
+
+    while True:
+        byte = f.read(1)
+
+        # Skip any fill bytes before the marker
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+
+        if not byte:
+            return None
+
+        marker = byte[0]
+
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+        if marker == 0xD9 or marker == 0xDA:
+            # End of image or start of scan before any frame header
+            return None
+
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        (length,) = struct.unpack(">H", length_bytes)
+
+        if marker in JPEG_SOF_MARKERS:
+            # Sample precision (1 byte) followed by the height and width
+            frame_header = f.read(5)
+            if len(frame_header) < 5:
+                return None
+            img_height, img_width = struct.unpack(">HH", frame_header[1:5])
+            return img_width, img_height
+
+        # Skip the rest of the segment
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def _get_bmp_dimensions(head):
+    if len(head) < 26:
+        return None
+
+    (dib_header_size,) = struct.unpack("<I", head[14:18])
+
+    if dib_header_size == 12:
+        # BITMAPCOREHEADER uses unsigned 16 bit dimensions
+        img_width, img_height = struct.unpack("<HH", head[18:22])
+    else:
+        # BITMAPINFOHEADER and later. A negative height means top-down rows
+        img_width, img_height = struct.unpack("<ii", head[18:26])
+
+    return abs(img_width), abs(img_height)
+
+
+def _get_ppm_dimensions(head):
+    # The header is whitespace separated and may include comments
+    tokens = []
+
+    for line in head[2:].split(b"\n"):
+        line = line.split(b"#", 1)[0]
+        tokens.extend(line.split())
+
+        if len(tokens) >= 2:
+            break
+
+    if len(tokens) < 2:
+        return None
+
+    try:
+        return int(tokens[0]), int(tokens[1])
+    except ValueError:
+        return None
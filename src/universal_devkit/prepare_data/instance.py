@@ -1,3 +1,6 @@
+from operator import itemgetter
+
+
 def get_instance_data(sample_annotation_data: list):
     """Gets a dictionary mapping every instance token -> data about it
 
@@ -22,7 +25,7 @@ def get_instance_data(sample_annotation_data: list):
                     "token"
                 ]
                 instance_data[instance_token]["first_annotation_timestamp"] = timestamp
-            elif timestamp > instance_data[instance_token]["last_annotation_timestamp"]:
+            if timestamp > instance_data[instance_token]["last_annotation_timestamp"]:
                 instance_data[instance_token]["last_annotation_token"] = annotation[
                     "token"
                 ]
@@ -49,3 +52,107 @@ def get_instance_data(sample_annotation_data: list):
         del instance_dict["last_annotation_timestamp"]
 
     return instance_data
+
+
+def factorize(values):
+    """Numbers every distinct value in the order it first appears
+
+    Example::
+
+        >>> factorize(["b", "a", "b"])
+        (array([0, 1, 0]), ["b", "a"])
+
+    Args:
+        values (list): hashable values
+
+    Returns:
+        tuple(np.array, list): the int64 code of every value and the
+            distinct values (the value of each code)
+    """
+    import numpy as np
+
+    uniques = list(dict.fromkeys(values))
+    index = {value: i for i, value in enumerate(uniques)}
+    codes = np.fromiter(map(index.__getitem__, values), np.int64, len(values))
+    return codes, uniques
+
+
+def group_instances(instance_tokens, timestamps):
+    """Groups annotations by instance with grouped NumPy reductions instead
+    of a loop over the annotations
+
+    Args:
+        instance_tokens (list(str)): the instance token of every annotation
+        timestamps (array_like): the timestamp of every annotation
+
+    Returns:
+        tuple: the instance tokens in the order they first appear and int64
+            arrays with each instance's number of annotations and the
+            indices of its first annotation in the list, its earliest
+            annotation and its latest annotation. Ties go to the annotation
+            that comes first in the list.
+    """
+    import numpy as np
+
+    codes, instances = factorize(instance_tokens)
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+
+    if len(codes) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return instances, empty, empty, empty, empty
+
+    counts = np.bincount(codes, minlength=len(instances))
+    group_starts = np.cumsum(counts) - counts
+
+    # Codes are numbered in order of appearance, so an annotation is the
+    # first of its instance when its code is larger than every code before it
+    first_seen = np.empty(len(codes), dtype=bool)
+    first_seen[0] = True
+    first_seen[1:] = codes[1:] > np.maximum.accumulate(codes)[:-1]
+
+    # lexsort is stable so the ties stay in list order
+    earliest = np.lexsort((timestamps, codes))[group_starts]
+    latest = np.lexsort((-timestamps, codes))[group_starts]
+
+    return instances, counts, np.flatnonzero(first_seen), earliest, latest
+
+
+def get_instance_data_columnar(sample_annotation_data: list):
+    """Columnar version of get_instance_data. Only the instance tokens and
+    timestamps are read from every annotation. The rest is computed by
+    group_instances.
+
+    Args:
+        sample_annotation_data (list): a list of dictionaries with
+            sample annotation information
+
+    Returns:
+        dict: a dictionary mapping instance_tokens to dicts about them
+    """
+    import numpy as np
+
+    instances, counts, first_seen, earliest, latest = group_instances(
+        list(map(itemgetter("instance_token"), sample_annotation_data)),
+        np.fromiter(
+            map(itemgetter("timestamp"), sample_annotation_data),
+            np.int64,
+            len(sample_annotation_data),
+        ),
+    )
+
+    return {
+        instance_token: {
+            "token": instance_token,
+            "category_token": sample_annotation_data[first]["category_token"],
+            "nbr_annotations": count,
+            "first_annotation_token": sample_annotation_data[first_token]["token"],
+            "last_annotation_token": sample_annotation_data[last_token]["token"],
+        }
+        for instance_token, count, first, first_token, last_token in zip(
+            instances,
+            counts.tolist(),
+            first_seen.tolist(),
+            earliest.tolist(),
+            latest.tolist(),
+        )
+    }
@@ -0,0 +1,172 @@
+import hashlib
+import os
+
+from universal_devkit.utils.utils import read_json, write_json
+
+# Bump this if the structure of the manifest changes. Manifests with a
+# different version are ignored and everything is rebuilt.
+MANIFEST_VERSION = 1
+
+# The file name used for the manifest inside the output directory
+MANIFEST_FILE_NAME = "manifest.json"
+
+# Read files in 1 MB blocks when hashing them
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def get_file_hash(file_path):
+    """Gets the SHA-1 hash of a file's contents
+
+    Args:
+        file_path (str): path to the file
+
+    Returns:
+        str: the hex digest of the file's contents
+    """
+    file_hash = hashlib.sha1()
+
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            file_hash.update(block)
+
+    return file_hash.hexdigest()
+
+
+class Manifest:
+    def __init__(self, manifest_path, root_dir):
+        """Keeps track of the inputs used to build a scene so a rebuild
+        only needs to reprocess the inputs that changed.
+
+        For every input file the manifest records the path (relative to
+        root_dir), size, modification time and a hash of the contents,
+        together with the data that was derived from the file. A file is
+        unchanged if its size and modification time match. If they don't,
+        the file is hashed and only counts as changed if the hash differs.
+
+        The manifest also stores the tokens that were assigned to records
+        (ex. timestamp -> sample token) so they can be re-used.
+
+        Args:
+            manifest_path (str): path to the manifest JSON file. It doesn't
+                need to exist yet.
+            root_dir (str): the directory the input paths are relative to
+        """
+        self.manifest_path = manifest_path
+        self.root_dir = root_dir
+
+        previous = {}
+        if os.path.exists(manifest_path):
+            previous = read_json(manifest_path)
+
+        if previous.get("version") != MANIFEST_VERSION:
+            previous = {}
+
+        # Relative file path -> file entry from the last build
+        self._previous_files = previous.get("files", {})
+
+        # Namespace -> (key -> token) from the last build
+        self._previous_tokens = previous.get("tokens", {})
+
+        self._files = {}
+        self._tokens = {}
+
+    def _get_relative_path(self, file_path):
+        return os.path.relpath(str(file_path), self.root_dir)
+
+    def check(self, file_path):
+        """Checks whether a file changed since the last build and records
+        its current state.
+
+        Args:
+            file_path (str): path to the input file
+
+        Returns:
+            tuple(bool, dict): whether the file is unchanged, the data stored
+                for the file by the last build (None if there was none)
+        """
+        relative_path = self._get_relative_path(file_path)
+        previous = self._previous_files.get(relative_path)
+
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return False, None
+
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+        if (
+            previous is not None
+            and previous["size"] == entry["size"]
+            and previous["mtime"] == entry["mtime"]
+        ):
+            # Trust the size and modification time to avoid hashing the file
+            entry["hash"] = previous["hash"]
+        else:
+            entry["hash"] = get_file_hash(file_path)
+
+        previous_data = previous["data"] if previous is not None else None
+        unchanged = previous_data is not None and previous["hash"] == entry["hash"]
+
+        # Keep the previous data until set_data() replaces it
+        entry["data"] = previous_data if unchanged else None
+        self._files[relative_path] = entry
+
+        return unchanged, previous_data
+
+    def get_hash(self, file_path):
+        """Gets the hash of a file recorded by check() in this build
+
+        Args:
+            file_path (str): path to the input file
+
+        Returns:
+            str: the hex digest of the file's contents or None if the file
+                wasn't passed to check() or doesn't exist
+        """
+        entry = self._files.get(self._get_relative_path(file_path))
+
+        return entry["hash"] if entry is not None else None
+
+    def set_data(self, file_path, data):
+        """Stores the data derived from a file. Files that weren't passed
+        to check() or that don't exist are ignored.
+
+        Args:
+            file_path (str): path to the input file
+            data (any): JSON serializable data derived from the file
+        """
+        entry = self._files.get(self._get_relative_path(file_path))
+
+        if entry is not None:
+            entry["data"] = data
+
+    def get_tokens(self, namespace):
+        """Gets the tokens stored by the last build
+
+        Args:
+            namespace (str): the type of record (ex. "sample", "ego_pose")
+
+        Returns:
+            dict: a dictionary mapping str(key) -> token
+        """
+        return self._previous_tokens.get(namespace, {})
+
+    def set_tokens(self, namespace, tokens):
+        """Stores the tokens assigned to records in this build
+
+        Args:
+            namespace (str): the type of record (ex. "sample", "ego_pose")
+            tokens (dict): a dictionary mapping key -> token
+        """
+        self._tokens[namespace] = {str(key): token for key, token in tokens.items()}
+
+    def save(self):
+        """Writes the manifest to disk"""
+        write_json(
+            {
+                "version": MANIFEST_VERSION,
+                "files": self._files,
+                "tokens": self._tokens,
+            },
+            self.manifest_path,
+        )
@@ -0,0 +1,302 @@
+"""Reads Point Cloud Data (.pcd) files.
+
+The header is parsed into a NumPy structured dtype with one field per PCD
+field. Binary payloads are memory-mapped so no points are copied until they
+are used, binary_compressed payloads are LZF decompressed and ASCII payloads
+are parsed in a single np.loadtxt call.
+
+See https://pointclouds.org/documentation/tutorials/pcd_file_format.html
+"""
+
+import os
+import struct
+from collections import namedtuple
+
+# The header of a .pcd file. data_offset is the byte offset of the payload
+PcdHeader = namedtuple(
+    "PcdHeader",
+    [
+        "version",
+        "fields",
+        "sizes",
+        "types",
+        "counts",
+        "width",
+        "height",
+        "viewpoint",
+        "points",
+        "data",
+        "data_offset",
+    ],
+)
+
+# A point cloud. points is a structured array with one field per PCD field
+PointCloud = namedtuple("PointCloud", ["points", "num_points", "fields", "viewpoint"])
+
+# The supported DATA types
+PCD_DATA_TYPES = ["ascii", "binary", "binary_compressed"]
+
+# PCD TYPE characters mapped to NumPy kind characters
+PCD_TYPE_KINDS = {"F": "f", "I": "i", "U": "u"}
+
+# The pose of the sensor when VIEWPOINT is missing (translation, quaternion)
+DEFAULT_VIEWPOINT = [0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0]
+
+# The number of header lines to read before giving up on finding DATA
+MAX_HEADER_LINES = 64
+
+
+def read_pcd_header(file_path):
+    """Reads the header of a .pcd file without reading any points
+
+    Args:
+        file_path (str): the path to the .pcd file
+
+    Returns:
+        PcdHeader: the header
+    """
+    values = {}
+
+    with open(file_path, "rb") as f:
+        for _ in range(MAX_HEADER_LINES):
+            line = f.readline()
+            assert line, "Unable to find the DATA line in {}".format(file_path)
+
+            line = line.split(b"#", 1)[0].strip()
+            if not line:
+                continue
+
+            key, *value = line.decode("ascii").split()
+            values[key.upper()] = value
+
+            if key.upper() == "DATA":
+                data_offset = f.tell()
+                break
+        else:
+            raise AssertionError("Unable to find the DATA line in {}".format(file_path))
+
+    for key in ["FIELDS", "SIZE", "TYPE", "WIDTH", "HEIGHT"]:
+        assert key in values, "{} is missing {}".format(file_path, key)
+
+    fields = values["FIELDS"]
+    counts = [int(count) for count in values.get("COUNT", ["1"] * len(fields))]
+    width = int(values["WIDTH"][0])
+    height = int(values["HEIGHT"][0])
+    data = values["DATA"][0].lower()
+
+    assert (
+        len(values["SIZE"]) == len(values["TYPE"]) == len(counts) == len(fields)
+    ), "FIELDS, SIZE, TYPE and COUNT should have the same length"
+    assert data in PCD_DATA_TYPES, "Unknown DATA type: {}".format(data)
+
+    return PcdHeader(
+        version=values.get("VERSION", [""])[0],
+        fields=fields,
+        sizes=[int(size) for size in values["SIZE"]],
+        types=[value.upper() for value in values["TYPE"]],
+        counts=counts,
+        width=width,
+        height=height,
+        viewpoint=[float(v) for v in values.get("VIEWPOINT", DEFAULT_VIEWPOINT)],
+        points=int(values.get("POINTS", [width * height])[0]),
+        data=data,
+        data_offset=data_offset,
+    )
+
+
+def get_pcd_dtype(header):
+    """Gets the structured dtype of a point
+
+    Fields with a COUNT above 1 become sub-arrays. Fields that are repeated
+    (ex. the "_" padding fields written by PCL) are numbered to keep the
+    names unique.
+
+    Args:
+        header (PcdHeader): the header of the .pcd file
+
+    Returns:
+        np.dtype: the little-endian dtype of a single point
+    """
+    import numpy as np
+
+    names = []
+    formats = []
+
+    for name, size, pcd_type, count in zip(
+        header.fields, header.sizes, header.types, header.counts
+    ):
+        if name in names:
+            name = "{}_{}".format(name, names.count(name))
+
+        base = np.dtype("<{}{}".format(PCD_TYPE_KINDS[pcd_type], size))
+        names.append(name)
+        formats.append(base if count == 1 else (base, (count,)))
+
+    return np.dtype({"names": names, "formats": formats})
+
+
+def lzf_decompress(data, uncompressed_size):
+    """Decompresses LZF data
+
+    The lzf package is used if it is installed. Otherwise the data is
+    decompressed in Python.
+
+    Args:
+        data (bytes): the compressed data
+        uncompressed_size (int): the size of the decompressed data
+
+    Returns:
+        bytes: the decompressed data
+    """
+    try:
+        import lzf
+
+        return lzf.decompress(bytes(data), uncompressed_size)
+    except ImportError:
+        pass
+
+    output = bytearray(uncompressed_size)
+    in_pos = 0
+    out_pos = 0
+
+    while in_pos < len(data):
+        ctrl = data[in_pos]
+        in_pos += 1
+
+        if ctrl < 32:
+            # A run of ctrl + 1 literal bytes
+            length = ctrl + 1
+            output[out_pos : out_pos + length] = data[in_pos : in_pos + length]
+            in_pos += length
+            out_pos += length
+            continue
+
+        # A back reference to length + 2 bytes that were already written
+        length = ctrl >> 5
+        if length == 7:
+            length += data[in_pos]
+            in_pos += 1
+        length += 2
+
+        ref = out_pos - ((ctrl & 0x1F) << 8) - data[in_pos] - 1
+        in_pos += 1
+        assert ref >= 0, "Invalid LZF back reference"
+
+        distance = out_pos - ref
+        if distance >= length:
+            output[out_pos : out_pos + length] = output[ref : ref + length]
+        else:
+            # The reference overlaps the bytes being written so it repeats
+            pattern = bytes(output[ref:out_pos])
+            repeated = pattern * (length // distance + 1)
+            output[out_pos : out_pos + length] = repeated[:length]
+        out_pos += length
+
+    assert out_pos == uncompressed_size, "The LZF data decompressed to the wrong size"
+    return bytes(output)
+
+
+def read_pcd(file_path, mmap=True):
+    """Reads the points of a .pcd file
+
+    Args:
+        file_path (str): the path to the .pcd file
+        mmap (bool, optional): whether to memory-map binary payloads instead
+            of reading them into memory. Defaults to True.
+
+    Returns:
+        PointCloud: the points as a structured array with a field per PCD
+            field, the number of points, the field names and the viewpoint
+    """
+    import numpy as np
+
+    header = read_pcd_header(file_path)
+    dtype = get_pcd_dtype(header)
+
+    if header.points == 0:
+        points = np.empty(0, dtype=dtype)
+    elif header.data == "binary":
+        expected_size = header.data_offset + header.points * dtype.itemsize
+        assert (
+            os.path.getsize(file_path) >= expected_size
+        ), "{} has fewer points than its header says".format(file_path)
+
+        if mmap:
+            points = np.memmap(
+                file_path,
+                dtype=dtype,
+                mode="r",
+                offset=header.data_offset,
+                shape=(header.points,),
+            )
+        else:
+            points = np.fromfile(
+                file_path, dtype=dtype, count=header.points, offset=header.data_offset
+            )
+    elif header.data == "binary_compressed":
+        points = _read_binary_compressed(file_path, header, dtype)
+    else:
+        with open(file_path, "rb") as f:
+            f.seek(header.data_offset)
+            points = np.loadtxt(f, dtype=dtype, ndmin=1, max_rows=header.points)
+        assert len(points) == header.points, "{} has {} points, expected {}".format(
+            file_path, len(points), header.points
+        )
+
+    return PointCloud(points, header.points, list(dtype.names), header.viewpoint)
+
+
+def _read_binary_compressed(file_path, header, dtype):
+    """Reads a binary_compressed payload. The decompressed data is stored
+    field by field (all the x values, then all the y values, ...).
+    """
+    import numpy as np
+
+    with open(file_path, "rb") as f:
+        f.seek(header.data_offset)
+        compressed_size, uncompressed_size = struct.unpack("<II", f.read(8))
+        data = f.read(compressed_size)
+
+    assert len(data) == compressed_size, "{} is truncated".format(file_path)
+    assert (
+        uncompressed_size == header.points * dtype.itemsize
+    ), "{} has fewer points than its header says".format(file_path)
+
+    data = lzf_decompress(data, uncompressed_size)
+    points = np.empty(header.points, dtype=dtype)
+
+    offset = 0
+    for name in dtype.names:
+        field_dtype = dtype.fields[name][0]
+        size = header.points * field_dtype.itemsize
+        points[name] = np.frombuffer(
+            data,
+            dtype=field_dtype.base,
+            count=size // field_dtype.base.itemsize,
+            offset=offset,
+        ).reshape(points[name].shape)
+        offset += size
+
+    return points
+
+
+def get_xyz(points):
+    """Gets the positions of points read by read_pcd
+
+    Args:
+        points (np.array): a structured array with x, y and z fields
+
+    Returns:
+        np.array: an (N, 3) float64 array of the positions
+    """
+    import numpy as np
+
+    assert all(
+        name in points.dtype.names for name in "xyz"
+    ), "The points need x, y and z fields"
+
+    xyz = np.empty((len(points), 3))
+    for i, name in enumerate("xyz"):
+        xyz[:, i] = points[name]
+
+    return xyz
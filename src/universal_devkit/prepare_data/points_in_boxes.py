@@ -0,0 +1,179 @@
+"""Counts the points inside oriented 3D boxes.
+
+Points are bucketed into a 2D grid on the x/y plane and sorted by cell. Every
+box only tests the points in the grid columns its axis-aligned bounds
+overlap, so the exact test runs on a small set of (box, point) candidate
+pairs instead of every point against every box. All the boxes are handled
+together without a Python loop.
+
+A box's size is its full extent along its own x, y and z axes (the layout
+the supervisely converter writes).
+"""
+
+import numpy as np
+
+from universal_devkit.scripts.calculate_extrinsic_matrix import (
+    euler_angles_to_rotation_matrices,
+    quaternions_to_rotation_matrices,
+)
+
+# The default grid cell size is the median box width divided by this
+CELLS_PER_BOX_WIDTH = 8
+
+# The most cells the default grid cell size creates
+MAX_GRID_CELLS = 2**20
+
+
+def get_box_rotation_matrices(rotations):
+    """Gets the rotation matrices of boxes
+
+    Args:
+        rotations (array_like): an (M, 4) array of [w, x, y, z] quaternions
+            or an (M, 3) array of euler angles (rotations about x, y and z)
+
+    Returns:
+        np.array: an (M, 3, 3) array of rotation matrices from the box frame
+            to the point cloud frame
+    """
+    rotations = np.asarray(rotations, dtype=np.float64).reshape(len(rotations), -1)
+
+    if rotations.shape[1] == 4:
+        return quaternions_to_rotation_matrices(rotations)
+
+    assert rotations.shape[1] == 3, "Rotations should be quaternions or euler angles"
+    return euler_angles_to_rotation_matrices(rotations)
+
+
+def get_default_cell_size(translations, half_extents):
+    """Picks a grid cell size that is a fraction of a typical box's width so
+    the cells a box overlaps closely follow its bounds. Larger cells are used
+    if the grid would have more than MAX_GRID_CELLS cells.
+    """
+    width = float(np.median(2 * half_extents[:, :2].max(axis=1)))
+    area = np.prod(
+        (translations + half_extents)[:, :2].max(axis=0)
+        - (translations - half_extents)[:, :2].min(axis=0)
+    )
+    cell_size = max(width / CELLS_PER_BOX_WIDTH, np.sqrt(area / MAX_GRID_CELLS))
+    return cell_size if cell_size > 0 else 1.0
+
+
+def count_points_in_boxes(points, translations, sizes, rotations, cell_size=None):
+    """Counts the points inside each oriented box. Points on a face of a box
+    count as inside.
+
+    Args:
+        points (array_like): an (N, 3) array of points (extra columns are
+            ignored)
+        translations (array_like): an (M, 3) array of box centers
+        sizes (array_like): an (M, 3) array of box extents along the box's
+            x, y and z axes
+        rotations (array_like): an (M, 4) array of [w, x, y, z] quaternions,
+            an (M, 3) array of euler angles or an (M, 3, 3) array of rotation
+            matrices
+        cell_size (float, optional): the width of the grid cells used to find
+            the candidate points. Defaults to get_default_cell_size.
+
+    Returns:
+        np.array: an (M,) int64 array with the number of points in each box
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, np.shape(points)[-1])
+    points = points[:, :3]
+    translations = np.asarray(translations, dtype=np.float64).reshape(-1, 3)
+    half_sizes = np.asarray(sizes, dtype=np.float64).reshape(-1, 3) / 2
+
+    num_boxes = len(translations)
+    if num_boxes == 0 or len(points) == 0:
+        return np.zeros(num_boxes, dtype=np.int64)
+
+    rotations = np.asarray(rotations, dtype=np.float64)
+    if rotations.shape[1:] != (3, 3):
+        rotations = get_box_rotation_matrices(rotations)
+
+    # The half extents of the axis-aligned bounds of each rotated box
+    half_extents = np.abs(rotations) @ half_sizes[:, :, None]
+    half_extents = half_extents[:, :, 0]
+
+    if cell_size is None:
+        cell_size = get_default_cell_size(translations, half_extents)
+
+    box_indices, point_indices = _get_candidate_pairs(
+        points, translations, half_extents, cell_size
+    )
+
+    # Move the candidate points into their box's frame: R^T (p - t). The
+    # products are written out because einsum is slow for 3x3 matrices
+    offsets = points[point_indices] - translations[box_indices]
+    pair_rotations = rotations.reshape(-1, 9)[box_indices]
+    pair_half_sizes = half_sizes[box_indices]
+    inside = np.ones(len(box_indices), dtype=bool)
+    for axis in range(3):
+        local = (
+            offsets[:, 0] * pair_rotations[:, axis]
+            + offsets[:, 1] * pair_rotations[:, 3 + axis]
+            + offsets[:, 2] * pair_rotations[:, 6 + axis]
+        )
+        inside &= np.abs(local) <= pair_half_sizes[:, axis]
+
+    return np.bincount(box_indices[inside], minlength=num_boxes)
+
+
+def _expand_ranges(starts, lengths):
+    """Concatenates np.arange(start, start + length) for every range"""
+    total = lengths.sum()
+    range_starts = np.cumsum(lengths) - lengths
+    return np.repeat(starts - range_starts, lengths) + np.arange(total)
+
+
+def _get_candidate_pairs(points, translations, half_extents, cell_size):
+    """Finds the (box, point) pairs where the point is in a grid column the
+    box's axis-aligned bounds overlap
+
+    Returns:
+        tuple(np.array, np.array): the box index and point index of each pair
+    """
+    # Ignore the points outside the bounds of every box
+    lower = translations - half_extents
+    upper = translations + half_extents
+    in_bounds = np.all(
+        (points >= lower.min(axis=0)) & (points <= upper.max(axis=0)), axis=1
+    )
+    candidate_points = np.flatnonzero(in_bounds)
+
+    # Cell coordinates on the x/y plane relative to the lower corner
+    origin = lower[:, :2].min(axis=0)
+    cells = np.floor((points[candidate_points, :2] - origin) / cell_size)
+    cells = cells.astype(np.int64)
+    num_columns, num_rows = np.floor((upper[:, :2].max(axis=0) - origin) / cell_size)
+    num_cells = (int(num_columns) + 1) * (int(num_rows) + 1)
+    num_rows = int(num_rows) + 1
+
+    # Sort the points by cell so the cells in a column are contiguous.
+    # cell_starts[key] is the index of the first point in the cell
+    keys = cells[:, 0] * num_rows + cells[:, 1]
+    if num_cells - 1 <= np.iinfo(np.uint16).max:
+        # Stable sorts of small integers use a linear time radix sort
+        keys = keys.astype(np.uint16)
+    order = np.argsort(keys, kind="stable")
+    candidate_points = candidate_points[order]
+    cell_starts = np.zeros(num_cells + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=num_cells), out=cell_starts[1:])
+
+    lower_cells = np.floor((lower[:, :2] - origin) / cell_size).astype(np.int64)
+    upper_cells = np.floor((upper[:, :2] - origin) / cell_size).astype(np.int64)
+
+    # One key range per (box, column) the box overlaps
+    num_columns = upper_cells[:, 0] - lower_cells[:, 0] + 1
+    column_boxes = np.repeat(np.arange(len(translations)), num_columns)
+    columns = _expand_ranges(lower_cells[:, 0], num_columns)
+
+    start_keys = columns * num_rows + lower_cells[column_boxes, 1]
+    end_keys = columns * num_rows + upper_cells[column_boxes, 1]
+    starts = cell_starts[start_keys]
+    ends = cell_starts[end_keys + 1]
+
+    lengths = ends - starts
+    box_indices = np.repeat(column_boxes, lengths)
+    point_indices = candidate_points[_expand_ranges(starts, lengths)]
+
+    return box_indices, point_indices
@@ -1,7 +1,9 @@
 import os
 
-from image_utils import get_image_dimensions
-from utils import (
+from universal_devkit.prepare_data.image_utils import get_image_dimensions
+from universal_devkit.prepare_data.pcd_utils import get_pcd_dtype, read_pcd_header
+from universal_devkit.prepare_data.sample_annotation import ANNOTATION_DIR_NAME
+from universal_devkit.utils.utils import (
     create_token,
     get_all_non_hidden_files,
     get_file_extension,
@@ -9,7 +11,13 @@ from utils import (
 )
 
 
-def get_sample_json(sample_dir_path, scene_token, primary_sensor="LIDAR_TOP"):
+def get_sample_json(
+    sample_dir_path,
+    scene_token,
+    primary_sensor="LIDAR_TOP",
+    existing_tokens={},
+    token_generator=None,
+):
     """Gets a dictionary with information on each of the samples
 
     Args:
@@ -17,6 +25,10 @@ def get_sample_json(sample_dir_path, scene_token, primary_sensor="LIDAR_TOP"):
         scene_token (str): the token identifying the scene
         primary_sensor (str, optional): the sensor to use to decide timestamps.
             Defaults to "LIDAR_TOP".
+        existing_tokens (dict, optional): a dictionary mapping str(timestamp)
+            -> token to re-use. Defaults to {}.
+        token_generator (TokenGenerator, optional): the generator to create
+            new tokens with. Defaults to None (random UUIDs).
 
     Returns:
         tuple(dict, list): a dictionary of timestamps -> sample dicts,
@@ -24,10 +36,9 @@ def get_sample_json(sample_dir_path, scene_token, primary_sensor="LIDAR_TOP"):
     """
     sensor_data_dir = os.path.join(sample_dir_path, primary_sensor)
 
-    files = get_all_non_hidden_files(sensor_data_dir)
-
-    # Remove calibration file
-    files.remove("calibration.json")
+    files = get_all_non_hidden_files(
+        sensor_data_dir, exclude=["calibrated_sensor.json", ANNOTATION_DIR_NAME]
+    )
 
     # Map from timestamp -> sample data
     # {
@@ -49,7 +60,8 @@ def get_sample_json(sample_dir_path, scene_token, primary_sensor="LIDAR_TOP"):
         )
 
         sample_dict[timestamp] = {
-            "token": create_token(),
+            "token": existing_tokens.get(str(timestamp))
+            or create_token(token_generator, ("sample", timestamp)),
             "timestamp": timestamp,
             "scene_token": scene_token,
             "prev": "",
@@ -57,17 +69,12 @@ def get_sample_json(sample_dir_path, scene_token, primary_sensor="LIDAR_TOP"):
         }
 
     # Now add in prev and next
-    timestamps = sample_dict.values()
+    timestamps = list(sample_dict.keys())
     timestamps.sort()
 
-    for i in range(1, len(timestamps) - 1):
-        timestamp = timestamps[i]
-        sample_dict[timestamp]["prev"] = timestamps[i - 1]
-        sample_dict[timestamp]["next"] = timestamps[i + 1]
-
-    # Handle special case of the first and the last
-    sample_dict[timestamp[0]]["next"] = timestamps[1]
-    sample_dict[timestamp[-1]]["prev"] = timestamps[-2]
+    for prev_timestamp, next_timestamp in zip(timestamps, timestamps[1:]):
+        sample_dict[next_timestamp]["prev"] = sample_dict[prev_timestamp]["token"]
+        sample_dict[prev_timestamp]["next"] = sample_dict[next_timestamp]["token"]
 
     return sample_dict, timestamps
 
@@ -80,7 +87,8 @@ def get_file_data(file_path, modality: str):
         modality (str): the modality "camera", "lidar", "radar"
 
     Returns:
-        dict: dictionary describing data on the file
+        dict: dictionary describing data on the file. Lidar and radar .pcd
+            files also have "num_points" and "fields"
     """
     file_extension = get_file_extension(file_path)
 
@@ -92,12 +100,19 @@ def get_file_data(file_path, modality: str):
 
     if modality == "camera":
         data = {**data, **get_data_from_img(file_path)}
+    elif modality in ("lidar", "radar") and file_extension == ".pcd":
+        data = {**data, **get_data_from_pcd(file_path)}
 
     return data
 
 
-def get_data_from_pcd(file_path, is_radar=False):
-    pass
+def get_data_from_pcd(file_path):
+    # Only the header is read. The points are never loaded
+    header = read_pcd_header(file_path)
+    return {
+        "num_points": header.points,
+        "fields": list(get_pcd_dtype(header).names),
+    }
 
 
 def get_data_from_img(file_path):
@@ -1,18 +1,93 @@
-from utils import create_token, get_full_path_to_file, read_json
+import os
+from pathlib import Path
 
+import numpy as np
 
-def get_sample_annotation(root_data_dir: str, sample_dict: dict):
+from universal_devkit.prepare_data.pcd_utils import get_xyz, read_pcd
+from universal_devkit.prepare_data.points_in_boxes import count_points_in_boxes
+from universal_devkit.prepare_data.sensor import get_modality_from_name
+from universal_devkit.utils.utils import create_token, read_json
+
+# The folder inside a sensor directory with the annotation files
+# Ex: samples/LIDAR_TOP/annotations/1532402927647951.pcd.json
+ANNOTATION_DIR_NAME = "annotations"
+
+
+def get_annotation_path(file_path):
+    """Gets the path to the annotation file for a data file
+
+    Example::
+
+        >>> get_annotation_path("samples/LIDAR_TOP/1532402927647951.pcd")
+        "samples/LIDAR_TOP/annotations/1532402927647951.pcd.json"
+
+    Args:
+        file_path (str): path to the data file
+
+    Returns:
+        str: path to the annotation file
+    """
+    directory, file_name = os.path.split(str(file_path))
+    return os.path.join(directory, ANNOTATION_DIR_NAME, file_name + ".json")
+
+
+def count_annotation_points(annotations, file_path, transform=None):
+    """Counts the points of a .pcd file inside each annotation's box
+
+    Args:
+        annotations (list(dict)): annotations with a "translation", "size"
+            and "rotation"
+        file_path (str): the path to the .pcd file
+        transform (np.array, optional): a 4x4 transformation from the point
+            cloud's frame to the annotations' frame. Defaults to None.
+
+    Returns:
+        np.array: the number of points in each annotation's box
+    """
+    points = get_xyz(read_pcd(file_path).points)
+
+    if transform is not None:
+        points = points @ transform[:3, :3].T + transform[:3, 3]
+
+    return count_points_in_boxes(
+        points,
+        [ann["translation"] for ann in annotations],
+        [ann["size"] for ann in annotations],
+        [ann["rotation"] for ann in annotations],
+    )
+
+
+def get_sample_annotation(
+    root_data_dir: str, sample_dict: dict, token_generator=None, radar_files=()
+):
     """Gets a list of annotations for a single file
 
+    num_lidar_pts (or num_radar_pts for a radar) is the number of points in
+    the annotated .pcd file inside each box. The points of radar_files are
+    added to num_radar_pts. Counts in the annotation file are kept.
+
     Args:
-        root_data_dir (str): the path to the root of the data directory
+        root_data_dir (str): the path to the root of the data directory.
+            The filename in sample_dict already includes it.
         sample_dict (dict): a dictionary with data for this specific file
+        token_generator (TokenGenerator, optional): the generator to create
+            the tokens with. Defaults to None (random UUIDs).
+        radar_files (list(tuple), optional): (path, transform) of the radar
+            .pcd files in the same sample. transform is the 4x4
+            transformation from the radar's frame to the annotated file's
+            frame. Defaults to ().
 
     Returns:
-        list: a list of dictionaries with each annotation
+        list: a list of dictionaries with each annotation. The list is empty
+            if the file has no annotation file.
     """
-    full_path = get_full_path_to_file(root_data_dir, sample_dict["filepath"])
-    sample_token = sample_dict["token"]
+    # The filename already starts with the input directory
+    data_path = sample_dict["filename"]
+    full_path = get_annotation_path(data_path)
+    sample_token = sample_dict["sample_token"]
+
+    if not os.path.exists(full_path):
+        return []
 
     sample_annotation_data = read_json(full_path)
 
@@ -20,31 +95,62 @@ def get_sample_annotation(root_data_dir: str, sample_dict: dict):
     annotations = []
 
     # Loop through all the annotations for a specific file
-    for ann in sample_annotation_data:
+    for i, ann in enumerate(sample_annotation_data):
         # @TODO: the user needs to add a "category_token" key
         annotation = {
-            "token": create_token(),
+            "token": create_token(
+                token_generator, ("sample_annotation", sample_dict["token"], i)
+            ),
             "sample_token": sample_token,
-            # @TODO: need to actually add in tracking over time
-            "instance_token": create_token(),
+            "timestamp": sample_dict["timestamp"],
+            # Set by tracking.track_instances unless the annotation file
+            # has one
+            "instance_token": "",
             # @TODO: need to add in correct visibility token
             "visibility_token": "4",
             "attribute_tokens": [],
             "prev": "",
             "next": "",
-            # @TODO: use bbox-utils to actually get the correct number of lidar
-            # pts if this is a PCD File
             "num_lidar_pts": 0,
             "num_radar_pts": 0,
         }
 
         # Append all the attributes from the annotation file
-        # Any instance_token specified by the user will override the randomly
-        # generated one
+        # Any instance_token specified by the user is kept by tracking
         annotation = {**annotation, **ann}
 
         # @TODO: add in data formatting checking
 
         annotations.append(annotation)
 
+    if annotations and all(
+        key in ann for ann in annotations for key in ["translation", "size", "rotation"]
+    ):
+        _set_point_counts(annotations, sample_annotation_data, data_path, radar_files)
+
     return annotations
+
+
+def _set_point_counts(annotations, sample_annotation_data, data_path, radar_files):
+    """Sets num_lidar_pts and num_radar_pts of the annotations that didn't
+    specify them in the annotation file
+    """
+    counts = {
+        "num_lidar_pts": np.zeros(len(annotations), dtype=np.int64),
+        "num_radar_pts": np.zeros(len(annotations), dtype=np.int64),
+    }
+
+    if data_path.endswith(".pcd"):
+        modality = get_modality_from_name(Path(data_path).parent.name)
+        key = "num_radar_pts" if modality == "radar" else "num_lidar_pts"
+        counts[key] = count_annotation_points(annotations, data_path)
+
+    for radar_path, transform in radar_files:
+        counts["num_radar_pts"] = counts["num_radar_pts"] + count_annotation_points(
+            annotations, radar_path, transform
+        )
+
+    for i, (annotation, ann) in enumerate(zip(annotations, sample_annotation_data)):
+        for key, key_counts in counts.items():
+            if key not in ann:
+                annotation[key] = int(key_counts[i])
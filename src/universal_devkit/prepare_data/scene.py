@@ -1,18 +1,89 @@
 import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
 
-from ego_pose import get_ego_pose_data
-from instance import get_instance_data
-from sample import get_file_data, get_sample_json
-from sample_annotation import get_sample_annotation
-from sensor import get_sensor_calibration, get_sensor_json
-from utils import (
+import numpy as np
+
+from universal_devkit.prepare_data.ego_pose import (
+    EgoPoseTable,
+    get_ego_pose_data,
+    get_ego_pose_data_from_table,
+)
+from universal_devkit.prepare_data.instance import get_instance_data_columnar
+from universal_devkit.prepare_data.manifest import MANIFEST_FILE_NAME, Manifest
+from universal_devkit.prepare_data.sample import get_file_data, get_sample_json
+from universal_devkit.prepare_data.sample_annotation import (
+    ANNOTATION_DIR_NAME,
+    get_annotation_path,
+    get_sample_annotation,
+)
+from universal_devkit.prepare_data.sensor import (
+    get_sensor_calibration,
+    get_sensor_json,
+)
+from universal_devkit.prepare_data.tracking import (
+    DEFAULT_MAX_COSTS,
+    MATCHING_METHODS,
+    track_instances,
+)
+from universal_devkit.prepare_data.transform_tree import TransformTree
+from universal_devkit.utils.profiling import Profiler
+from universal_devkit.utils.utils import (
+    TokenGenerator,
+    associate_timestamps,
     create_token,
     get_all_non_hidden_files,
-    get_closest_match,
     get_file_stem_name,
+    write_json_table,
 )
 
+# The keys of a sample_data record that don't come from get_file_data
+SAMPLE_DATA_KEYS = {
+    "token",
+    "sample_token",
+    "ego_pose_token",
+    "calibrated_sensor_token",
+    "timestamp",
+    "is_key_frame",
+    "filename",
+    "prev",
+    "next",
+}
+
+# The name of the cached ego pose table saved next to the manifest
+EGO_POSE_CACHE_NAME = "ego_pose_table"
+
+# How many items each worker process receives at a time. Larger chunks
+# reduce the inter-process overhead for the many small per-file tasks.
+WORKER_CHUNK_SIZE = 64
+
+
+def get_sensor_files(sensor_dir):
+    """Gets the data files for a single sensor sorted by timestamp
+
+    Args:
+        sensor_dir (str): path to the sensor directory
+
+    Returns:
+        tuple(list, np.ndarray): a list of file paths,
+            an int64 array with the timestamp of each file
+    """
+    if not os.path.isdir(sensor_dir):
+        return [], np.array([], dtype=np.int64)
+
+    files = get_all_non_hidden_files(
+        sensor_dir, exclude=["calibrated_sensor.json", ANNOTATION_DIR_NAME]
+    )
+
+    timestamps = np.array(
+        [int(get_file_stem_name(file)) for file in files], dtype=np.int64
+    )
+    order = np.argsort(timestamps, kind="stable")
+
+    return [str(files[i]) for i in order], timestamps[order]
+
 
 class Scene:
     def __init__(
@@ -21,6 +92,12 @@ class Scene:
         scene_token=None,
         sensor_json_path=None,
         primary_sensor="LIDAR_TOP",
+        workers=1,
+        manifest_path=None,
+        token_generator=None,
+        profiler=None,
+        tracking_cost="distance",
+        tracking_method="hungarian",
     ):
         """Generates data for a single scene
 
@@ -72,11 +149,53 @@ class Scene:
 
         Args:
             input_directory (str): input directory path
+            scene_token (str, optional): the token to use for the scene.
+                Defaults to a new token.
+            sensor_json_path (str, optional): path to an existing sensor.json
+                to re-use sensor tokens from. Defaults to None.
+            primary_sensor (str, optional): the sensor to use to decide
+                timestamps. Defaults to "LIDAR_TOP".
+            workers (int, optional): the number of processes to use to read
+                the sensor directories, data files and annotation files.
+                Defaults to 1 (no worker processes).
+            manifest_path (str, optional): path to a manifest from a previous
+                build of this scene. Only the inputs that changed since that
+                build are reprocessed and the tokens of unchanged records are
+                kept. The manifest is updated after the build.
+                Defaults to None (build everything from scratch).
+            token_generator (TokenGenerator, optional): the generator to
+                create new tokens with. Use a deterministic generator to get
+                the same tokens every time the scene is built.
+                Defaults to None (random UUIDs).
+            profiler (Profiler, optional): records the time and memory used
+                by each stage of the build. Defaults to a profiler configured
+                by the UNIVERSAL_DEVKIT_PROFILE environment variable, which
+                reports when the build finishes.
+            tracking_cost (str, optional): how the annotations of
+                consecutive frames are matched to track objects. "distance"
+                or "iou". Defaults to "distance".
+            tracking_method (str, optional): "hungarian" or "greedy"
+                matching. Defaults to "hungarian".
         """
         self.SWEEP_DIR_PATH = os.path.join(input_directory, "sweeps")
         self.SAMPLE_DIR_PATH = os.path.join(input_directory, "samples")
-        self.SCENE_TOKEN = scene_token if scene_token else create_token()
         self.primary_sensor = primary_sensor
+        self.token_generator = token_generator
+        self.tracking_cost = tracking_cost
+        self.tracking_method = tracking_method
+
+        report = profiler is None
+        self.profiler = Profiler.from_environment() if report else profiler
+
+        self.manifest = None
+        if manifest_path:
+            self.manifest = Manifest(manifest_path, input_directory)
+
+        self.SCENE_TOKEN = (
+            scene_token
+            or self._get_tokens("scene").get("token")
+            or create_token(token_generator, ("scene",))
+        )
 
         assert os.path.exists(self.SWEEP_DIR_PATH), "Unable to locate sweeps directory"
         assert os.path.exists(self.SAMPLE_DIR_PATH), "Unable to locate sample directory"
@@ -88,9 +207,23 @@ class Scene:
         #   "channel": "CAM_FRONT_RIGHT",
         #   "modality": "camera"
         # }
-        self.SENSOR_JSON_DICT = get_sensor_json(
-            self.SAMPLE_DIR_PATH, sensor_json_path=sensor_json_path
-        )
+        with self.profiler.stage("get_sensor_json") as stage:
+            self.SENSOR_JSON_DICT = get_sensor_json(
+                self.SAMPLE_DIR_PATH,
+                sensor_json_path=sensor_json_path,
+                existing_tokens=self._get_tokens("sensor"),
+                token_generator=token_generator,
+            )
+            stage.set_count(len(self.SENSOR_JSON_DICT))
+
+        # Only calibrations that didn't change keep their token
+        calibration_tokens = {}
+        for sensor in self.SENSOR_JSON_DICT:
+            unchanged, data = self._check_manifest(
+                os.path.join(self.SAMPLE_DIR_PATH, sensor, "calibrated_sensor.json")
+            )
+            if unchanged:
+                calibration_tokens[sensor] = data["token"]
 
         # The calibration tokens for a sensor can change for different scenes
         # Dictionary mapping sensor channel -> calibration data
@@ -103,15 +236,45 @@ class Scene:
         #     "rotation": [...],
         #     "camera_intrinsic": [...] // optional
         # },
-        self.SENSOR_CALIBRATION_DICT = get_sensor_calibration(
-            self.SAMPLE_DIR_PATH, self.SENSOR_JSON_DICT
-        )
+        with self.profiler.stage("get_sensor_calibration") as stage:
+            self.SENSOR_CALIBRATION_DICT = get_sensor_calibration(
+                self.SAMPLE_DIR_PATH,
+                self.SENSOR_JSON_DICT,
+                existing_tokens=calibration_tokens,
+                token_generator=token_generator,
+            )
+            stage.set_count(len(self.SENSOR_CALIBRATION_DICT))
 
         # Get ego pose data
         # self.EGO_POSE_DICT maps timestamps -> ego pose dicts
         ego_pose_path = os.path.join(input_directory, "ego_pose.json")
         assert os.path.exists(ego_pose_path), "Unable to locate ego_pose.json"
-        self.EGO_POSE_DICT, self.EGO_POSE_TIMESTAMPS = get_ego_pose_data(ego_pose_path)
+        ego_pose_unchanged, _ = self._check_manifest(ego_pose_path)
+        ego_pose_cache_path = None
+        if manifest_path:
+            ego_pose_cache_path = os.path.join(
+                os.path.dirname(manifest_path), EGO_POSE_CACHE_NAME
+            )
+
+        with self.profiler.stage("get_ego_pose_data") as stage:
+            if ego_pose_unchanged and os.path.isdir(ego_pose_cache_path):
+                # Load the cached arrays instead of parsing the JSON again
+                self.EGO_POSE_TABLE = EgoPoseTable.load(ego_pose_cache_path)
+                (
+                    self.EGO_POSE_DICT,
+                    self.EGO_POSE_TIMESTAMPS,
+                ) = get_ego_pose_data_from_table(self.EGO_POSE_TABLE)
+            else:
+                self.EGO_POSE_DICT, self.EGO_POSE_TIMESTAMPS = get_ego_pose_data(
+                    ego_pose_path,
+                    existing_tokens=self._get_tokens("ego_pose"),
+                    validate=not ego_pose_unchanged,
+                    token_generator=token_generator,
+                )
+                self.EGO_POSE_TABLE = EgoPoseTable.from_list(
+                    [self.EGO_POSE_DICT[t] for t in self.EGO_POSE_TIMESTAMPS]
+                )
+            stage.set_count(len(self.EGO_POSE_TIMESTAMPS))
 
         # Get the sample data mapping timestamps -> sample data
         # 1532402927647951 -> {
@@ -121,31 +284,143 @@ class Scene:
         #   "next": "39586f9d59004284a7114a68825e8eec",
         #   "scene_token": "cc8c0bf57f984915a77078b10eb33198"
         # },
-        self.SAMPLE_DICT, self.SAMPLE_TIMESTAMPS = get_sample_json(
-            self.SAMPLE_DIR_PATH, self.SCENE_TOKEN, primary_sensor=primary_sensor
-        )
+        with self.profiler.stage("get_sample_json") as stage:
+            self.SAMPLE_DICT, self.SAMPLE_TIMESTAMPS = get_sample_json(
+                self.SAMPLE_DIR_PATH,
+                self.SCENE_TOKEN,
+                primary_sensor=primary_sensor,
+                existing_tokens=self._get_tokens("sample"),
+                token_generator=token_generator,
+            )
+            stage.set_count(len(self.SAMPLE_TIMESTAMPS))
 
-        # These dictionaries map sample_data_token -> dictionary on that sample file
-        sample_data_keyframes_dict = self.get_sample_data(self.SAMPLE_DIR_PATH, True)
-        sample_data_sweeps_dict = self.get_sample_data(self.SWEEP_DIR_PATH, False)
-        self.SAMPLE_DATA_DICT = {
-            **sample_data_keyframes_dict,
-            **sample_data_sweeps_dict,
-        }
+        self._executor = ProcessPoolExecutor(workers) if workers > 1 else None
 
-        # Get the sample annotations (a list of dictionaries with all the annotations)
-        # for each annotation file in self.SAMPLE_DATA_DICT
-        self.SAMPLE_ANNOTATIONS = []
-        for sample_data_token in self.SAMPLE_DATA_DICT:
-            sample_annotations = get_sample_annotation(
-                input_directory,
-                self.SAMPLE_DATA_DICT[sample_data_token],
-            )
-            self.SAMPLE_ANNOTATIONS.append(sample_annotations)
+        try:
+            # These dictionaries map sample_data_token -> dictionary on that
+            # sample file
+            with self.profiler.stage("get_sample_data (samples)") as stage:
+                sample_data_keyframes_dict = self.get_sample_data(
+                    self.SAMPLE_DIR_PATH, True
+                )
+                stage.set_count(len(sample_data_keyframes_dict))
+
+            with self.profiler.stage("get_sample_data (sweeps)") as stage:
+                sample_data_sweeps_dict = self.get_sample_data(
+                    self.SWEEP_DIR_PATH, False
+                )
+                stage.set_count(len(sample_data_sweeps_dict))
+
+            self.SAMPLE_DATA_DICT = {
+                **sample_data_keyframes_dict,
+                **sample_data_sweeps_dict,
+            }
+
+            # Get the sample annotations (a list of dictionaries with all the
+            # annotations) for each annotation file in self.SAMPLE_DATA_DICT
+            with self.profiler.stage("get_sample_annotations") as stage:
+                self.SAMPLE_ANNOTATIONS = self.get_sample_annotations(input_directory)
+                stage.set_count(len(self.SAMPLE_ANNOTATIONS))
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
 
         # Get the instance data (a list of dictionaries with each instance of an object)
         # This should be <= the size of self.SAMPLE_ANNOTATIONS
-        self.INSTANCE_DATA_DICT = get_instance_data(self.SAMPLE_ANNOTATIONS)
+        with self.profiler.stage("get_instance_data") as stage:
+            self.INSTANCE_DATA_DICT = get_instance_data_columnar(
+                self.SAMPLE_ANNOTATIONS
+            )
+            stage.set_count(len(self.INSTANCE_DATA_DICT))
+
+        if self.manifest is not None:
+            self.manifest.set_tokens("scene", {"token": self.SCENE_TOKEN})
+            self.manifest.set_tokens(
+                "sensor", {k: v["token"] for k, v in self.SENSOR_JSON_DICT.items()}
+            )
+            self.manifest.set_tokens(
+                "ego_pose", {k: v["token"] for k, v in self.EGO_POSE_DICT.items()}
+            )
+            self.manifest.set_tokens(
+                "sample", {k: v["token"] for k, v in self.SAMPLE_DICT.items()}
+            )
+            for sensor, calibration in self.SENSOR_CALIBRATION_DICT.items():
+                self.manifest.set_data(
+                    os.path.join(
+                        self.SAMPLE_DIR_PATH, sensor, "calibrated_sensor.json"
+                    ),
+                    {"token": calibration["token"]},
+                )
+            self.manifest.set_data(ego_pose_path, {})
+            self.EGO_POSE_TABLE.save(ego_pose_cache_path)
+            self.manifest.save()
+
+        if report:
+            self.profiler.report()
+
+    def write_tables(self, output_directory, json_lines=False):
+        """Writes the scene's tables to a directory. Each table is streamed
+        to disk one record at a time.
+
+        Args:
+            output_directory (str): the directory to write the tables to
+            json_lines (bool, optional): whether to write JSON Lines (.jsonl)
+                instead of JSON arrays (.json). Defaults to False.
+
+        Returns:
+            dict: a dictionary mapping table name -> number of records written
+        """
+        Path(output_directory).mkdir(parents=True, exist_ok=True)
+        extension = ".jsonl" if json_lines else ".json"
+
+        tables = {
+            "sensor": self.SENSOR_JSON_DICT.values(),
+            "calibrated_sensor": self.SENSOR_CALIBRATION_DICT.values(),
+            "ego_pose": self.EGO_POSE_DICT.values(),
+            "sample": self.SAMPLE_DICT.values(),
+            "sample_data": self.SAMPLE_DATA_DICT.values(),
+            "sample_annotation": self.SAMPLE_ANNOTATIONS,
+            "instance": self.INSTANCE_DATA_DICT.values(),
+        }
+
+        counts = {}
+        for table_name, records in tables.items():
+            counts[table_name] = write_json_table(
+                records,
+                os.path.join(output_directory, table_name + extension),
+                json_lines=json_lines,
+            )
+
+        return counts
+
+    def _get_tokens(self, namespace):
+        """Gets the tokens from the last build of the scene"""
+        if self.manifest is None:
+            return {}
+
+        return self.manifest.get_tokens(namespace)
+
+    def _check_manifest(self, file_path):
+        """Checks whether an input changed since the last build of the scene
+
+        Returns:
+            tuple(bool, dict): whether the file is unchanged, the data stored
+                for the file by the last build (None if there was none)
+        """
+        if self.manifest is None:
+            return False, None
+
+        return self.manifest.check(file_path)
+
+    def _map(self, func, *iterables):
+        """Applies a function to every item, spreading the work over the
+        worker processes if there are any. Results are returned in order.
+        """
+        if self._executor is None:
+            return list(map(func, *iterables))
+
+        return list(self._executor.map(func, *iterables, chunksize=WORKER_CHUNK_SIZE))
 
     def get_sample_data(self, directory_path: str, is_key_frame: bool):
         """Gets a dictionary with information on each of the samples
@@ -155,80 +430,343 @@ class Scene:
             is_key_frame (bool): whether the frame is a keyframe
 
         Returns:
-            tuple(dict, list): a dictionary of timestamps -> sample dicts,
-                a list of sorted timestamps
+            dict: a dictionary of sample_data_token -> sample data dicts
         """
 
         # Dictionary of annotation_token -> annotation dict
         annotations = {}
 
-        for sensor in self.SENSOR_CALIBRATION_DICT:
-            sensor_dir = os.path.join(directory_path, sensor)
-            calibrated_sensor_token = self.SENSOR_CALIBRATION_DICT[sensor]["token"]
-
-            # Store a dict with per sensor annotations to use for specifying
-            # the prev and next tokens
-            # timestamp -> annotation token
-            sensor_annotations = {}
+        # Convert the lookup timestamps once instead of once per sensor
+        sample_timestamps = np.asarray(self.SAMPLE_TIMESTAMPS, dtype=np.int64)
+        ego_pose_timestamps = self.EGO_POSE_TABLE.timestamps
 
-            timestamps = list(sensor_annotations.keys())
-            timestamps.sort()
+        # Scan all the sensor directories
+        sensors = sorted(self.SENSOR_CALIBRATION_DICT)
+        sensor_files = self._map(
+            get_sensor_files,
+            [os.path.join(directory_path, sensor) for sensor in sensors],
+        )
 
-            files = get_all_non_hidden_files(
-                sensor_dir, exclude=["calibrated_sensor.json"]
+        # Skip the sensors without enough data
+        sensor_files = dict(zip(sensors, sensor_files))
+        for sensor in sensors:
+            if len(sensor_files[sensor][0]) < 2:
+                # Require at least 2 timestamps
+                print("Not enough data for sensor: {}. Skipping".format(sensor))
+                del sensor_files[sensor]
+
+        # Read the metadata of every file for all the sensors in one batch
+        # so the work can be split evenly between the workers
+        all_files = []
+        all_modalities = []
+        for sensor, (files, _) in sensor_files.items():
+            all_files.extend(files)
+            all_modalities.extend(
+                [self.SENSOR_JSON_DICT[sensor]["modality"]] * len(files)
             )
 
-            if len(files) < 2:
-                # Require at least 2 timestamps
-                print(
-                    "Not enough data for sensor: {}. Skipping".format(
-                        self.primary_sensor
-                    )
-                )
-                return sensor_annotations, timestamps
+        # Re-use the metadata and tokens of the files that haven't changed
+        all_file_data = [None] * len(all_files)
+        all_tokens = [None] * len(all_files)
+        for i, file in enumerate(all_files):
+            unchanged, data = self._check_manifest(file)
+            if data is not None:
+                all_tokens[i] = data["token"]
+            if unchanged:
+                all_file_data[i] = data["file_data"]
+
+        changed = [i for i, file_data in enumerate(all_file_data) if file_data is None]
+        for i, file_data in zip(
+            changed,
+            self._map(
+                get_file_data,
+                [all_files[i] for i in changed],
+                [all_modalities[i] for i in changed],
+            ),
+        ):
+            all_file_data[i] = file_data
+
+        all_file_data = iter(all_file_data)
+        all_tokens = iter(all_tokens)
+
+        for sensor, (files, timestamps) in sensor_files.items():
+            calibrated_sensor_token = self.SENSOR_CALIBRATION_DICT[sensor]["token"]
+
+            # Match every file for this sensor in a single vectorized pass
+            closest_samples, closest_ego_poses = associate_timestamps(
+                timestamps, sample_timestamps, ego_pose_timestamps
+            )
 
-            for file in files:
-                file_stem = get_file_stem_name(file)
-                timestamp = int(file_stem)
+            # The annotation tokens for this sensor in timestamp order
+            sensor_tokens = []
 
+            for file, timestamp, sample_timestamp, ego_timestamp in zip(
+                files,
+                timestamps.tolist(),
+                closest_samples.tolist(),
+                closest_ego_poses.tolist(),
+            ):
                 # @TODO: this should be the full file path being passed
                 # not the file name
                 annotation = self.get_sample_data_for_file(
-                    file, timestamp, calibrated_sensor_token, is_key_frame
+                    file,
+                    timestamp,
+                    calibrated_sensor_token,
+                    is_key_frame,
+                    next(all_file_data),
+                    sample_timestamp,
+                    ego_timestamp,
+                    token=next(all_tokens),
                 )
                 annotations[annotation["token"]] = annotation
-                sensor_annotations[timestamp] = annotation["token"]
+                sensor_tokens.append(annotation["token"])
 
             # Add prev and next
+            for prev_token, next_token in zip(sensor_tokens, sensor_tokens[1:]):
+                annotations[next_token]["prev"] = prev_token
+                annotations[prev_token]["next"] = next_token
+
+        if self.manifest is not None:
+            for annotation in annotations.values():
+                self.manifest.set_data(
+                    annotation["filename"],
+                    {
+                        "token": annotation["token"],
+                        "file_data": {
+                            key: annotation[key]
+                            for key in annotation
+                            if key not in SAMPLE_DATA_KEYS
+                        },
+                    },
+                )
 
-            for i in range(1, len(timestamps) - 1):
-                timestamp = timestamps[i]
-                ann_token = sensor_annotations[timestamp]
-                annotations[ann_token]["prev"] = sensor_annotations[timestamps[i - 1]]
-                annotations[ann_token]["next"] = sensor_annotations[timestamps[i + 1]]
+        return annotations
 
-            # Handle the first and last
-            first_ann_token = sensor_annotations[timestamps[0]]
-            annotations[first_ann_token]["next"] = sensor_annotations[timestamps[1]]
+    def get_sample_annotations(self, input_directory):
+        """Gets the annotations for every file in self.SAMPLE_DATA_DICT. The
+        objects are tracked across the annotated files of each sensor to
+        assign the instance tokens and link prev and next.
 
-            last_ann_token = sensor_annotations[timestamps[-1]]
-            annotations[last_ann_token]["prev"] = sensor_annotations[timestamps[-2]]
+        Args:
+            input_directory (str): input directory path
 
-        return annotations
+        Returns:
+            list: a list of dictionaries with each annotation
+        """
+        sample_data_list = list(self.SAMPLE_DATA_DICT.values())
+        sample_radar_files = self._get_sample_radar_files(sample_data_list)
+
+        # The inputs of the point counts of each file's annotations
+        count_inputs = [None] * len(sample_data_list)
+
+        # Re-use the annotations of the files that haven't changed
+        annotation_lists = [None] * len(sample_data_list)
+        previous_lists = [None] * len(sample_data_list)
+        for i, sample_data in enumerate(sample_data_list):
+            unchanged, data = self._check_manifest(
+                get_annotation_path(sample_data["filename"])
+            )
+            if data is None:
+                continue
+
+            previous_lists[i] = data["annotations"]
+            count_inputs[i] = self._get_point_count_inputs(
+                sample_data, sample_radar_files
+            )
+            # The point counts are stale if a point cloud or calibration
+            # changed, even if the annotation file didn't
+            if unchanged and data.get("point_count_inputs") == count_inputs[i]:
+                # The matching sample could have changed
+                annotation_lists[i] = [
+                    {
+                        **annotation,
+                        "sample_token": sample_data["sample_token"],
+                        "timestamp": sample_data["timestamp"],
+                    }
+                    for annotation in data["annotations"]
+                ]
+
+        changed = [i for i, anns in enumerate(annotation_lists) if anns is None]
+        changed_sample_data = [sample_data_list[i] for i in changed]
+        for i, sample_annotations in zip(
+            changed,
+            self._map(
+                get_sample_annotation,
+                repeat(input_directory),
+                changed_sample_data,
+                repeat(self.token_generator),
+                self.get_radar_files(sample_radar_files, changed_sample_data),
+            ),
+        ):
+            # Keep the tokens of the annotations from the last build
+            for annotation, previous in zip(
+                sample_annotations, previous_lists[i] or []
+            ):
+                annotation["token"] = previous["token"]
+            annotation_lists[i] = sample_annotations
+
+        sample_annotations = []
+        for i, (sample_data, annotation_list) in enumerate(
+            zip(sample_data_list, annotation_lists)
+        ):
+            annotation_path = get_annotation_path(sample_data["filename"])
+            if (
+                self.manifest is not None
+                and self.manifest.get_hash(annotation_path) is not None
+            ):
+                # Save the annotations before tracking so unchanged files
+                # are tracked again with the rest of the scene
+                self.manifest.set_data(
+                    annotation_path,
+                    {
+                        "annotations": [dict(ann) for ann in annotation_list],
+                        "point_count_inputs": count_inputs[i]
+                        or self._get_point_count_inputs(
+                            sample_data, sample_radar_files
+                        ),
+                    },
+                )
+            sample_annotations.extend(annotation_list)
+
+        # The annotated frames of each sensor in timestamp order
+        sensor_frames = {}
+        for i in sorted(
+            range(len(sample_data_list)),
+            key=lambda i: sample_data_list[i]["timestamp"],
+        ):
+            if annotation_lists[i]:
+                sensor_frames.setdefault(
+                    sample_data_list[i]["calibrated_sensor_token"], []
+                ).append(annotation_lists[i])
+
+        for frames in sensor_frames.values():
+            track_instances(
+                frames,
+                cost=self.tracking_cost,
+                method=self.tracking_method,
+                token_generator=self.token_generator,
+            )
+
+        return sample_annotations
+
+    def _get_sample_radar_files(self, sample_data_list):
+        """Gets the radar .pcd keyframes of each sample
+
+        Args:
+            sample_data_list (list(dict)): every sample data record
+
+        Returns:
+            dict: a dictionary mapping sample token -> the (radar channel,
+                file path) of the sample's radar keyframes
+        """
+        sensors = {
+            calibration["token"]: sensor
+            for sensor, calibration in self.SENSOR_CALIBRATION_DICT.items()
+        }
+
+        sample_radar_files = {}
+        for sample_data in sample_data_list:
+            sensor = sensors[sample_data["calibrated_sensor_token"]]
+            calibration = self.SENSOR_CALIBRATION_DICT[sensor]
+            if (
+                sample_data["is_key_frame"]
+                and self.SENSOR_JSON_DICT[sensor]["modality"] == "radar"
+                and sample_data["filename"].endswith(".pcd")
+                and "translation" in calibration
+                and "rotation" in calibration
+            ):
+                sample_radar_files.setdefault(sample_data["sample_token"], []).append(
+                    (sensor, sample_data["filename"])
+                )
+
+        return sample_radar_files
+
+    def _get_point_count_inputs(self, sample_data, sample_radar_files):
+        """Gets the hashes and calibration tokens of the point clouds that
+        the point counts of a file's annotations come from
+        """
+        files = [(sample_data["calibrated_sensor_token"], sample_data["filename"])]
+        for radar, file_path in sample_radar_files.get(sample_data["sample_token"], []):
+            if file_path != sample_data["filename"]:
+                files.append((self.SENSOR_CALIBRATION_DICT[radar]["token"], file_path))
+
+        return [
+            [calibration_token, self.manifest.get_hash(file_path)]
+            for calibration_token, file_path in files
+        ]
+
+    def get_radar_files(self, sample_radar_files, annotated_list):
+        """Gets the radar point clouds to count in each file's annotations
+
+        Args:
+            sample_radar_files (dict): a dictionary mapping sample token ->
+                the (radar channel, file path) of the sample's radar keyframes
+            annotated_list (list(dict)): the sample data records to get the
+                radar point clouds for
+
+        Returns:
+            list(list(tuple)): the (path, transform) of the radar .pcd
+                keyframes in the same sample as each annotated record
+                (except the record itself). transform is the 4x4
+                transformation from the radar to the annotated sensor.
+        """
+        tree = TransformTree()
+        sensors = {}
+        for sensor, calibration in self.SENSOR_CALIBRATION_DICT.items():
+            sensors[calibration["token"]] = sensor
+            if "translation" in calibration and "rotation" in calibration:
+                tree.set_calibration(sensor, calibration)
+
+        radar_files = []
+        for sample_data in annotated_list:
+            sensor = sensors[sample_data["calibrated_sensor_token"]]
+            radar_files.append(
+                [
+                    (file_path, tree.get_transform(radar, sensor))
+                    for radar, file_path in sample_radar_files.get(
+                        sample_data["sample_token"], []
+                    )
+                    if file_path != sample_data["filename"] and sensor in tree.frames
+                ]
+            )
+
+        return radar_files
 
     def get_sample_data_for_file(
-        self, file_path, timestamp, calibrated_sensor_token, is_key_frame
+        self,
+        file_path,
+        timestamp,
+        calibrated_sensor_token,
+        is_key_frame,
+        file_data,
+        closest_sample_timestamp,
+        closest_ego_timestamp,
+        token=None,
     ):
-        # Get the sample token
-        closest_sample_timestamp = get_closest_match(self.SAMPLE_TIMESTAMPS, timestamp)
-        sample_token = self.SAMPLE_DICT[closest_sample_timestamp]["token"]
+        """Gets the sample data for a single file
+
+        Args:
+            file_path (str): path to the data file
+            timestamp (int): the timestamp of the file
+            calibrated_sensor_token (str): token of the sensor's calibration
+            is_key_frame (bool): whether the frame is a keyframe
+            file_data (dict): data on the file from get_file_data
+            closest_sample_timestamp (int): timestamp of the closest sample
+            closest_ego_timestamp (int): timestamp of the closest ego pose
+            token (str, optional): the token to use. Defaults to a new token.
 
-        # Get the ego token
-        closest_ego_timestamp = get_closest_match(self.EGO_POSE_TIMESTAMPS, timestamp)
+        Returns:
+            dict: the sample data for the file
+        """
+        sample_token = self.SAMPLE_DICT[closest_sample_timestamp]["token"]
         ego_token = self.EGO_POSE_DICT[closest_ego_timestamp]["token"]
 
         annotation = {
-            "token": create_token(),
+            "token": token
+            or create_token(
+                self.token_generator,
+                ("sample_data", calibrated_sensor_token, timestamp, is_key_frame),
+            ),
             "sample_token": sample_token,
             "ego_pose_token": ego_token,
             "calibrated_sensor_token": calibrated_sensor_token,
@@ -240,28 +778,129 @@ class Scene:
             "next": "",
         }
 
-        # @TODO: this should be the full file path being passed
-        # not the file name
-        annotation = {**annotation, **get_file_data(file_path)}
+        annotation = {**annotation, **file_data}
 
         return annotation
 
 
-def main(input_directory, output_directory):
-    _ = Scene(input_directory)
+def main(
+    input_directory,
+    output_directory,
+    workers=1,
+    namespace=None,
+    json_lines=False,
+    profile=False,
+    profile_report=None,
+    trace_memory=False,
+    tracking_cost="distance",
+    tracking_method="hungarian",
+):
+    if profile or profile_report or trace_memory:
+        profiler = Profiler(
+            enabled=True, trace_memory=trace_memory, report_path=profile_report
+        )
+    else:
+        profiler = Profiler.from_environment()
 
+    Path(output_directory).mkdir(parents=True, exist_ok=True)
+    manifest_path = os.path.join(output_directory, MANIFEST_FILE_NAME)
+    scene = Scene(
+        input_directory,
+        workers=workers,
+        manifest_path=manifest_path,
+        token_generator=TokenGenerator(namespace),
+        profiler=profiler,
+        tracking_cost=tracking_cost,
+        tracking_method=tracking_method,
+    )
 
-if __name__ == "__main__":
-    ap = argparse.ArgumentParser()
-    ap.add_argument(
+    with profiler.stage("write_tables") as stage:
+        counts = scene.write_tables(output_directory, json_lines=json_lines)
+        stage.set_count(sum(counts.values()))
+
+    profiler.report()
+
+
+def add_arguments(parser):
+    """Adds the command line arguments of :func:`main` to a parser
+
+    Args:
+        parser (argparse.ArgumentParser): the parser to add the arguments to
+    """
+    parser.add_argument(
         "-i", "--input", type=str, required=True, help="The path to the input directory"
     )
-    ap.add_argument(
+    parser.add_argument(
         "-o",
         "--output",
         type=str,
         required=True,
         help="The path to the output directory",
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of processes to use",
+    )
+    parser.add_argument(
+        "-n",
+        "--namespace",
+        type=str,
+        default=None,
+        help="Create deterministic tokens using this namespace",
+    )
+    parser.add_argument(
+        "--json_lines",
+        action="store_true",
+        help="Write the tables as JSON Lines instead of JSON arrays",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the time and memory used by each stage of the build",
+    )
+    parser.add_argument(
+        "--profile_report",
+        type=str,
+        default=None,
+        help="Write the time and memory used by each stage to a JSON file",
+    )
+    parser.add_argument(
+        "--trace_memory",
+        action="store_true",
+        help="Profile the peak memory of each stage with tracemalloc (slower)",
+    )
+    parser.add_argument(
+        "--tracking_cost",
+        type=str,
+        choices=list(DEFAULT_MAX_COSTS),
+        default="distance",
+        help="Track objects by the distance between boxes or their IoU",
+    )
+    parser.add_argument(
+        "--tracking_method",
+        type=str,
+        choices=MATCHING_METHODS,
+        default="hungarian",
+        help="How boxes in consecutive frames are matched",
+    )
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    add_arguments(ap)
     args = vars(ap.parse_args())
-    main(args["input"], args["output"])
+    main(
+        args["input"],
+        args["output"],
+        args["workers"],
+        args["namespace"],
+        args["json_lines"],
+        args["profile"],
+        args["profile_report"],
+        args["trace_memory"],
+        args["tracking_cost"],
+        args["tracking_method"],
+    )
@@ -1,3 +1,5 @@
+import hashlib
+import json
 import os
 from pathlib import Path
 
@@ -9,21 +11,38 @@ from universal_devkit.utils.utils import (
 )
 
 
-def get_sensor_json(sample_dir_path, sensor_json_path=None):
+def get_sensor_json(
+    sample_dir_path, sensor_json_path=None, existing_tokens={}, token_generator=None
+):
+    """Gets a dictionary with information on each sensor
+
+    Args:
+        sample_dir_path (str): sample directory
+        sensor_json_path (str, optional): path to an existing sensor.json
+            to re-use sensors from. Defaults to None.
+        existing_tokens (dict, optional): a dictionary mapping sensor
+            channel -> token to re-use for new sensors. Defaults to {}.
+        token_generator (TokenGenerator, optional): the generator to create
+            new tokens with. Defaults to None (random UUIDs).
+
+    Returns:
+        dict: a dictionary mapping sensor channel -> sensor info
+    """
     sensor_data = {}
 
     if sensor_json_path:
         sensor_list = read_json(sensor_json_path)
-        sensor_data = convert_list_to_dict(sensor_list)
+        sensor_data = convert_list_to_dict(sensor_list, using_key="channel")
 
     sensors = get_immediate_directories(sample_dir_path)
 
     # sensor_channel will be something like "LIDAR_TOP", "RADAR_FRONT_RIGHT", etc.
-    for sensor_channel in sensors:
+    for sensor_channel in sorted(sensor.name for sensor in sensors):
         if sensor_channel not in sensor_data:
             # If the sensor doesn't exist already, we will create it
             sensor_info = {
-                "token": create_token(),
+                "token": existing_tokens.get(sensor_channel)
+                or create_token(token_generator, ("sensor", sensor_channel)),
                 "channel": sensor_channel,
                 "modality": get_modality_from_name(sensor_channel),
             }
@@ -32,7 +51,22 @@ def get_sensor_json(sample_dir_path, sensor_json_path=None):
     return sensor_data
 
 
-def get_sensor_calibration(sample_dir_path, sensor_json_dict):
+def get_sensor_calibration(
+    sample_dir_path, sensor_json_dict, existing_tokens={}, token_generator=None
+):
+    """Gets the calibration data for each sensor
+
+    Args:
+        sample_dir_path (str): sample directory
+        sensor_json_dict (dict): a dictionary mapping sensor channel -> sensor info
+        existing_tokens (dict, optional): a dictionary mapping sensor
+            channel -> calibration token to re-use. Defaults to {}.
+        token_generator (TokenGenerator, optional): the generator to create
+            new tokens with. Defaults to None (random UUIDs).
+
+    Returns:
+        dict: a dictionary mapping sensor channel -> calibration data
+    """
     calibration_dict = {}
 
     # sensor_channel will be something like "LIDAR_TOP", "RADAR_FRONT_RIGHT", etc.
@@ -51,7 +85,12 @@ def get_sensor_calibration(sample_dir_path, sensor_json_dict):
 
         calib_data = read_json(calib_file)
         calibration_dict[sensor_channel] = calib_data
-        calibration_dict[sensor_channel]["token"] = create_token()
+        calibration_dict[sensor_channel]["token"] = existing_tokens.get(
+            sensor_channel
+        ) or create_token(
+            token_generator,
+            ("calibrated_sensor", sensor_channel, _hash_calibration(calib_data)),
+        )
         calibration_dict[sensor_channel]["sensor_token"] = sensor_json_dict[
             sensor_channel
         ]["token"]
@@ -59,6 +98,17 @@ def get_sensor_calibration(sample_dir_path, sensor_json_dict):
     return calibration_dict
 
 
+def _hash_calibration(calib_data):
+    # A changed calibration is a new calibrated_sensor record, so it needs a
+    # new deterministic token
+    content = {
+        key: calib_data.get(key)
+        for key in ["translation", "rotation", "camera_intrinsic"]
+    }
+    text = json.dumps(content, sort_keys=True)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
 def get_modality_from_name(sensor_path: Path):
     """Gets the modality of a sensor from its name.
 
@@ -0,0 +1,398 @@
+"""Tracks annotated objects across the frames of a sensor.
+
+Frames are processed in timestamp order. The boxes of each frame are only
+matched against the boxes of the frame before it using a cost matrix (the
+distance between their centers or 1 - their IoU), so the work grows
+linearly with the number of frames. Matched boxes share an instance token
+and the annotations of an instance are linked through prev and next.
+"""
+
+import functools
+
+import numpy as np
+
+from universal_devkit.prepare_data.points_in_boxes import get_box_rotation_matrices
+from universal_devkit.utils.utils import TokenGenerator
+
+# The keys an annotation needs to be tracked
+BOX_KEYS = ["translation", "size", "rotation"]
+
+# The supported costs mapped to the default largest cost of a match. Boxes
+# match if their centers are within 2m or their IoU is at least 0.1
+DEFAULT_MAX_COSTS = {"distance": 2.0, "iou": 0.9}
+
+# The supported ways to match boxes
+MATCHING_METHODS = ["hungarian", "greedy"]
+
+# Creates the instance tokens when the tokens are random. New instance
+# tokens are a hash of the instance's first annotation token, so they stay
+# the same between builds that keep the annotation tokens
+INSTANCE_TOKEN_GENERATOR = TokenGenerator("instance")
+
+
+def get_boxes(annotations, extents=True):
+    """Gets the axis-aligned bounds of annotation boxes
+
+    Args:
+        annotations (list(dict)): annotations with a "translation", "size"
+            and "rotation"
+        extents (bool, optional): whether to get the extents. Only the
+            centers are returned if False. Defaults to True.
+
+    Returns:
+        tuple(np.array): (M, 3) arrays of the box centers and the half
+            extents of their axis-aligned bounds
+    """
+    translations = np.array(
+        [ann["translation"] for ann in annotations], dtype=np.float64
+    ).reshape(-1, 3)
+    if not extents:
+        return (translations,)
+
+    half_sizes = np.array([ann["size"] for ann in annotations], dtype=np.float64)
+    half_sizes = half_sizes.reshape(-1, 3) / 2
+
+    if not annotations:
+        return translations, half_sizes
+
+    rotations = get_box_rotation_matrices([ann["rotation"] for ann in annotations])
+    half_extents = (np.abs(rotations) @ half_sizes[:, :, None])[:, :, 0]
+    return translations, half_extents
+
+
+def get_distance_costs(previous_boxes, boxes):
+    """Gets the distance between the centers of every pair of boxes
+
+    Args:
+        previous_boxes (tuple(np.array, np.array)): boxes from get_boxes
+        boxes (tuple(np.array, np.array)): boxes from get_boxes
+
+    Returns:
+        np.array: an (M_previous, M) array of distances
+    """
+    offsets = previous_boxes[0][:, None, :] - boxes[0][None, :, :]
+    return np.sqrt((offsets**2).sum(axis=2))
+
+
+def get_iou_costs(previous_boxes, boxes):
+    """Gets 1 - the IoU of the axis-aligned bounds of every pair of boxes
+
+    Args:
+        previous_boxes (tuple(np.array, np.array)): boxes from get_boxes
+        boxes (tuple(np.array, np.array)): boxes from get_boxes
+
+    Returns:
+        np.array: an (M_previous, M) array of costs between 0 and 1
+    """
+    (previous_centers, previous_half), (centers, half) = previous_boxes, boxes
+
+    lower = np.maximum(
+        (previous_centers - previous_half)[:, None, :], (centers - half)[None, :, :]
+    )
+    upper = np.minimum(
+        (previous_centers + previous_half)[:, None, :], (centers + half)[None, :, :]
+    )
+    intersection = np.clip(upper - lower, 0, None).prod(axis=2)
+
+    volumes = (2 * half).prod(axis=1)
+    previous_volumes = (2 * previous_half).prod(axis=1)
+    union = previous_volumes[:, None] + volumes[None, :] - intersection
+
+    iou = intersection / np.where(union > 0, union, 1)
+    return 1 - iou
+
+
+COST_FUNCTIONS = {"distance": get_distance_costs, "iou": get_iou_costs}
+
+
+def match_greedy(costs, max_cost):
+    """Matches rows to columns by repeatedly taking the cheapest pair whose
+    row and column are both unmatched
+
+    Args:
+        costs (np.array): an (N, M) cost matrix
+        max_cost (float): the largest cost of a match
+
+    Returns:
+        tuple(np.array, np.array): the row and column of each match
+    """
+    rows, columns = np.nonzero(costs <= max_cost)
+    order = np.argsort(costs[rows, columns], kind="stable")
+
+    used_rows = set()
+    used_columns = set()
+    matches = []
+    for row, column in zip(rows[order].tolist(), columns[order].tolist()):
+        if row not in used_rows and column not in used_columns:
+            used_rows.add(row)
+            used_columns.add(column)
+            matches.append((row, column))
+
+    matches = np.array(matches, dtype=np.int64).reshape(-1, 2)
+    return matches[:, 0], matches[:, 1]
+
+
+def match_hungarian(costs, max_cost):
+    """Matches rows to columns with the assignment that makes the most
+    matches with the lowest total cost
+
+    Rows and columns that can only match each other are matched directly.
+    The rest are solved with scipy.optimize.linear_sum_assignment if SciPy
+    is installed and linear_sum_assignment otherwise.
+
+    Args:
+        costs (np.array): an (N, M) cost matrix
+        max_cost (float): the largest cost of a match
+
+    Returns:
+        tuple(np.array, np.array): the row and column of each match
+    """
+    valid = costs <= max_cost
+    row_counts = valid.sum(axis=1)
+    column_counts = valid.sum(axis=0)
+
+    # Well separated objects only have a single valid pair
+    rows, columns = np.nonzero(valid)
+    unique = (row_counts[rows] == 1) & (column_counts[columns] == 1)
+    matched_rows = rows[unique]
+    matched_columns = columns[unique]
+
+    row_counts[matched_rows] = 0
+    column_counts[matched_columns] = 0
+    remaining_rows = np.flatnonzero(row_counts)
+    remaining_columns = np.flatnonzero(column_counts)
+
+    if len(remaining_rows) and len(remaining_columns):
+        remaining_valid = valid[np.ix_(remaining_rows, remaining_columns)]
+
+        # Any assignment with an invalid pair costs more than every
+        # assignment without one
+        invalid_cost = max(max_cost, 0) * min(remaining_valid.shape) + 1.0
+        rows, columns = _get_solver()(
+            np.where(
+                remaining_valid,
+                costs[np.ix_(remaining_rows, remaining_columns)],
+                invalid_cost,
+            )
+        )
+
+        keep = remaining_valid[rows, columns]
+        matched_rows = np.concatenate([matched_rows, remaining_rows[rows[keep]]])
+        matched_columns = np.concatenate(
+            [matched_columns, remaining_columns[columns[keep]]]
+        )
+
+    order = np.argsort(matched_rows)
+    return matched_rows[order], matched_columns[order]
+
+
+@functools.lru_cache(maxsize=None)
+def _get_solver():
+    """Gets SciPy's linear_sum_assignment if it is installed. The result is
+    cached so a missing SciPy is only looked for once.
+    """
+    try:
+        from scipy.optimize import linear_sum_assignment as solve
+    except ImportError:
+        solve = linear_sum_assignment
+
+    return solve
+
+
+def linear_sum_assignment(costs):
+    """Solves the rectangular assignment problem with the Hungarian
+    algorithm in O(N^2 M) for N <= M
+
+    Args:
+        costs (np.array): an (N, M) cost matrix
+
+    Returns:
+        tuple(np.array, np.array): the row and column of each assigned pair
+            sorted by row. min(N, M) pairs are assigned.
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    transposed = costs.shape[0] > costs.shape[1]
+    if transposed:
+        costs = costs.T
+    num_rows, num_columns = costs.shape
+
+    # Potentials of the rows and columns. Column 0 is a dummy column used
+    # to start the augmenting paths. assigned[j] is the 1-based row assigned
+    # to column j
+    row_potentials = np.zeros(num_rows + 1)
+    column_potentials = np.zeros(num_columns + 1)
+    assigned = np.zeros(num_columns + 1, dtype=np.int64)
+    way = np.zeros(num_columns + 1, dtype=np.int64)
+
+    for row in range(1, num_rows + 1):
+        assigned[0] = row
+        column = 0
+        min_slack = np.full(num_columns + 1, np.inf)
+        used = np.zeros(num_columns + 1, dtype=bool)
+
+        # Grow a tree of alternating paths until it reaches a free column
+        while True:
+            used[column] = True
+            current_row = assigned[column]
+
+            slack = (
+                costs[current_row - 1]
+                - row_potentials[current_row]
+                - column_potentials[1:]
+            )
+            free = ~used[1:]
+            improved = free & (slack < min_slack[1:])
+            min_slack[1:][improved] = slack[improved]
+            way[1:][improved] = column
+
+            candidates = np.where(free, min_slack[1:], np.inf)
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+
+            row_potentials[assigned[used]] += delta
+            column_potentials[used] -= delta
+            min_slack[1:][free] -= delta
+
+            column = next_column
+            if assigned[column] == 0:
+                break
+
+        # Flip the assignments along the augmenting path
+        while column != 0:
+            previous_column = way[column]
+            assigned[column] = assigned[previous_column]
+            column = previous_column
+
+    columns = np.flatnonzero(assigned[1:])
+    rows = assigned[1:][columns] - 1
+
+    if transposed:
+        rows, columns = columns, rows
+
+    order = np.argsort(rows)
+    return rows[order], columns[order]
+
+
+MATCHING_FUNCTIONS = {"hungarian": match_hungarian, "greedy": match_greedy}
+
+
+def track_instances(
+    frames, cost="distance", max_cost=None, method="hungarian", token_generator=None
+):
+    """Assigns instance tokens to the annotations of a sequence of frames and
+    links the annotations of each instance through prev and next
+
+    Annotations with an instance_token keep it. Every other annotation is
+    matched to a box of the same category in the previous frame and shares
+    its instance token. Unmatched annotations start a new instance.
+    Annotations without a "translation", "size" and "rotation" are never
+    matched. The annotations are updated in place.
+
+    Args:
+        frames (list(list(dict))): the annotations of each frame of a sensor
+            in timestamp order
+        cost (str, optional): "distance" to match the box centers or "iou" to
+            match the overlap of their axis-aligned bounds.
+            Defaults to "distance".
+        max_cost (float, optional): the largest cost of a match.
+            Defaults to DEFAULT_MAX_COSTS[cost].
+        method (str, optional): "hungarian" for the matches with the lowest
+            total cost or "greedy" to take the closest pairs first.
+            Defaults to "hungarian".
+        token_generator (TokenGenerator, optional): the generator to create
+            the new instance tokens with. Defaults to None. The new instance
+            tokens are created from the token of the instance's first
+            annotation, with INSTANCE_TOKEN_GENERATOR if this isn't a
+            deterministic generator.
+    """
+    assert cost in COST_FUNCTIONS, "Unknown cost: {}".format(cost)
+    assert method in MATCHING_FUNCTIONS, "Unknown matching method: {}".format(method)
+
+    if token_generator is None or not token_generator.is_deterministic:
+        token_generator = INSTANCE_TOKEN_GENERATOR
+
+    get_costs = COST_FUNCTIONS[cost]
+    match = MATCHING_FUNCTIONS[method]
+    if max_cost is None:
+        max_cost = DEFAULT_MAX_COSTS[cost]
+
+    # The trackable annotations of the previous frame and their boxes
+    previous = []
+    extents = cost != "distance"
+    previous_boxes = get_boxes(previous, extents)
+
+    for annotations in frames:
+        trackable = [ann for ann in annotations if all(key in ann for key in BOX_KEYS)]
+        boxes = get_boxes(trackable, extents)
+
+        # The previous boxes whose instance isn't already in this frame
+        used = {ann["instance_token"] for ann in annotations if ann["instance_token"]}
+        candidates = [
+            i for i, ann in enumerate(previous) if ann["instance_token"] not in used
+        ]
+        untracked = [i for i, ann in enumerate(trackable) if not ann["instance_token"]]
+
+        if candidates and untracked:
+            costs = get_costs(
+                tuple(array[candidates] for array in previous_boxes),
+                tuple(array[untracked] for array in boxes),
+            )
+
+            # Only boxes of the same category can match
+            category_ids = {}
+            previous_categories = np.array(
+                [
+                    category_ids.setdefault(
+                        previous[i].get("category_token"), len(category_ids)
+                    )
+                    for i in candidates
+                ]
+            )
+            categories = np.array(
+                [
+                    category_ids.setdefault(
+                        trackable[i].get("category_token"), len(category_ids)
+                    )
+                    for i in untracked
+                ]
+            )
+            different = previous_categories[:, None] != categories[None, :]
+            costs[different] = np.inf
+
+            for row, column in zip(*match(costs, max_cost)):
+                trackable[untracked[column]]["instance_token"] = previous[
+                    candidates[row]
+                ]["instance_token"]
+
+        for ann in annotations:
+            if not ann["instance_token"]:
+                ann["instance_token"] = token_generator.create_token(
+                    "instance", ann["token"]
+                )
+
+        previous = trackable
+        previous_boxes = boxes
+
+    link_instances(frames)
+
+
+def link_instances(frames):
+    """Links the annotations of each instance through prev and next in frame
+    order. Links that are already set are kept.
+
+    Args:
+        frames (list(list(dict))): the annotations of each frame in
+            timestamp order
+    """
+    # Instance token -> the instance's annotation in the latest frame
+    latest = {}
+
+    for annotations in frames:
+        for ann in annotations:
+            previous = latest.get(ann["instance_token"])
+            if previous is not None:
+                if not ann["prev"]:
+                    ann["prev"] = previous["token"]
+                if not previous["next"]:
+                    previous["next"] = ann["token"]
+            latest[ann["instance_token"]] = ann
@@ -0,0 +1,221 @@
+import os
+
+import numpy as np
+
+from universal_devkit.scripts.calculate_extrinsic_matrix import (
+    get_homogeneous_transformations,
+    invert_transformations,
+    quaternions_to_rotation_matrices,
+)
+from universal_devkit.utils.utils import get_immediate_directories, read_json
+
+# The frame calibrated_sensor.json transforms are relative to
+BASE_FRAME = "ego"
+
+
+def get_calibration_transform(calibration):
+    """Gets the transformation matrix for a calibrated sensor
+
+    Args:
+        calibration (dict): calibrated sensor data with a "translation" and a
+            "rotation" quaternion in [w, x, y, z] order
+
+    Returns:
+        np.array: a 4x4 transformation from the sensor frame to the ego frame
+    """
+    rotation = quaternions_to_rotation_matrices(calibration["rotation"])
+    return get_homogeneous_transformations(rotation, calibration["translation"])
+
+
+class TransformTree:
+    def __init__(self, base_frame=BASE_FRAME):
+        """A tree of coordinate frames connected by rigid transformations.
+
+        Every frame except the root has a single parent. The transformation
+        between any two frames is found by walking up to their closest
+        common ancestor. Composed transformations and their inverses are
+        cached, and updating a frame's transformation only invalidates the
+        cached entries whose path goes through that frame.
+
+        Example::
+
+            >>> tree = TransformTree.from_scene("scene_directory")
+            >>> lidar_to_camera = tree.get_transform("LIDAR_TOP", "CAM_FRONT")
+
+        Args:
+            base_frame (str, optional): the frame calibrated sensors are
+                relative to. Defaults to BASE_FRAME.
+        """
+        self.base_frame = base_frame
+
+        # Frame -> (parent frame, 4x4 transformation from frame to parent)
+        self._edges = {}
+
+        # (source, target) -> cached 4x4 transformation
+        self._cache = {}
+
+        # Frame -> the cache keys whose path uses the frame's edge
+        self._dependents = {}
+
+    @classmethod
+    def from_scene(cls, input_directory, base_frame=BASE_FRAME):
+        """Creates a tree from the calibrated_sensor.json files of a scene
+
+        Args:
+            input_directory (str): the scene directory with a samples folder
+            base_frame (str, optional): the frame calibrated sensors are
+                relative to. Defaults to BASE_FRAME.
+
+        Returns:
+            TransformTree: the tree
+        """
+        tree = cls(base_frame=base_frame)
+        tree.load_calibrations(os.path.join(input_directory, "samples"))
+        return tree
+
+    def load_calibrations(self, sample_dir_path):
+        """Loads samples/<SENSOR>/calibrated_sensor.json for every sensor.
+        Sensors without a calibration file are skipped.
+
+        Args:
+            sample_dir_path (str): sample directory
+        """
+        for sensor in sorted(get_immediate_directories(sample_dir_path)):
+            calib_file = os.path.join(str(sensor), "calibrated_sensor.json")
+
+            if os.path.exists(calib_file):
+                self.set_calibration(sensor.name, read_json(calib_file))
+
+    def set_calibration(self, sensor_channel, calibration):
+        """Adds or updates a sensor's calibration
+
+        Args:
+            sensor_channel (str): the sensor (ex. "LIDAR_TOP")
+            calibration (dict): calibrated sensor data with a "translation"
+                and a "rotation" quaternion in [w, x, y, z] order
+        """
+        self.set_transform(
+            sensor_channel, self.base_frame, get_calibration_transform(calibration)
+        )
+
+    def set_transform(self, frame, parent, transform):
+        """Adds or updates the transformation from a frame to its parent
+
+        Args:
+            frame (str): the child frame
+            parent (str): the parent frame
+            transform (np.array): a 4x4 rigid transformation from frame to
+                parent
+        """
+        transform = np.array(transform, dtype=np.float64)
+        assert transform.shape == (4, 4), "The transform should be 4x4"
+        assert frame not in self._get_ancestors(
+            parent
+        ), "Setting {} as the parent of {} would create a cycle".format(parent, frame)
+
+        # Only the cached entries that go through this frame are stale
+        for key in self._dependents.pop(frame, ()):
+            self._cache.pop(key, None)
+
+        transform.flags.writeable = False
+        self._edges[frame] = (parent, transform)
+
+    @property
+    def frames(self):
+        """list(str): every frame in the tree"""
+        frames = set(self._edges)
+        frames.update(parent for parent, _ in self._edges.values())
+        return sorted(frames)
+
+    def _get_ancestors(self, frame):
+        """Gets a frame followed by its parent, grandparent, ..., root"""
+        ancestors = [frame]
+
+        while ancestors[-1] in self._edges:
+            ancestors.append(self._edges[ancestors[-1]][0])
+
+        return ancestors
+
+    def _set_cache(self, key, transform, path_frames):
+        transform.flags.writeable = False
+        self._cache[key] = transform
+
+        for frame in path_frames:
+            self._dependents.setdefault(frame, set()).add(key)
+
+    def _get_transform_to_ancestor(self, frame, ancestor, ancestors):
+        """Composes the transformations from frame up to one of its ancestors.
+        ancestors is the result of _get_ancestors(frame).
+        """
+        if frame == ancestor:
+            return np.eye(4)
+
+        key = (frame, ancestor)
+        if key not in self._cache:
+            path_frames = ancestors[: ancestors.index(ancestor)]
+            parent, transform = self._edges[frame]
+            if parent != ancestor:
+                transform = (
+                    self._get_transform_to_ancestor(parent, ancestor, ancestors[1:])
+                    @ transform
+                )
+            self._set_cache(key, transform, path_frames)
+
+        return self._cache[key]
+
+    def get_transform(self, source, target):
+        """Gets the transformation from the source frame to the target frame.
+        Multiplying a point in the source frame by it gives the point in the
+        target frame.
+
+        Args:
+            source (str): the source frame (ex. "LIDAR_TOP")
+            target (str): the target frame (ex. "CAM_FRONT")
+
+        Returns:
+            np.array: a read-only 4x4 transformation
+        """
+        key = (source, target)
+        if key in self._cache:
+            return self._cache[key]
+
+        source_ancestors = self._get_ancestors(source)
+        target_ancestors = self._get_ancestors(target)
+        common = [frame for frame in source_ancestors if frame in target_ancestors]
+        assert common, "Unable to find a transform from {} to {}".format(source, target)
+        common = common[0]
+
+        source_to_common = self._get_transform_to_ancestor(
+            source, common, source_ancestors
+        )
+        if target == common:
+            transform = source_to_common
+        else:
+            target_to_common = self._get_transform_to_ancestor(
+                target, common, target_ancestors
+            )
+            transform = invert_transformations(target_to_common) @ source_to_common
+
+        path_frames = (
+            source_ancestors[: source_ancestors.index(common)]
+            + target_ancestors[: target_ancestors.index(common)]
+        )
+        self._set_cache(key, np.array(transform), path_frames)
+
+        return self._cache[key]
+
+    def transform_points(self, points, source, target):
+        """Transforms points from the source frame to the target frame
+
+        Args:
+            points (np.array): an (N, 3) array of points in the source frame
+            source (str): the source frame
+            target (str): the target frame
+
+        Returns:
+            np.array: an (N, 3) array of points in the target frame
+        """
+        transform = self.get_transform(source, target)
+        points = np.asarray(points, dtype=np.float64)
+
+        return points @ transform[:3, :3].T + transform[:3, 3]
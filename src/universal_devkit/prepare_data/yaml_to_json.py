@@ -1,4 +1,9 @@
-"""Convert a IMU YAML file to JSON messages. This should be run within the UMA docker.
+"""Convert the IMU messages in a bag to JSON. This should be run within the UMA docker.
+
+The messages are read from the bag and written in batches. They used to be
+written to an intermediate YAML file with `rostopic echo` first. By default
+one JSON file is written per message. Use --format jsonl to write a single
+JSON Lines file or --format npz to write a single NumPy file instead.
 
 Example:
 ```
@@ -8,14 +13,25 @@ $ python3 yaml_to_json.py -i \
 ```
 """
 import argparse
-import json
 import os
 import shutil
-import subprocess
 import time
+from itertools import islice
 from pathlib import Path
 
-import yaml
+import numpy as np
+
+from universal_devkit.utils.bag_reader import BagReader
+from universal_devkit.utils.utils import JsonTableWriter, write_json
+
+# The supported output formats
+OUTPUT_FORMATS = ["json", "jsonl", "npz"]
+
+# The number of messages converted and written at a time
+BATCH_SIZE = 1000
+
+# The file name used for the single file output formats
+OUTPUT_FILE_NAME = "imu"
 
 
 def get_timestamp(imu_dict):
@@ -41,55 +57,231 @@ def get_timestamp(imu_dict):
     return str(total_time)
 
 
-def main(bag_path, topic, output_path):
+def message_to_dict(msg):
+    """Converts a deserialized ROS message to a dictionary with the same
+    structure `rostopic echo` outputs
+
+    Args:
+        msg (object): a ROS message, a dictionary or a primitive value
+
+    Returns:
+        dict: the message's fields (primitive values are returned as is)
+    """
+    if isinstance(msg, dict):
+        return {key: message_to_dict(value) for key, value in msg.items()}
+    if isinstance(msg, (list, tuple)):
+        return [message_to_dict(value) for value in msg]
+    if hasattr(msg, "__slots__"):
+        # genpy messages and times store their fields in __slots__
+        return {slot: message_to_dict(getattr(msg, slot)) for slot in msg.__slots__}
+    if hasattr(msg, "__dict__"):
+        return {key: message_to_dict(value) for key, value in vars(msg).items()}
+
+    return msg
+
+
+def read_bag_messages(bag_path, topic, open_bag=None):
+    """Reads the messages on a topic from a bag
+
+    Args:
+        bag_path (str): the path to the bag
+        topic (str): the topic to read
+        open_bag (callable, optional): a function that opens the bag at a
+            path. The bag needs read_messages(topics=...) and close()
+            methods. Defaults to rosbag.Bag or BagReader if
+            ROS isn't installed.
+
+    Yields:
+        object: the deserialized messages
+    """
+    if open_bag is None:
+        try:
+            # Only import ROS when a bag is read so the pipeline can run
+            # without it
+            import rosbag
+
+            open_bag = rosbag.Bag
+        except ImportError:
+            open_bag = BagReader
+
+    bag = open_bag(bag_path)
+
+    try:
+        for _, msg, _ in bag.read_messages(topics=[topic]):
+            yield msg
+    finally:
+        bag.close()
+
+
+def get_imu_arrays(imu_dicts):
+    """Converts IMU messages to arrays
+
+    Args:
+        imu_dicts (list(dict)): the IMU messages
+
+    Returns:
+        dict: a dictionary with the "timestamp" (N,), "orientation" (N, 4)
+            as x, y, z, w, "angular_velocity" (N, 3) and
+            "linear_acceleration" (N, 3) arrays
+    """
+    return {
+        "timestamp": np.array(
+            [int(get_timestamp(imu_dict)) for imu_dict in imu_dicts], dtype=np.int64
+        ),
+        "orientation": np.array(
+            [
+                [imu_dict["orientation"][axis] for axis in "xyzw"]
+                for imu_dict in imu_dicts
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 4),
+        "angular_velocity": np.array(
+            [
+                [imu_dict["angular_velocity"][axis] for axis in "xyz"]
+                for imu_dict in imu_dicts
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 3),
+        "linear_acceleration": np.array(
+            [
+                [imu_dict["linear_acceleration"][axis] for axis in "xyz"]
+                for imu_dict in imu_dicts
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 3),
+    }
+
+
+def get_message_batches(messages, batch_size=BATCH_SIZE):
+    """Converts messages to dictionaries in batches
+
+    Args:
+        messages (iterable): the messages
+        batch_size (int, optional): the number of messages per batch.
+            Defaults to BATCH_SIZE.
+
+    Yields:
+        list(dict): a batch of converted messages
+    """
+    messages = iter(messages)
+
+    while True:
+        batch = list(islice(messages, batch_size))
+        if not batch:
+            return
+
+        # Sometimes the last entry might be None
+        yield [message_to_dict(msg) for msg in batch if msg is not None]
+
+
+def write_imu_messages(
+    messages, output_path, output_format="json", batch_size=BATCH_SIZE
+):
+    """Writes IMU messages in batches
+
+    Args:
+        messages (iterable): the IMU messages. These can be deserialized ROS
+            messages or dictionaries
+        output_path (str): the directory to write the output to
+        output_format (str, optional): "json" writes one file per message
+            named <timestamp>.json, "jsonl" writes every message to imu.jsonl
+            and "npz" writes arrays of the messages to imu.npz.
+            Defaults to "json".
+        batch_size (int, optional): the number of messages converted and
+            written at a time. Defaults to BATCH_SIZE.
+
+    Returns:
+        int: the number of messages written
+    """
+    assert output_format in OUTPUT_FORMATS, "output_format must be one of: {}".format(
+        ", ".join(OUTPUT_FORMATS)
+    )
+
+    batches = get_message_batches(messages, batch_size=batch_size)
+
+    if output_format == "jsonl":
+        file_path = os.path.join(output_path, OUTPUT_FILE_NAME + ".jsonl")
+
+        with JsonTableWriter(file_path, json_lines=True) as writer:
+            for imu_dicts in batches:
+                writer.write_all(imu_dicts)
+
+        return writer.count
+
+    if output_format == "npz":
+        # Each batch is converted to compact arrays as soon as it is read.
+        # The empty batch keeps the shapes correct when there are no messages
+        batch_arrays = [get_imu_arrays([])]
+        batch_arrays.extend(get_imu_arrays(imu_dicts) for imu_dicts in batches)
+        arrays = {
+            key: np.concatenate([batch[key] for batch in batch_arrays])
+            for key in batch_arrays[0]
+        }
+
+        file_path = os.path.join(output_path, OUTPUT_FILE_NAME + ".npz")
+        np.savez(file_path, **arrays)
+
+        return len(arrays["timestamp"])
+
+    count = 0
+    for imu_dicts in batches:
+        for imu_dict in imu_dicts:
+            file_name = "{}.json".format(get_timestamp(imu_dict))
+            write_json(imu_dict, os.path.join(output_path, file_name))
+
+        count += len(imu_dicts)
+
+    return count
+
+
+def main(
+    bag_path,
+    topic,
+    output_path,
+    output_format="json",
+    batch_size=BATCH_SIZE,
+    messages=None,
+):
+    """Converts the IMU messages in a bag
+
+    Args:
+        bag_path (str): the path to the bag
+        topic (str): the IMU topic
+        output_path (str): the output directory. It is removed if it exists.
+        output_format (str, optional): see write_imu_messages.
+            Defaults to "json".
+        batch_size (int, optional): the number of messages converted and
+            written at a time. Defaults to BATCH_SIZE.
+        messages (iterable, optional): messages to use instead of reading the
+            bag (ex. synthetic messages). Defaults to None.
+
+    Returns:
+        int: the number of messages written
+    """
     # Keep track of how long the conversion took
     # Metrics are fun
     start_time = time.time()
 
-    print("Converting ROS bag to YAML file...")
-    with open("imu.yaml", "w") as f:
-        # Note that subprocess.run(["rostopic", "echo", "-b", bag_path,
-        # topic, ">", "output.yaml"])
-        # does not work. You need an actual shell in order to pipe a file.
-        # subprocess.run()
-        # by default does not use an actual shell because this is not secure.
-        # See: https://stackoverflow.com/a/4856684/6942666
-        # rostopic echo -b raise-the-flag_imu.bag /imu/data/raw > imu.yaml
-        subprocess.run(["rostopic", "echo", "-b", bag_path, topic], stdout=f)
-
-    print("Converting YAML files to JSON...")
-
     # Remove the output path if it exists
     shutil.rmtree(output_path, ignore_errors=True)
 
     # Create the output directories
     Path(output_path).mkdir(parents=True, exist_ok=True)
 
-    with open("imu.yaml") as f:
-        imu_dicts = yaml.safe_load_all(f)
-
-        for imu_dict in imu_dicts:
-            try:
-                timestamp = get_timestamp(imu_dict)
-            except Exception:
-                # Sometimes the last entry might be None
-                # Timed the difference between having an if-statement
-                # to check the imu_dict vs. using try-except to catch
-                # an error. Time difference was negligible.
-                # The majority of time is spent on I/O
-                continue
-
-            file_name = "{}.json".format(timestamp)
-            file_path = os.path.join(output_path, file_name)
+    if messages is None:
+        messages = read_bag_messages(bag_path, topic)
 
-            with open(file_path, "w") as f:
-                json.dump(imu_dict, f)
-
-    # Clean up after ourselves
-    os.remove("imu.yaml")
+    print("Converting IMU messages to {}...".format(output_format))
+    count = write_imu_messages(
+        messages, output_path, output_format=output_format, batch_size=batch_size
+    )
 
     total_time = time.time() - start_time
-    print("Finished converting bag in {0:0.1f} seconds".format(total_time))
+    print(
+        "Finished converting {} messages in {:0.1f} seconds".format(count, total_time)
+    )
+
+    return count
 
 
 if __name__ == "__main__":
@@ -100,5 +292,26 @@ if __name__ == "__main__":
     )
     ap.add_argument("-i", "--input_bag", type=str, help="The path to the input bag")
     ap.add_argument("-t", "--topic", type=str, help="Topic for the ROS bag")
+    ap.add_argument(
+        "-f",
+        "--format",
+        type=str,
+        choices=OUTPUT_FORMATS,
+        default="json",
+        help="Write one JSON file per message, a JSON Lines file or a NumPy file",
+    )
+    ap.add_argument(
+        "-b",
+        "--batch_size",
+        type=int,
+        default=BATCH_SIZE,
+        help="The number of messages converted at a time",
+    )
     args = vars(ap.parse_args())
-    main(args["input_bag"], args["topic"], args["output"])
+    main(
+        args["input_bag"],
+        args["topic"],
+        args["output"],
+        output_format=args["format"],
+        batch_size=args["batch_size"],
+    )
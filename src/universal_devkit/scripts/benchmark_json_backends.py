@@ -0,0 +1,152 @@
+"""
+Benchmark how fast each installed JSON backend parses annotation files.
+
+By default synthetic annotation files between 1 KB and 50 KB are created in a
+temporary directory. You can also pass a directory of your own JSON files.
+
+$ python benchmark_json_backends.py -n 500
+$ python benchmark_json_backends.py -d samples/LIDAR_TOP/annotations
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from glob import glob
+
+from universal_devkit.utils.json_backend import get_available_backends
+from universal_devkit.utils.utils import TokenGenerator, read_json, write_json
+
+
+def create_annotation(token_generator, rng):
+    """Creates a single synthetic sample annotation
+
+    Returns:
+        dict: an annotation similar to the output of get_sample_annotation
+    """
+    return {
+        "token": token_generator.create_token(),
+        "sample_token": token_generator.create_token(),
+        "instance_token": token_generator.create_token(),
+        "category_token": token_generator.create_token(),
+        "visibility_token": "4",
+        "attribute_tokens": [],
+        "translation": [rng.uniform(-50, 50) for _ in range(3)],
+        "size": [rng.uniform(0.5, 5) for _ in range(3)],
+        "rotation": [rng.uniform(-1, 1) for _ in range(4)],
+        "prev": "",
+        "next": "",
+        "num_lidar_pts": rng.randint(0, 5000),
+        "num_radar_pts": rng.randint(0, 50),
+    }
+
+
+def create_annotation_files(directory, num_files, min_kb=1, max_kb=50, seed=0):
+    """Creates synthetic annotation files with sizes spread between
+    min_kb and max_kb
+
+    Args:
+        directory (str): the directory to create the files in
+        num_files (int): the number of files to create
+        min_kb (int, optional): the smallest file size. Defaults to 1.
+        max_kb (int, optional): the largest file size. Defaults to 50.
+        seed (int, optional): the random seed. Defaults to 0.
+
+    Returns:
+        list(str): the paths to the files
+    """
+    rng = random.Random(seed)
+    token_generator = TokenGenerator()
+    annotation_size = len(str(create_annotation(token_generator, rng)))
+
+    paths = []
+    for i in range(num_files):
+        target_size = rng.uniform(min_kb, max_kb) * 1024
+        num_annotations = max(1, int(target_size / annotation_size))
+        annotations = [
+            create_annotation(token_generator, rng) for _ in range(num_annotations)
+        ]
+
+        path = os.path.join(directory, "{}.pcd.json".format(i))
+        write_json(annotations, path, backend="json")
+        paths.append(path)
+
+    return paths
+
+
+def benchmark_backend(paths, backend, repeat=3):
+    """Times parsing every file with a backend
+
+    Args:
+        paths (list(str)): the JSON files to parse
+        backend (str): the name of the backend
+        repeat (int, optional): how many times to parse the files. The fastest
+            run is used. Defaults to 3.
+
+    Returns:
+        float: the fastest time in seconds to parse all the files
+    """
+    best_time = float("inf")
+
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for path in paths:
+            read_json(path, backend=backend)
+        best_time = min(best_time, time.perf_counter() - start_time)
+
+    return best_time
+
+
+def main(directory, num_files, repeat):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if directory:
+            paths = glob(os.path.join(directory, "*.json"))
+        else:
+            paths = create_annotation_files(temp_dir, num_files)
+
+        assert len(paths) > 0, "No JSON files to benchmark"
+        total_mb = sum(os.path.getsize(path) for path in paths) / (1024 * 1024)
+
+        print(
+            "Parsing {} files ({:0.1f} MB, {:0.1f} KB on average)".format(
+                len(paths), total_mb, total_mb * 1024 / len(paths)
+            )
+        )
+        times = {
+            backend: benchmark_backend(paths, backend, repeat=repeat)
+            for backend in get_available_backends()
+        }
+
+    print("{:<10} {:>12} {:>10} {:>10}".format("backend", "files/s", "MB/s", "speedup"))
+    for backend, total_time in times.items():
+        print(
+            "{:<10} {:>12.0f} {:>10.1f} {:>9.2f}x".format(
+                backend,
+                len(paths) / total_time,
+                total_mb / total_time,
+                times["json"] / total_time,
+            )
+        )
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument(
+        "-d",
+        "--directory",
+        type=str,
+        default=None,
+        help="A directory of JSON files to parse instead of synthetic files",
+    )
+    ap.add_argument(
+        "-n",
+        "--num_files",
+        type=int,
+        default=200,
+        help="The number of synthetic files to create",
+    )
+    ap.add_argument(
+        "-r", "--repeat", type=int, default=3, help="How many times to repeat"
+    )
+    args = vars(ap.parse_args())
+    main(args["directory"], args["num_files"], args["repeat"])
@@ -1,3 +1,4 @@
+import argparse
 import math
 
 import numpy as np
@@ -109,6 +110,270 @@ def get_relative_transformation(a_to_base, b_to_base):
     return base_to_a @ b_to_base
 
 
+def euler_angles_to_rotation_matrices(angles):
+    """Batched version of euler_angle_to_rotation_matrix
+
+    Args:
+        angles (np.array): an (..., 3) array of angles in the same order
+            euler_angle_to_rotation_matrix takes them
+
+    Returns:
+        np.array: an (..., 3, 3) array of rotation matrices
+    """
+    angles = np.asarray(angles, dtype=np.float64)
+    cos = np.cos(angles)
+    sin = np.sin(angles)
+    c_x, c_y, c_z = cos[..., 0], cos[..., 1], cos[..., 2]
+    s_x, s_y, s_z = sin[..., 0], sin[..., 1], sin[..., 2]
+
+    # R_z @ R_y @ R_x written out
+    R = np.empty(angles.shape[:-1] + (3, 3))
+    R[..., 0, 0] = c_z * c_y
+    R[..., 0, 1] = c_z * s_y * s_x - s_z * c_x
+    R[..., 0, 2] = c_z * s_y * c_x + s_z * s_x
+    R[..., 1, 0] = s_z * c_y
+    R[..., 1, 1] = s_z * s_y * s_x + c_z * c_x
+    R[..., 1, 2] = s_z * s_y * c_x - c_z * s_x
+    R[..., 2, 0] = -s_y
+    R[..., 2, 1] = c_y * s_x
+    R[..., 2, 2] = c_y * c_x
+
+    return R
+
+
+def rotation_matrices_to_euler_angles(R):
+    """Batched version of rotation_matrix_to_euler_angle
+
+    Args:
+        R (np.array): an (..., 3, 3) array of rotation matrices. (..., 4, 4)
+            transformation matrices are also accepted.
+
+    Returns:
+        np.array: an (..., 3) array of [yaw, pitch, roll]
+    """
+    R = np.asarray(R, dtype=np.float64)
+
+    yaw = np.arctan2(R[..., 1, 0], R[..., 0, 0])
+    pitch = np.arctan2(-R[..., 2, 0], np.hypot(R[..., 2, 1], R[..., 2, 2]))
+    roll = np.arctan2(R[..., 2, 1], R[..., 2, 2])
+
+    return np.stack([yaw, pitch, roll], axis=-1)
+
+
+def quaternions_to_rotation_matrices(quaternions):
+    """Converts quaternions to rotation matrices
+
+    Args:
+        quaternions (np.array): an (..., 4) array of quaternions in
+            [w, x, y, z] order (the order used by calibrated_sensor.json).
+            They are normalized first.
+
+    Returns:
+        np.array: an (..., 3, 3) array of rotation matrices
+    """
+    quaternions = np.asarray(quaternions, dtype=np.float64)
+    quaternions = quaternions / np.linalg.norm(quaternions, axis=-1, keepdims=True)
+    w, x, y, z = (quaternions[..., i] for i in range(4))
+
+    R = np.empty(quaternions.shape[:-1] + (3, 3))
+    R[..., 0, 0] = 1 - 2 * (y * y + z * z)
+    R[..., 0, 1] = 2 * (x * y - z * w)
+    R[..., 0, 2] = 2 * (x * z + y * w)
+    R[..., 1, 0] = 2 * (x * y + z * w)
+    R[..., 1, 1] = 1 - 2 * (x * x + z * z)
+    R[..., 1, 2] = 2 * (y * z - x * w)
+    R[..., 2, 0] = 2 * (x * z - y * w)
+    R[..., 2, 1] = 2 * (y * z + x * w)
+    R[..., 2, 2] = 1 - 2 * (x * x + y * y)
+
+    return R
+
+
+def rotation_matrices_to_quaternions(R):
+    """Converts rotation matrices to quaternions
+
+    Args:
+        R (np.array): an (..., 3, 3) array of rotation matrices. (..., 4, 4)
+            transformation matrices are also accepted.
+
+    Returns:
+        np.array: an (..., 4) array of unit quaternions in [w, x, y, z]
+            order with w >= 0
+    """
+    R = np.asarray(R, dtype=np.float64)[..., :3, :3]
+    m00, m01, m02 = R[..., 0, 0], R[..., 0, 1], R[..., 0, 2]
+    m10, m11, m12 = R[..., 1, 0], R[..., 1, 1], R[..., 1, 2]
+    m20, m21, m22 = R[..., 2, 0], R[..., 2, 1], R[..., 2, 2]
+
+    # Solve for the largest component first to avoid dividing by a
+    # number close to 0 (Shepperd's method)
+    candidates = np.stack(
+        [
+            1 + m00 + m11 + m22,
+            1 + m00 - m11 - m22,
+            1 - m00 + m11 - m22,
+            1 - m00 - m11 + m22,
+        ],
+        axis=-1,
+    )
+    largest = np.argmax(candidates, axis=-1)
+    c = np.take_along_axis(candidates, largest[..., None], -1)[..., 0]
+    s = 2 * np.sqrt(c)
+
+    # Each row is [w, x, y, z] * s for one choice of largest component
+    numerators = np.stack(
+        [
+            np.stack([c, m21 - m12, m02 - m20, m10 - m01], axis=-1),
+            np.stack([m21 - m12, c, m01 + m10, m02 + m20], axis=-1),
+            np.stack([m02 - m20, m01 + m10, c, m12 + m21], axis=-1),
+            np.stack([m10 - m01, m02 + m20, m12 + m21, c], axis=-1),
+        ],
+        axis=-2,
+    )
+    quaternions = (
+        np.take_along_axis(numerators, largest[..., None, None], -2)[..., 0, :]
+        / s[..., None]
+    )
+
+    # q and -q are the same rotation. Use the one with w >= 0
+    return np.where(quaternions[..., :1] < 0, -quaternions, quaternions)
+
+
+def get_homogeneous_transformations(rotations, translations):
+    """Batched version of get_homogeneous_transformation
+
+    Args:
+        rotations (np.array): an (..., 3, 3) array of rotation matrices
+        translations (np.array): an (..., 3) array of translations
+
+    Returns:
+        np.array: an (..., 4, 4) array of homogeneous transformations
+    """
+    rotations = np.asarray(rotations, dtype=np.float64)
+    translations = np.asarray(translations, dtype=np.float64)
+
+    homogeneous = np.zeros(rotations.shape[:-2] + (4, 4))
+    homogeneous[..., :3, :3] = rotations
+    homogeneous[..., :3, 3] = translations
+    homogeneous[..., 3, 3] = 1
+    return homogeneous
+
+
+def static_transforms_to_extrinsics(transforms):
+    """Batched version of static_transform_to_extrinsic
+
+    Args:
+        transforms (np.array): an (..., 6) array of [x, y, z, yaw, pitch, roll]
+
+    Returns:
+        np.array: an (..., 4, 4) array of extrinsic matrices
+    """
+    transforms = np.asarray(transforms, dtype=np.float64)
+    assert transforms.shape[-1] == 6, "Transforms should be (..., 6)"
+
+    rotations = euler_angles_to_rotation_matrices(transforms[..., 3:])
+    return get_homogeneous_transformations(rotations, transforms[..., :3])
+
+
+def extrinsics_to_static_transforms(mats):
+    """Batched version of extrinsic_to_static_transform
+
+    Args:
+        mats (np.array): an (..., 4, 4) array of extrinsic matrices
+
+    Returns:
+        np.array: an (..., 6) array of [x, y, z, yaw, pitch, roll]
+    """
+    mats = np.asarray(mats, dtype=np.float64)
+
+    return np.concatenate(
+        [mats[..., :3, 3], rotation_matrices_to_euler_angles(mats)], axis=-1
+    )
+
+
+def invert_transformations(mats):
+    """Inverts rigid transformations without a general matrix inverse.
+    The inverse of [R | t] is [R^T | -R^T t].
+
+    Args:
+        mats (np.array): an (..., 4, 4) array of rigid transformations
+
+    Returns:
+        np.array: an (..., 4, 4) array of the inverse transformations
+    """
+    mats = np.asarray(mats, dtype=np.float64)
+    rotations = np.swapaxes(mats[..., :3, :3], -1, -2)
+    translations = -np.einsum("...ij,...j->...i", rotations, mats[..., :3, 3])
+
+    return get_homogeneous_transformations(rotations, translations)
+
+
+def get_relative_transformations(a_to_base, b_to_base):
+    """Batched version of get_relative_transformation. The inputs are
+    broadcast against each other, so one transformation can be compared
+    with many.
+
+    Args:
+        a_to_base (np.array): an (..., 4, 4) array of rigid transformations
+            from a to base_link
+        b_to_base (np.array): an (..., 4, 4) array of rigid transformations
+            from b to base_link
+
+    Returns:
+        np.array: an (..., 4, 4) array of the transformations from a to b
+    """
+    return invert_transformations(a_to_base) @ np.asarray(b_to_base, dtype=np.float64)
+
+
+def print_relative_transformation(source_to_base, target_to_base):
+    """Prints the transformation from a source sensor to a target sensor
+
+    Args:
+        source_to_base (list): the [x, y, z, yaw, pitch, roll] static
+            transform from the source sensor to the base frame
+        target_to_base (list): the [x, y, z, yaw, pitch, roll] static
+            transform from the target sensor to the base frame
+    """
+    source_to_target = get_relative_transformation(
+        static_transform_to_extrinsic(source_to_base),
+        static_transform_to_extrinsic(target_to_base),
+    )
+
+    print("Source relative to target")
+    print(source_to_target)
+
+    x, y, z, yaw, pitch, roll = extrinsic_to_static_transform(source_to_target)
+    print("Translation (x, y, z):", x, y, z)
+    print("Rotation (y, p, r):", yaw, pitch, roll)
+
+
+def add_arguments(parser):
+    """Adds the command line arguments of the script to a parser
+
+    Args:
+        parser (argparse.ArgumentParser): the parser to add the arguments to
+    """
+    metavar = ("X", "Y", "Z", "YAW", "PITCH", "ROLL")
+    parser.add_argument(
+        "-s",
+        "--source",
+        type=float,
+        nargs=6,
+        required=True,
+        metavar=metavar,
+        help="The static transform from the source sensor to the base frame",
+    )
+    parser.add_argument(
+        "-t",
+        "--target",
+        type=float,
+        nargs=6,
+        required=True,
+        metavar=metavar,
+        help="The static transform from the target sensor to the base frame",
+    )
+
+
 if __name__ == "__main__":
     """
     <node pkg="tf" type="static_transform_publisher"
@@ -123,47 +388,18 @@ if __name__ == "__main__":
         args="0.4445 0.0 0.09525 0.0 0.06981 0.0 base_link velodyne 100"
     />
 
-    Camera static transform:
-    [[ 0.99875026  0.          0.04997917  0.508     ]
-    [ 0.          1.          0.          0.        ]
-    [-0.04997917  0.          0.99875026  0.1778    ]
-    [ 0.          0.          0.          1.        ]]
+    $ python calculate_extrinsic_matrix.py -s 0.5080 0.0 0.1778 0 0.05 0 \
+        -t 0.4445 0.0 0.09525 0.0 0.06981 0.0
 
-    Velodyne static transform:
-    [[ 0.99756427  0.          0.06975331  0.4445    ]
-    [ 0.          1.          0.          0.        ]
-    [-0.06975331  0.          0.99756427  0.09525   ]
-    [ 0.          0.          0.          1.        ]]
-
-    Camera relative to Velodyne
+    Source relative to target
     [[ 0.99980379  0.          0.0198087  -0.05929486]
     [ 0.          1.          0.          0.        ]
     [-0.0198087   0.          0.99980379 -0.08562051]
     [ 0.          0.          0.          1.        ]]
-
-    Overall camera to velodyne transform
     Translation (x, y, z): -0.059294861111785835 0.0 -0.08562051124429254
     Rotation (y, p, r): 0.0 0.019810000000000008 0.0
     """
-
-    print("Camera static transform: ")
-    # Add values for the camera to base here
-    camera_to_base = static_transform_to_extrinsic([0.5080, 0.0, 0.1778, 0, 0.05, 0])
-    print(camera_to_base)
-
-    print("Velodyne static transform: ")
-    # Add values for the velodyne to base here
-    velodyne_to_base = static_transform_to_extrinsic(
-        [0.4445, 0.0, 0.09525, 0.0, 0.06981, 0.0]
-    )
-    print(velodyne_to_base)
-
-    print("Camera relative to Velodyne")
-    # Add values for the camera to velodyne here
-    camera_to_velodyne = get_relative_transformation(camera_to_base, velodyne_to_base)
-    print(camera_to_velodyne)
-
-    print("Overall camera to velodyne transform")
-    x, y, z, yaw, pitch, roll = extrinsic_to_static_transform(camera_to_velodyne)
-    print("Translation (x, y, z):", x, y, z)
-    print("Rotation (y, p, r):", yaw, pitch, roll)
+    ap = argparse.ArgumentParser()
+    add_arguments(ap)
+    args = vars(ap.parse_args())
+    print_relative_transformation(args["source"], args["target"])
@@ -1,26 +1,52 @@
 """Converts a directory of YOLO formatted data to XYXY format.
+
+By default the images are hardlinked (or copied if hardlinks aren't
+supported) into the output directory so they are never decoded or re-encoded.
+Pass --image_mode png to convert the images to PNG instead.
+
+$ python convert_yolo_to_xyxy.py -i yolo_data -o output -w 8
 """
 import argparse
 import glob
-import json
 import os
 import shutil
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 
-import cv2
 import numpy as np
-from bbox_utils import BoundingBox
 from tqdm import tqdm
 
+from universal_devkit.prepare_data.image_utils import get_image_dimensions
+from universal_devkit.utils.utils import write_json
+
+# How the images are written to the output directory
+IMAGE_MODES = ["hardlink", "copy", "png"]
+
+# The number of label files sent to a worker process at a time
+WORKER_CHUNK_SIZE = 64
+
 
 def convert_images_from_yolo_to_xyxy(
-    yolo_directory_path, output_path, extension=".jpg"
+    yolo_directory_path,
+    output_path,
+    extension=".jpg",
+    image_mode="hardlink",
+    workers=1,
 ):
     """Converts a directory of YOLO formatted labels to XYXY labels.
 
     Args:
         yolo_directory_path (str): the path to the YOLO formatted data
         output_path (str): the path to store the ouput
+        extension (str, optional): the extension of the YOLO images.
+            Defaults to ".jpg".
+        image_mode (str, optional): how to write the images. "hardlink" links
+            the original file (falling back to a copy), "copy" copies the
+            original file and "png" decodes the image and writes it as a PNG.
+            Defaults to "hardlink".
+        workers (int, optional): the number of processes used to convert the
+            label files. Defaults to 1.
     """
     LABEL_DIR = os.path.join(yolo_directory_path, "labels")
     IMAGE_DIR = os.path.join(yolo_directory_path, "images")
@@ -35,6 +61,9 @@ def convert_images_from_yolo_to_xyxy(
     assert Path(
         IMAGE_DIR
     ).is_dir(), "The YOLO directory must contain an 'images' folder"
+    assert image_mode in IMAGE_MODES, "image_mode must be one of: {}".format(
+        ", ".join(IMAGE_MODES)
+    )
 
     # Remove the output path if it exists
     shutil.rmtree(output_path, ignore_errors=True)
@@ -44,77 +73,211 @@ def convert_images_from_yolo_to_xyxy(
     Path(OUTPUT_IMAGE_DIR).mkdir(parents=True, exist_ok=True)
 
     # Get all the label paths
-    label_paths = glob.glob(LABEL_DIR + "/*.txt")
+    label_paths = sorted(glob.glob(LABEL_DIR + "/*.txt"))
+
+    convert = partial(
+        convert_label_file,
+        image_dir=IMAGE_DIR,
+        output_label_dir=OUTPUT_LABEL_DIR,
+        output_image_dir=OUTPUT_IMAGE_DIR,
+        extension=extension,
+        image_mode=image_mode,
+    )
 
-    for label_path in tqdm(label_paths):
-        file_name = Path(label_path).stem
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(convert, label_paths, chunksize=WORKER_CHUNK_SIZE)
+            for _ in tqdm(results, total=len(label_paths)):
+                pass
+    else:
+        for label_path in tqdm(label_paths):
+            convert(label_path)
+
+
+def convert_label_file(
+    label_path,
+    image_dir,
+    output_label_dir,
+    output_image_dir,
+    extension=".jpg",
+    image_mode="hardlink",
+):
+    """Converts a single YOLO label file and writes its image to the output.
+
+    Args:
+        label_path (str): the path to the YOLO label file
+        image_dir (str): the directory with the YOLO images
+        output_label_dir (str): the directory to write the XYXY label to
+        output_image_dir (str): the directory to write the image to
+        extension (str, optional): the extension of the YOLO images.
+            Defaults to ".jpg".
+        image_mode (str, optional): how to write the image. See
+            convert_images_from_yolo_to_xyxy. Defaults to "hardlink".
+
+    Returns:
+        str: the path to the output label file
+    """
+    file_name = Path(label_path).stem
+    image_path = os.path.join(image_dir, file_name + extension)
 
-        # Get a list of annotations (list of strings)
-        with open(label_path) as f:
-            annotations = list(f)
+    if image_mode == "png":
+        # Only import OpenCV when the images need to be decoded
+        import cv2
 
-        # Get the corresponding image dimensions
-        image_path = os.path.join(IMAGE_DIR, file_name + extension)
         img = cv2.imread(image_path)
-        img_height, img_width = img.shape[:2]
-        image_dimension = np.array([img_height, img_width])
-
-        # A list of XYXY annotation strings
-        annotation_dict = {
-            "image_name": file_name + ".png",
-            "dimensions": img.shape,
-            "annotations": [],
-        }
-
-        for annotation in annotations:
-            class_id, center_x, center_y, width, height = annotation.split()
-
-            # Convert strings into their correct numeric type
-            class_id = int(class_id)
-            center_x = float(center_x)
-            center_y = float(center_y)
-            width = float(width)
-            height = float(height)
-            center = np.array([center_x, center_y])
-
-            # Convert from YOLO to XYXY
-            bbox = BoundingBox.from_yolo(center, width, height, image_dimension)
-            xy1, xy2 = bbox.to_xyxy()
-
-            # Flatten into a single list of form [X1, Y1, X2, Y2]
-            x1 = xy1[0].item()
-            y1 = xy1[1].item()
-            x2 = xy2[0].item()
-            y2 = xy2[1].item()
-            # @TODO: update the class_id to be the correct string identifier
-            annotation_dict["annotations"].append(
-                {"class": class_id, "xyxy": [x1, y1, x2, y2]}
-            )
-
-        # Write the output annotations
-        output_annotation_file = os.path.join(OUTPUT_LABEL_DIR, file_name + ".png.json")
-        with open(output_annotation_file, "w") as f:
-            json.dump(annotation_dict, f)
-
-        # Copy over the image
-        output_image_path = os.path.join(OUTPUT_IMAGE_DIR, file_name + ".png")
+        assert img is not None, "Unable to read image: {}".format(image_path)
+        dimensions = list(img.shape)
+        output_image_name = file_name + ".png"
+    else:
+        # The dimensions are read from the header. OpenCV always decoded the
+        # images as 3 channel BGR, so keep reporting 3 channels.
+        img_width, img_height = get_image_dimensions(image_path)
+        dimensions = [img_height, img_width, 3]
+        output_image_name = file_name + extension
+
+    # Convert every box in the file at once
+    labels = read_yolo_labels(label_path)
+    class_ids, xyxy = convert_yolo_labels_to_xyxy(labels, dimensions)
+
+    # @TODO: update the class_id to be the correct string identifier
+    annotation_dict = {
+        "image_name": output_image_name,
+        "dimensions": dimensions,
+        "annotations": [
+            {"class": class_id, "xyxy": box}
+            for class_id, box in zip(class_ids.tolist(), xyxy.tolist())
+        ],
+    }
+
+    # Write the output annotations
+    output_annotation_file = os.path.join(output_label_dir, output_image_name + ".json")
+    write_json(annotation_dict, output_annotation_file)
+
+    # Write the image
+    output_image_path = os.path.join(output_image_dir, output_image_name)
+    if image_mode == "png":
         cv2.imwrite(output_image_path, img)
+    else:
+        copy_image(image_path, output_image_path, hardlink=image_mode == "hardlink")
 
+    return output_annotation_file
 
-if __name__ == "__main__":
-    ap = argparse.ArgumentParser()
-    ap.add_argument(
+
+def read_yolo_labels(label_path):
+    """Reads a YOLO label file
+
+    Args:
+        label_path (str): the path to the YOLO label file
+
+    Returns:
+        np.array: an (N, 5) array with a row of form
+            [class_id, center_x, center_y, width, height] per box
+    """
+    with open(label_path) as f:
+        values = f.read().split()
+
+    assert len(values) % 5 == 0, "Every label in {} must have 5 values".format(
+        label_path
+    )
+    return np.array(values, dtype=np.float64).reshape(-1, 5)
+
+
+def convert_yolo_labels_to_xyxy(labels, image_dimension, clip=True):
+    """Converts YOLO labels to XYXY boxes in pixels
+
+    This gives the same result as converting each box with
+    BoundingBox.from_yolo(...).to_xyxy(), but converts all the boxes at once.
+
+    Args:
+        labels (np.array): an (N, 5) array with rows of form
+            [class_id, center_x, center_y, width, height] scaled [0, 1]
+        image_dimension (list): the dimensions of the image (rows, cols, ...)
+        clip (bool, optional): whether to clip the boxes to the image bounds.
+            Defaults to True.
+
+    Returns:
+        tuple(np.array, np.array): the (N,) class ids and an (N, 4) array of
+            [x1, y1, x2, y2] boxes
+    """
+    img_height, img_width = image_dimension[:2]
+    image_size = np.array([img_width, img_height], dtype=np.float64)
+
+    centers = labels[:, 1:3] * image_size
+    sizes = labels[:, 3:5] * image_size
+
+    top_left = centers - sizes / 2
+    bottom_right = top_left + sizes
+    xyxy = np.rint(np.hstack([top_left, bottom_right])).astype(np.int32)
+
+    if clip:
+        np.clip(xyxy, 0, np.tile(image_size, 2).astype(np.int32), out=xyxy)
+
+    return labels[:, 0].astype(np.int32), xyxy
+
+
+def copy_image(image_path, output_image_path, hardlink=True):
+    """Copies an image without decoding it
+
+    Args:
+        image_path (str): the path to the original image
+        output_image_path (str): the path to write the image to
+        hardlink (bool, optional): whether to hardlink the image. Falls back
+            to a copy if hardlinks aren't supported (ex. across file systems).
+            Defaults to True.
+    """
+    if hardlink:
+        try:
+            os.link(image_path, output_image_path)
+            return
+        except OSError:
+            pass
+
+    shutil.copyfile(image_path, output_image_path)
+
+
+def add_arguments(parser):
+    """Adds the command line arguments of the script to a parser
+
+    Args:
+        parser (argparse.ArgumentParser): the parser to add the arguments to
+    """
+    parser.add_argument(
         "-i",
         "--input",
         type=str,
         required=True,
         help="The path to the YOLO data directory",
     )
-    ap.add_argument(
+    parser.add_argument(
         "-o", "--output", type=str, default="output", help="The output directory"
     )
-    ap.add_argument(
+    parser.add_argument(
         "-e", "--extension", type=str, default=".jpg", help="The image extension to use"
     )
+    parser.add_argument(
+        "--image_mode",
+        type=str,
+        choices=IMAGE_MODES,
+        default="hardlink",
+        help="How to write the images. 'png' re-encodes them as PNG",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of processes used to convert the labels",
+    )
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    add_arguments(ap)
     args = vars(ap.parse_args())
-    convert_images_from_yolo_to_xyxy(args["input"], args["output"], args["extension"])
+    convert_images_from_yolo_to_xyxy(
+        args["input"],
+        args["output"],
+        args["extension"],
+        image_mode=args["image_mode"],
+        workers=args["workers"],
+    )
@@ -11,11 +11,8 @@ import argparse
 import json
 import os
 import shutil
-from glob import glob
 from pathlib import Path
 
-import rosbag
-from rospy_message_converter import json_message_converter
 from tqdm import tqdm
 
 
@@ -44,7 +41,56 @@ def get_timestamp(imu_dict):
     return str(total_time)
 
 
-def correct_timestamps(input_directory, bag_path, output_directory):
+def get_header_timestamp(msg):
+    """Gets the header timestamp directly from a deserialized message.
+
+    This gives the same result as get_timestamp without converting the
+    message to JSON.
+
+    Args:
+        msg (object): a deserialized ROS message
+
+    Returns:
+        str: the header timestamp in nanoseconds or None if the message
+            doesn't have a header
+    """
+    stamp = getattr(getattr(msg, "header", None), "stamp", None)
+
+    if stamp is None:
+        return None
+
+    return str(int(stamp.secs) * 1000000000 + int(stamp.nsecs))
+
+
+def index_directory(input_directory):
+    """Indexes the files in a directory by the bag timestamp in their name.
+
+    The timestamp is everything before the first "." so files with multiple
+    extensions like "1532402927647951.pcd.json" are indexed under
+    "1532402927647951".
+
+    Args:
+        input_directory (str): path to the directory of files to index
+
+    Returns:
+        dict: a dictionary mapping timestamp -> list of file paths
+    """
+    file_index = {}
+
+    with os.scandir(input_directory) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+
+            stem = entry.name.split(".", 1)[0]
+            file_index.setdefault(stem, []).append(entry.path)
+
+    return file_index
+
+
+def correct_timestamps(
+    input_directory, bag_path, output_directory, topics=None, open_bag=None
+):
     """Script to correct timestamps if files were generated using ROS
         bag time vs. ROS header time
 
@@ -54,25 +100,56 @@ def correct_timestamps(input_directory, bag_path, output_directory):
         bag_path (str): path to the bag the files were generated from
         output_directory (str): path to the directory to store files
             with correct names
+        topics (list(str), optional): only read messages on these topics.
+            Defaults to all topics.
+        open_bag (callable, optional): a function that opens the bag at a
+            path. The bag needs read_messages(topics=...) and close()
+            methods. Defaults to rosbag.Bag or BagReader if
+            ROS isn't installed.
+
+    Returns:
+        list(str): the paths of the input files that didn't match a message
     """
+    if open_bag is None:
+        try:
+            # Only import ROS when a bag is read so the helpers can be used
+            # without it
+            import rosbag
+
+            open_bag = rosbag.Bag
+        except ImportError:
+            # Read the bag without ROS
+            from universal_devkit.utils.bag_reader import BagReader
+
+            open_bag = BagReader
+
     Path.mkdir(Path(output_directory), parents=True, exist_ok=True)
 
     # Read point cloud data from bag.
-    input_bag = rosbag.Bag(bag_path)
+    input_bag = open_bag(bag_path)
 
     print("Reading data from " + bag_path + "...")
     print("Correcting messages from " + input_directory + "...")
 
+    # Scan the input directory once instead of once per message
+    file_index = index_directory(input_directory)
+    matched_files = set()
+
     # ============ Loop through ROS bag ===========
 
-    for topic, msg, timestamp in tqdm(input_bag.read_messages()):
+    for topic, msg, timestamp in tqdm(input_bag.read_messages(topics=topics)):
+
+        correct_timestamp = get_header_timestamp(msg)
+
+        if correct_timestamp is None:
+            # Fall back to converting the whole message to JSON
+            from rospy_message_converter import json_message_converter
 
-        json_str = json_message_converter.convert_ros_message_to_json(msg)
-        json_dict = json.loads(json_str)
-        correct_timestamp = get_timestamp(json_dict)
+            json_str = json_message_converter.convert_ros_message_to_json(msg)
+            json_dict = json.loads(json_str)
+            correct_timestamp = get_timestamp(json_dict)
 
-        pattern = "{}/{}.*".format(input_directory, timestamp)
-        existing_files = glob(pattern)
+        existing_files = file_index.get(str(timestamp), [])
 
         assert (
             len(existing_files) <= 1
@@ -81,6 +158,7 @@ def correct_timestamps(input_directory, bag_path, output_directory):
         # If there is a file with a matching name
         if len(existing_files) == 1:
             filepath = existing_files[0]
+            matched_files.add(filepath)
 
             # See: https://stackoverflow.com/a/35188296/6942666
             # This will capture when you have multiple extensions like ".pcd.json"
@@ -93,18 +171,53 @@ def correct_timestamps(input_directory, bag_path, output_directory):
 
     input_bag.close()
 
+    unmatched_files = sorted(
+        filepath
+        for filepaths in file_index.values()
+        for filepath in filepaths
+        if filepath not in matched_files
+    )
 
-if __name__ == "__main__":
-    # Construct the argument parser and parse the arguments
-    ap = argparse.ArgumentParser()
-    ap.add_argument(
+    if unmatched_files:
+        print(
+            "{} files did not match a message in the bag:".format(len(unmatched_files))
+        )
+        for filepath in unmatched_files:
+            print("  " + filepath)
+
+    return unmatched_files
+
+
+def add_arguments(parser):
+    """Adds the command line arguments of the script to a parser
+
+    Args:
+        parser (argparse.ArgumentParser): the parser to add the arguments to
+    """
+    parser.add_argument(
         "-o", "--output", type=str, required=True, help="The output directory"
     )
-    ap.add_argument(
+    parser.add_argument(
         "-i", "--input", type=str, required=True, help="The input directory"
     )
-    ap.add_argument(
+    parser.add_argument(
         "-b", "--bag", type=str, required=True, help="Path to the original bag"
     )
+    parser.add_argument(
+        "-t",
+        "--topics",
+        type=str,
+        nargs="+",
+        default=None,
+        help="Only read messages on these topics",
+    )
+
+
+if __name__ == "__main__":
+    # Construct the argument parser and parse the arguments
+    ap = argparse.ArgumentParser()
+    add_arguments(ap)
     args = vars(ap.parse_args())
-    correct_timestamps(args["input"], args["bag"], args["output"])
+    correct_timestamps(
+        args["input"], args["bag"], args["output"], topics=args["topics"]
+    )
@@ -0,0 +1,437 @@
+"""
+Create synthetic data of a configurable size for testing and benchmarking.
+
+A scene has the samples/sweeps layout expected by Scene: every sensor folder
+has a calibrated_sensor.json, cameras have tiny PNG images, lidars and radars
+have small ASCII .pcd files, the primary sensor has annotation JSONs and the
+scene has an ego_pose.json. Objects move in straight lines so the same
+instance is annotated in every sample.
+
+$ python create_synthetic_scene.py -o synthetic-scene -n 10000
+$ python create_synthetic_scene.py -t yolo -o synthetic-yolo -n 1000
+"""
+
+import argparse
+import math
+import os
+import random
+import struct
+import zlib
+from pathlib import Path
+
+from universal_devkit.utils.utils import write_json
+
+# The sensors created by default
+DEFAULT_SENSORS = ["CAM_BACK", "CAM_FRONT", "LIDAR_TOP", "RADAR_FRONT"]
+
+# The first timestamp (microseconds) and the time between files of a sensor
+START_TIMESTAMP = 1532402927000000
+SENSOR_PERIOD = 50000
+
+# The time between ego poses (microseconds)
+EGO_POSE_PERIOD = 10000
+
+# The size of the synthetic images
+IMAGE_WIDTH = 8
+IMAGE_HEIGHT = 6
+
+# Object categories used for annotations
+CATEGORIES = ["boat", "buoy", "dock"]
+
+# The types of data that can be created from the command line
+DATA_TYPES = ["scene", "logs", "supervisely", "yolo"]
+
+
+def create_png(width=IMAGE_WIDTH, height=IMAGE_HEIGHT):
+    """Encodes a black RGB PNG without an image library
+
+    Returns:
+        bytes: the PNG file contents
+    """
+
+    def chunk(tag, data):
+        crc = zlib.crc32(tag + data) & 0xFFFFFFFF
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", crc)
+
+    # Every row starts with a filter type byte
+    rows = b"".join(b"\x00" + bytes(3 * width) for _ in range(height))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+def create_pcd(points):
+    """Creates an ASCII .pcd file
+
+    Args:
+        points (list(tuple)): the (x, y, z, intensity) of every point
+
+    Returns:
+        str: the .pcd file contents
+    """
+    header = [
+        "# .PCD v0.7 - Point Cloud Data file format",
+        "VERSION 0.7",
+        "FIELDS x y z intensity",
+        "SIZE 4 4 4 4",
+        "TYPE F F F F",
+        "COUNT 1 1 1 1",
+        "WIDTH {}".format(len(points)),
+        "HEIGHT 1",
+        "VIEWPOINT 0 0 0 1 0 0 0",
+        "POINTS {}".format(len(points)),
+        "DATA ascii",
+    ]
+    lines = ["{:.3f} {:.3f} {:.3f} {:.1f}".format(*point) for point in points]
+    return "\n".join(header + lines) + "\n"
+
+
+def get_modality(sensor_channel):
+    if "CAM" in sensor_channel:
+        return "camera"
+    elif "RADAR" in sensor_channel:
+        return "radar"
+    return "lidar"
+
+
+def get_yaw_quaternion(yaw):
+    """Gets a [w, x, y, z] quaternion for a rotation about the z axis"""
+    return [math.cos(yaw / 2), 0.0, 0.0, math.sin(yaw / 2)]
+
+
+def create_objects(num_objects, rng):
+    """Creates objects that move in straight lines
+
+    Returns:
+        list(dict): the instance token, category, start position,
+            velocity (per frame), size and yaw of every object
+    """
+    return [
+        {
+            "instance_token": "instance-{}".format(i),
+            "category_token": CATEGORIES[i % len(CATEGORIES)],
+            "position": [rng.uniform(-40, 40), rng.uniform(-40, 40), 0.5],
+            "velocity": [rng.uniform(-0.5, 0.5), rng.uniform(-0.5, 0.5), 0.0],
+            "size": [rng.uniform(1, 5), rng.uniform(1, 3), rng.uniform(0.5, 2)],
+            "yaw": rng.uniform(-math.pi, math.pi),
+        }
+        for i in range(num_objects)
+    ]
+
+
+def get_object_annotation(obj, frame, instance_token=True):
+    """Gets the annotation of an object in a frame. Without the instance
+    token, Scene has to track the object to find its instance.
+    """
+    annotation = {
+        "category_token": obj["category_token"],
+        "translation": [
+            p + v * frame for p, v in zip(obj["position"], obj["velocity"])
+        ],
+        "size": obj["size"],
+        "rotation": get_yaw_quaternion(obj["yaw"]),
+    }
+
+    if instance_token:
+        annotation["instance_token"] = obj["instance_token"]
+
+    return annotation
+
+
+def create_points(annotations, num_points, rng):
+    """Creates points scattered around the scene with a few inside every
+    annotated object
+    """
+    points = []
+
+    for annotation in annotations:
+        x, y, z = annotation["translation"]
+        points.append((x, y, z, 1.0))
+
+    while len(points) < num_points:
+        points.append(
+            (rng.uniform(-50, 50), rng.uniform(-50, 50), rng.uniform(-2, 5), 0.0)
+        )
+
+    return points
+
+
+def create_synthetic_scene(
+    output_directory,
+    num_files=1000,
+    sensors=DEFAULT_SENSORS,
+    primary_sensor="LIDAR_TOP",
+    num_objects=5,
+    num_points=32,
+    seed=0,
+    instance_tokens=False,
+):
+    """Creates a synthetic scene
+
+    Args:
+        output_directory (str): the directory to create the scene in
+        num_files (int, optional): the total number of sample and sweep data
+            files. Defaults to 1000.
+        sensors (list(str), optional): the sensor channels.
+            Defaults to DEFAULT_SENSORS.
+        primary_sensor (str, optional): the sensor that is annotated.
+            Defaults to "LIDAR_TOP".
+        num_objects (int, optional): the number of annotated objects.
+            Defaults to 5.
+        num_points (int, optional): the number of points in every .pcd file.
+            Defaults to 32.
+        seed (int, optional): the random seed. Defaults to 0.
+        instance_tokens (bool, optional): whether the annotations have
+            instance tokens. Defaults to False (Scene tracks the objects).
+
+    Returns:
+        str: the path to the scene
+    """
+    assert primary_sensor in sensors, "The primary sensor must be in sensors"
+
+    rng = random.Random(seed)
+    objects = create_objects(num_objects, rng)
+    png = create_png()
+
+    # Half the files of every sensor are samples and half are sweeps
+    files_per_sensor = max(2, num_files // len(sensors))
+    end_timestamp = START_TIMESTAMP
+
+    for sensor_index, sensor in enumerate(sorted(sensors)):
+        modality = get_modality(sensor)
+        sample_dir = os.path.join(output_directory, "samples", sensor)
+        sweep_dir = os.path.join(output_directory, "sweeps", sensor)
+        Path(sweep_dir).mkdir(parents=True, exist_ok=True)
+
+        annotation_dir = os.path.join(sample_dir, "annotations")
+        if sensor == primary_sensor:
+            Path(annotation_dir).mkdir(parents=True, exist_ok=True)
+        else:
+            Path(sample_dir).mkdir(parents=True, exist_ok=True)
+
+        write_json(
+            {
+                "translation": [0.1 * sensor_index, 0.0, 1.5],
+                "rotation": get_yaw_quaternion(sensor_index * math.pi / 4),
+                "camera_intrinsic": [],
+            },
+            os.path.join(sample_dir, "calibrated_sensor.json"),
+        )
+
+        for frame in range(files_per_sensor):
+            # Offset the sensors so their timestamps don't line up exactly
+            timestamp = START_TIMESTAMP + frame * SENSOR_PERIOD + sensor_index * 1000
+            end_timestamp = max(end_timestamp, timestamp)
+            is_sample = frame % 2 == 0
+            directory = sample_dir if is_sample else sweep_dir
+
+            annotations = [
+                get_object_annotation(obj, frame, instance_tokens) for obj in objects
+            ]
+
+            if modality == "camera":
+                file_name = "{}.png".format(timestamp)
+                with open(os.path.join(directory, file_name), "wb") as f:
+                    f.write(png)
+            else:
+                file_name = "{}.pcd".format(timestamp)
+                with open(os.path.join(directory, file_name), "w") as f:
+                    f.write(create_pcd(create_points(annotations, num_points, rng)))
+
+            if is_sample and sensor == primary_sensor:
+                write_json(
+                    annotations,
+                    os.path.join(annotation_dir, "{}.json".format(file_name)),
+                )
+
+    write_json(
+        [
+            {
+                "timestamp": timestamp,
+                "rotation": [1.0, 0.0, 0.0, 0.0],
+                "translation": [(timestamp - START_TIMESTAMP) * 1e-6, 0.0, 0.0],
+            }
+            for timestamp in range(
+                START_TIMESTAMP - EGO_POSE_PERIOD,
+                end_timestamp + 2 * EGO_POSE_PERIOD,
+                EGO_POSE_PERIOD,
+            )
+        ],
+        os.path.join(output_directory, "ego_pose.json"),
+    )
+
+    return output_directory
+
+
+def create_synthetic_logs(output_directory, num_files=1000):
+    """Creates a logs directory for get_logs
+
+    Args:
+        output_directory (str): the directory to create the logs in
+        num_files (int, optional): the number of log files. Defaults to 1000.
+
+    Returns:
+        str: the path to the logs directory
+    """
+    Path(output_directory).mkdir(parents=True, exist_ok=True)
+    rows = ["logfile, date_captured, vehicle, location, notes"]
+
+    for i in range(num_files):
+        file_name = "log{}.txt".format(i)
+        with open(os.path.join(output_directory, file_name), "w") as f:
+            f.write("log {}\n".format(i))
+        rows.append('{}, "2021-07-01", "boat", "pond", "Log {}"'.format(file_name, i))
+
+    with open(os.path.join(output_directory, "info.csv"), "w") as f:
+        f.write("\n".join(rows) + "\n")
+
+    return output_directory
+
+
+def create_synthetic_supervisely(output_directory, num_files=1000, num_objects=5):
+    """Creates supervisely.io 3D annotation files for
+    convert_supervisely_3d_to_universal
+
+    Args:
+        output_directory (str): the directory to create the files in
+        num_files (int, optional): the number of .pcd.json files.
+            Defaults to 1000.
+        num_objects (int, optional): the number of objects in every file.
+            Defaults to 5.
+
+    Returns:
+        str: the path to the directory
+    """
+    Path(output_directory).mkdir(parents=True, exist_ok=True)
+    objects = create_objects(num_objects, random.Random(0))
+
+    for frame in range(num_files):
+        figures = []
+        for i, obj in enumerate(objects):
+            annotation = get_object_annotation(obj, frame)
+            figures.append(
+                {
+                    "key": "figure-{}-{}".format(frame, i),
+                    "objectKey": obj["instance_token"],
+                    "geometryType": "cuboid_3d",
+                    "labelerLogin": "synthetic",
+                    "createdAt": "2021-07-01T00:00:00.000Z",
+                    "geometry": {
+                        "position": dict(zip("xyz", annotation["translation"])),
+                        "rotation": {"x": 0.0, "y": 0.0, "z": obj["yaw"]},
+                        "dimensions": dict(zip("xyz", annotation["size"])),
+                    },
+                }
+            )
+
+        timestamp = START_TIMESTAMP + frame * SENSOR_PERIOD
+        write_json(
+            {
+                "description": "",
+                "key": "pointcloud-{}".format(frame),
+                "tags": [],
+                "objects": [
+                    {"key": obj["instance_token"], "classTitle": obj["category_token"]}
+                    for obj in objects
+                ],
+                "figures": figures,
+            },
+            os.path.join(output_directory, "{}.pcd.json".format(timestamp)),
+        )
+
+    return output_directory
+
+
+def create_synthetic_yolo(output_directory, num_files=1000, num_boxes=10, seed=0):
+    """Creates a YOLO dataset for convert_images_from_yolo_to_xyxy
+
+    Args:
+        output_directory (str): the directory to create the dataset in
+        num_files (int, optional): the number of images. Defaults to 1000.
+        num_boxes (int, optional): the number of boxes per image.
+            Defaults to 10.
+        seed (int, optional): the random seed. Defaults to 0.
+
+    Returns:
+        str: the path to the dataset. The images use the ".png" extension.
+    """
+    rng = random.Random(seed)
+    image_dir = os.path.join(output_directory, "images")
+    label_dir = os.path.join(output_directory, "labels")
+    Path(image_dir).mkdir(parents=True, exist_ok=True)
+    Path(label_dir).mkdir(parents=True, exist_ok=True)
+    png = create_png()
+
+    for i in range(num_files):
+        with open(os.path.join(image_dir, "{}.png".format(i)), "wb") as f:
+            f.write(png)
+
+        with open(os.path.join(label_dir, "{}.txt".format(i)), "w") as f:
+            for _ in range(num_boxes):
+                f.write(
+                    "{} {:.6f} {:.6f} {:.6f} {:.6f}\n".format(
+                        rng.randrange(len(CATEGORIES)),
+                        rng.uniform(0.2, 0.8),
+                        rng.uniform(0.2, 0.8),
+                        rng.uniform(0.05, 0.3),
+                        rng.uniform(0.05, 0.3),
+                    )
+                )
+
+    return output_directory
+
+
+def create_synthetic_sample_annotations(num_annotations=1000, num_objects=50):
+    """Creates sample annotation records like the ones Scene creates
+
+    Args:
+        num_annotations (int, optional): the number of annotations.
+            Defaults to 1000.
+        num_objects (int, optional): the number of instances the annotations
+            belong to. Defaults to 50.
+
+    Returns:
+        list(dict): the sample annotations
+    """
+    objects = create_objects(num_objects, random.Random(0))
+    annotations = []
+
+    for i in range(num_annotations):
+        frame, object_index = divmod(i, num_objects)
+        annotation = get_object_annotation(objects[object_index], frame)
+        annotation["token"] = "annotation-{}".format(i)
+        annotation["timestamp"] = START_TIMESTAMP + frame * SENSOR_PERIOD
+        annotations.append(annotation)
+
+    return annotations
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument(
+        "-o", "--output", type=str, required=True, help="The output directory"
+    )
+    ap.add_argument(
+        "-n", "--num_files", type=int, default=1000, help="The number of files"
+    )
+    ap.add_argument(
+        "-t",
+        "--type",
+        type=str,
+        choices=DATA_TYPES,
+        default="scene",
+        help="The type of data to create",
+    )
+    args = vars(ap.parse_args())
+
+    create = {
+        "scene": create_synthetic_scene,
+        "logs": create_synthetic_logs,
+        "supervisely": create_synthetic_supervisely,
+        "yolo": create_synthetic_yolo,
+    }[args["type"]]
+    create(args["output"], num_files=args["num_files"])
@@ -14,6 +14,12 @@ Source for ros to json converter
 https://github.com/uos/rospy_message_converter
 
 $ python ros_imu_pose.py -i raise-the-flag_imu.bag -t /imu/data/raw -o output_folder
+
+The poses can also be written as columns (timestamps, rotations and
+translations) to a NumPy .npz file or a Parquet file (requires pyarrow).
+Use --chunk_size to write a new file every N messages for long bags.
+
+$ python ros_imu_pose.py -i raise-the-flag_imu.bag -f npz -c 100000 -o output_folder
 """
 
 import argparse
@@ -21,10 +27,15 @@ import json
 import os
 from pathlib import Path
 
-import rosbag
-from rospy_message_converter import json_message_converter
+import numpy as np
 from tqdm import tqdm
 
+# The supported output formats
+OUTPUT_FORMATS = ["json", "npz", "parquet"]
+
+# The number of poses the columnar buffer starts with
+INITIAL_BUFFER_CAPACITY = 1024
+
 
 # Note that this is deliberately not imported from universal_devkit.utils.utils.py
 # to avoid needing to install the entire package inside a ROS enviroment
@@ -51,11 +62,177 @@ def get_timestamp(imu_dict):
     return total_time
 
 
-def ros_imu_pose(input_bag_path, topic_specified, output_directory):
+def get_header_timestamp(msg):
+    """Gets the same timestamp as get_timestamp directly from a deserialized
+    message without converting it to JSON
+
+    Args:
+        msg (object): a deserialized ROS message with a header
+
+    Returns:
+        int: the header timestamp in nanoseconds
+    """
+    stamp = msg.header.stamp
+    return int(stamp.secs) * 1000000000 + int(stamp.nsecs)
+
+
+class ImuPoseBuffer:
+    def __init__(self, capacity=INITIAL_BUFFER_CAPACITY):
+        """Stores IMU poses in preallocated arrays that double in size
+        when they are full.
+
+        Rotations are quaternions in [w, x, y, z] order (the same order as
+        the "rotation" key of ego_pose.json).
+
+        Args:
+            capacity (int, optional): the number of poses to allocate space
+                for. Defaults to INITIAL_BUFFER_CAPACITY.
+        """
+        self.timestamps = np.empty(capacity, dtype=np.int64)
+        self.rotations = np.empty((capacity, 4), dtype=np.float64)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, timestamp, rotation):
+        """Adds a pose
+
+        Args:
+            timestamp (int): the header timestamp
+            rotation (list): the orientation as [w, x, y, z]
+        """
+        if self.size == len(self.timestamps):
+            self._grow()
+
+        self.timestamps[self.size] = timestamp
+        self.rotations[self.size] = rotation
+        self.size += 1
+
+    def _grow(self):
+        capacity = max(1, 2 * len(self.timestamps))
+
+        timestamps = np.empty(capacity, dtype=np.int64)
+        timestamps[: self.size] = self.timestamps[: self.size]
+        rotations = np.empty((capacity, 4), dtype=np.float64)
+        rotations[: self.size] = self.rotations[: self.size]
+
+        self.timestamps = timestamps
+        self.rotations = rotations
+
+    def clear(self):
+        """Removes every pose but keeps the allocated space"""
+        self.size = 0
+
+    def get_arrays(self):
+        """Gets the poses as arrays
+
+        Returns:
+            dict: a dictionary with "timestamps" (N,), "rotations" (N, 4) and
+                "translations" (N, 3) arrays. The translations are 0 because
+                the IMU doesn't have position.
+        """
+        return {
+            "timestamps": self.timestamps[: self.size],
+            "rotations": self.rotations[: self.size],
+            "translations": np.zeros((self.size, 3), dtype=np.float64),
+        }
+
+
+def write_imu_pose_arrays(arrays, file_path, output_format="npz"):
+    """Writes IMU pose arrays to a file. An .npz file can be loaded with
+    universal_devkit.prepare_data.ego_pose.EgoPoseTable.load
+
+    Args:
+        arrays (dict): the arrays from ImuPoseBuffer.get_arrays
+        file_path (str): the path to write to
+        output_format (str, optional): "npz" or "parquet". Defaults to "npz".
+    """
+    if output_format == "npz":
+        np.savez(file_path, **arrays)
+        return
+
+    # Only import pyarrow if Parquet output is requested
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = {"timestamps": pa.array(arrays["timestamps"])}
+    for name in ["rotations", "translations"]:
+        array = np.ascontiguousarray(arrays[name])
+        columns[name] = pa.FixedSizeListArray.from_arrays(
+            pa.array(array.ravel()), array.shape[1]
+        )
+
+    pq.write_table(pa.table(columns), file_path)
+
+
+def ros_imu_pose(
+    input_bag_path,
+    topic_specified,
+    output_directory,
+    output_format="json",
+    chunk_size=None,
+    open_bag=None,
+):
+    """Extracts the IMU poses from a bag
+
+    Args:
+        input_bag_path (str): the path to the bag
+        topic_specified (str): the IMU topic
+        output_directory (str): the directory to write the output to
+        output_format (str, optional): "json" writes a list of poses to
+            imu.json. "npz" and "parquet" write timestamps, rotations and
+            translations columns to imu.npz or imu.parquet. Defaults to "json".
+        chunk_size (int, optional): for "npz" and "parquet", write a new
+            file (imu_00000.npz, imu_00001.npz, ...) every chunk_size messages
+            so memory stays bounded. Defaults to None (a single file).
+        open_bag (callable, optional): a function that opens the bag at a
+            path. The bag needs read_messages(topics=...) and close()
+            methods. Defaults to rosbag.Bag or BagReader if
+            ROS isn't installed.
+
+    Returns:
+        list(str): the paths of the files that were written
+    """
+    assert output_format in OUTPUT_FORMATS, "output_format must be one of: {}".format(
+        ", ".join(OUTPUT_FORMATS)
+    )
+    assert (
+        chunk_size is None or output_format != "json"
+    ), "chunk_size is only supported for the npz and parquet formats"
+
+    if open_bag is None:
+        try:
+            # Only import ROS when a bag is read so the helpers can be used
+            # without it
+            import rosbag
+
+            open_bag = rosbag.Bag
+        except ImportError:
+            # Read the bag without ROS
+            from universal_devkit.utils.bag_reader import BagReader
+
+            open_bag = BagReader
+
     Path.mkdir(Path(output_directory), parents=True, exist_ok=True)
 
     # Read point cloud data from bag.
-    input_bag = rosbag.Bag(input_bag_path)
+    input_bag = open_bag(input_bag_path)
+
+    if output_format != "json":
+        return ros_imu_pose_columns(
+            input_bag,
+            topic_specified,
+            output_directory,
+            output_format=output_format,
+            chunk_size=chunk_size,
+        )
+
+    try:
+        from rospy_message_converter import json_message_converter
+    except ImportError:
+        # Read the fields directly from the message instead
+        json_message_converter = None
 
     print("Reading data from " + input_bag_path + "...")
 
@@ -85,18 +262,30 @@ def ros_imu_pose(input_bag_path, topic_specified, output_directory):
     data = []
 
     for topic, msg, timestamp in tqdm(input_bag.read_messages(topics=topic_specified)):
-        try:
-            json_str = json_message_converter.convert_ros_message_to_json(msg)
-        except Exception:
-            print("Failed to convert message: ", msg)
+        if json_message_converter is None:
+            orientation = msg.orientation
+            header_timestamp = get_header_timestamp(msg)
+            rotation = {
+                "x": orientation.x,
+                "y": orientation.y,
+                "z": orientation.z,
+                "w": orientation.w,
+            }
+        else:
+            try:
+                json_str = json_message_converter.convert_ros_message_to_json(msg)
+            except Exception:
+                print("Failed to convert message: ", msg)
+
+            # Load from the JSON string
+            json_dict = json.loads(json_str)
+            header_timestamp = get_timestamp(json_dict)
+            rotation = json_dict["orientation"]
 
-        # Load from the JSON string
-        json_dict = json.loads(json_str)
-        header_timestamp = get_timestamp(json_dict)
         data.append(
             {
                 "timestamp": header_timestamp,
-                "rotation": json_dict["orientation"],
+                "rotation": rotation,
                 # set these to 0 because the IMU doesn't have position
                 "translation": [0.0, 0.0, 0.0],
             }
@@ -112,18 +301,94 @@ def ros_imu_pose(input_bag_path, topic_specified, output_directory):
         print("Saving output JSON to: ", file_path)
         json.dump(data, outfile)
 
+    return [file_path]
 
-if __name__ == "__main__":
-    # Construct the argument parser and parse the arguments
-    ap = argparse.ArgumentParser()
-    ap.add_argument(
+
+def ros_imu_pose_columns(
+    input_bag, topic_specified, output_directory, output_format="npz", chunk_size=None
+):
+    """Streams the IMU poses from an open bag into arrays. See ros_imu_pose.
+
+    Returns:
+        list(str): the paths of the files that were written
+    """
+    print("Reading data from bag...")
+
+    buffer = ImuPoseBuffer(capacity=chunk_size or INITIAL_BUFFER_CAPACITY)
+    file_paths = []
+
+    def write_buffer():
+        if chunk_size is None:
+            file_name = "imu.{}".format(output_format)
+        else:
+            file_name = "imu_{:05d}.{}".format(len(file_paths), output_format)
+
+        file_path = os.path.join(output_directory, file_name)
+        write_imu_pose_arrays(buffer.get_arrays(), file_path, output_format)
+        file_paths.append(file_path)
+        buffer.clear()
+
+    for topic, msg, timestamp in tqdm(input_bag.read_messages(topics=topic_specified)):
+        orientation = msg.orientation
+        buffer.append(
+            get_header_timestamp(msg),
+            [orientation.w, orientation.x, orientation.y, orientation.z],
+        )
+
+        if chunk_size is not None and len(buffer) >= chunk_size:
+            write_buffer()
+
+    input_bag.close()
+
+    # Write the remaining poses. A single file is always written, even if empty
+    if len(buffer) > 0 or not file_paths:
+        write_buffer()
+
+    print("Saved output to: ", ", ".join(file_paths))
+    return file_paths
+
+
+def add_arguments(parser):
+    """Adds the command line arguments of the script to a parser
+
+    Args:
+        parser (argparse.ArgumentParser): the parser to add the arguments to
+    """
+    parser.add_argument(
         "-o", "--output", type=str, default="output", help="The output directory"
     )
-    ap.add_argument(
+    parser.add_argument(
         "-i", "--input_bag", type=str, required=True, help="The path to the input bag"
     )
-    ap.add_argument(
+    parser.add_argument(
         "-t", "--topic", type=str, default="/imu/data/raw", help="Topic for the ROS bag"
     )
+    parser.add_argument(
+        "-f",
+        "--format",
+        type=str,
+        choices=OUTPUT_FORMATS,
+        default="json",
+        help="Write a JSON list of poses or columns to an .npz or Parquet file",
+    )
+    parser.add_argument(
+        "-c",
+        "--chunk_size",
+        type=int,
+        default=None,
+        help="Write a new .npz or Parquet file every N messages",
+    )
+
+
+if __name__ == "__main__":
+    # Construct the argument parser and parse the arguments
+    ap = argparse.ArgumentParser()
+    add_arguments(ap)
     args = vars(ap.parse_args())
-    ros_imu_pose(args["input_bag"], args["topic"], args["output"])
+    ros_imu_pose(
+        args["input_bag"],
+        args["topic"],
+        args["output"],
+        output_format=args["format"],
+        chunk_size=args["chunk_size"],
+    )
@@ -8,16 +8,50 @@ $ python supervisely_3d_to_universal.py -i input_directory -o output_directory
 
 import argparse
 import os
+from collections import Counter
 from glob import glob
 from pathlib import Path
 
-from universal_devkit.utils.utils import create_token, read_json, write_json
+from universal_devkit.utils.utils import (
+    TokenGenerator,
+    create_token,
+    read_json,
+    write_json,
+)
+
+
+def convert_supervisely_3d_to_universal(
+    input_directory, output_directory, token_generator=None, pointcloud_directory=None
+):
+    """Converts a directory of supervisely.io 3D annotations to the
+    universal format. num_lidar is the number of points inside each box if
+    the annotated .pcd file is found.
+
+    Figures of the same supervisely object share an instance token and are
+    linked through prev and next in file name order.
+
+    Args:
+        input_directory (str): the directory with the *.pcd.json files
+        output_directory (str): the directory to save the converted files to
+        token_generator (TokenGenerator, optional): the generator to create
+            the tokens with. Defaults to None (random UUIDs).
+        pointcloud_directory (str, optional): the directory with the
+            annotated .pcd files. Defaults to None (the input directory).
+    """
+    if pointcloud_directory is None:
+        pointcloud_directory = input_directory
 
-
-def convert_supervisely_3d_to_universal(input_directory, output_directory):
     Path(output_directory).mkdir(parents=True, exist_ok=True)
 
-    for filepath in glob("{}/*.pcd.json".format(input_directory)):
+    # Supervisely object key -> instance token
+    instance_tokens = {}
+
+    # File name -> the token, instance token, prev and next of each figure.
+    # The files are written as they're converted and only these are kept to
+    # link the figures afterwards
+    links = {}
+
+    for filepath in sorted(glob("{}/*.pcd.json".format(input_directory))):
         # Get the filename with extensions (ex. 1212129.pcd.json)
         filename = Path(filepath).name
 
@@ -27,9 +61,15 @@ def convert_supervisely_3d_to_universal(input_directory, output_directory):
         for figure in input_data["figures"]:
             ann = {}
 
-            ann["token"] = create_token()
+            ann["token"] = create_token(
+                token_generator, ("sample_annotation", figure["key"])
+            )
             ann["sample_token"] = ""
-            ann["instance_token"] = create_token()
+            if figure["objectKey"] not in instance_tokens:
+                instance_tokens[figure["objectKey"]] = create_token(
+                    token_generator, ("instance", figure["objectKey"])
+                )
+            ann["instance_token"] = instance_tokens[figure["objectKey"]]
             ann["visibility_token"] = ""
             ann["attribute_tokens"] = []
 
@@ -60,15 +100,87 @@ def convert_supervisely_3d_to_universal(input_directory, output_directory):
             ann["annotation_created"] = figure["createdAt"]
             output_data.append(ann)
 
+        # The annotated point cloud (ex. 1212129.pcd)
+        pcd_path = os.path.join(pointcloud_directory, Path(filename).stem)
+        if output_data and os.path.exists(pcd_path):
+            # Imported here so converting without point clouds doesn't load numpy
+            from universal_devkit.prepare_data.sample_annotation import (
+                count_annotation_points,
+            )
+
+            for ann, num_points in zip(
+                output_data, count_annotation_points(output_data, pcd_path)
+            ):
+                ann["num_lidar"] = int(num_points)
+
         write_json(output_data, os.path.join(output_directory, filename))
+        links[filename] = [
+            {key: ann[key] for key in ["token", "instance_token", "prev", "next"]}
+            for ann in output_data
+        ]
+
+    # Only objects with more than one figure need to be linked
+    num_figures = Counter(
+        record["instance_token"] for records in links.values() for record in records
+    )
+    if all(count == 1 for count in num_figures.values()):
+        return
+
+    # Imported here so converting without point clouds doesn't load numpy
+    from universal_devkit.prepare_data.tracking import link_instances
+
+    link_instances(list(links.values()))
+
+    # Rewrite the files that have linked figures
+    for filename, records in links.items():
+        if not any(record["prev"] or record["next"] for record in records):
+            continue
+
+        output_path = os.path.join(output_directory, filename)
+        output_data = read_json(output_path)
+        for ann, record in zip(output_data, records):
+            ann["prev"] = record["prev"]
+            ann["next"] = record["next"]
+        write_json(output_data, output_path)
+
+
+def add_arguments(parser):
+    """Adds the command line arguments of the script to a parser
+
+    Args:
+        parser (argparse.ArgumentParser): the parser to add the arguments to
+    """
+    parser.add_argument(
+        "-o", "--output", type=str, default="output", help="The output directory"
+    )
+    parser.add_argument(
+        "-i", "--input", type=str, required=True, help="The input directory"
+    )
+    parser.add_argument(
+        "-p",
+        "--pointclouds",
+        type=str,
+        default=None,
+        help="The directory with the .pcd files. Defaults to the input directory",
+    )
+    parser.add_argument(
+        "-n",
+        "--namespace",
+        type=str,
+        default=None,
+        help="Create deterministic tokens using this namespace",
+    )
 
 
 if __name__ == "__main__":
     # Construct the argument parser and parse the arguments
     ap = argparse.ArgumentParser()
-    ap.add_argument(
-        "-o", "--output", type=str, default="output", help="The output directory"
-    )
-    ap.add_argument("-i", "--input", type=str, help="The input directory")
+    add_arguments(ap)
     args = vars(ap.parse_args())
-    convert_supervisely_3d_to_universal(args["input"], args["output"])
+    token_generator = TokenGenerator(args["namespace"])
+    convert_supervisely_3d_to_universal(
+        args["input"],
+        args["output"],
+        token_generator=token_generator,
+        pointcloud_directory=args["pointclouds"],
+    )
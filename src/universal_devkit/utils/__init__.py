@@ -1,4 +1,20 @@
-from .utils import create_token, read_json
+from .utils import (
+    JsonTableWriter,
+    TokenGenerator,
+    associate_timestamps,
+    create_token,
+    get_closest_matches,
+    read_json,
+    write_json_table,
+)
 
 # make pep8 happy. src: https://stackoverflow.com/a/31079085/6942666
-__all__ = ["create_token", "read_json"]
+__all__ = [
+    "JsonTableWriter",
+    "TokenGenerator",
+    "associate_timestamps",
+    "create_token",
+    "get_closest_matches",
+    "read_json",
+    "write_json_table",
+]
@@ -0,0 +1,527 @@
+"""Reads ROS1 bag files (format version 2.0) without a ROS installation.
+
+Only the connection and chunk index records are read when a bag is opened.
+Messages are then read chunk by chunk for the selected topics using the index
+records stored after every chunk. Chunks can be uncompressed, bz2 or lz4
+(requires the lz4 package) compressed.
+
+Common message types (ex. sensor_msgs/Imu and std_msgs/Header) are
+deserialized into objects with the same fields as the ROS Python messages.
+Other types are returned as a RawMessage with the serialized bytes. If the
+message starts with a std_msgs/Header, the header is deserialized too.
+
+Example::
+
+    >>> with BagReader("imu.bag") as bag:
+    ...     for topic, msg, timestamp in bag.read_messages(topics=["/imu"]):
+    ...         print(msg.header.stamp, msg.orientation)
+"""
+import bz2
+import struct
+from collections import namedtuple
+from functools import lru_cache, total_ordering
+
+# Every bag starts with this line
+BAG_MAGIC = b"#ROSBAG V2.0\n"
+
+# Record op codes
+OP_MESSAGE_DATA = 0x02
+OP_BAG_HEADER = 0x03
+OP_INDEX_DATA = 0x04
+OP_CHUNK = 0x05
+OP_CHUNK_INFO = 0x06
+OP_CONNECTION = 0x07
+
+Connection = namedtuple(
+    "Connection", ["id", "topic", "type", "md5sum", "message_definition"]
+)
+
+# connection_counts maps connection id -> number of messages in the chunk
+ChunkInfo = namedtuple(
+    "ChunkInfo", ["position", "start_time", "end_time", "connection_counts"]
+)
+
+
+@lru_cache(maxsize=None)
+def _get_struct(fmt):
+    return struct.Struct(fmt)
+
+
+class _Buffer:
+    """Reads little-endian values from bytes in order"""
+
+    def __init__(self, data, offset=0):
+        self.data = data
+        self.offset = offset
+
+    def unpack(self, fmt):
+        unpacker = _get_struct(fmt)
+        values = unpacker.unpack_from(self.data, self.offset)
+        self.offset += unpacker.size
+        return values
+
+    def read_bytes(self, length):
+        value = bytes(self.data[self.offset : self.offset + length])
+        self.offset += length
+        return value
+
+    def read_string(self):
+        (length,) = self.unpack("<I")
+        return self.read_bytes(length).decode("utf-8")
+
+
+class RosMessage:
+    """Base class for deserialized messages. Like the ROS Python messages,
+    the fields are stored in __slots__.
+    """
+
+    __slots__ = ()
+    _type = None
+
+    def __init__(self, *args, **kwargs):
+        for name, value in zip(self.__slots__, args):
+            setattr(self, name, value)
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self):
+        return "{}({})".format(
+            type(self).__name__,
+            ", ".join(
+                "{}={!r}".format(name, getattr(self, name, None))
+                for name in self.__slots__
+            ),
+        )
+
+
+@total_ordering
+class Time(RosMessage):
+    """A ROS time. str() gives the time in nanoseconds like rospy.Time"""
+
+    __slots__ = ["secs", "nsecs"]
+
+    def to_nsec(self):
+        return self.secs * 1000000000 + self.nsecs
+
+    def to_sec(self):
+        return self.secs + self.nsecs * 1e-9
+
+    def __eq__(self, other):
+        return isinstance(other, Time) and self.to_nsec() == other.to_nsec()
+
+    def __lt__(self, other):
+        return self.to_nsec() < other.to_nsec()
+
+    def __hash__(self):
+        return hash(self.to_nsec())
+
+    def __str__(self):
+        return str(self.to_nsec())
+
+
+def _create_message_class(msg_type, fields):
+    return type(
+        msg_type.split("/")[-1], (RosMessage,), {"__slots__": fields, "_type": msg_type}
+    )
+
+
+Header = _create_message_class("std_msgs/Header", ["seq", "stamp", "frame_id"])
+Vector3 = _create_message_class("geometry_msgs/Vector3", ["x", "y", "z"])
+Quaternion = _create_message_class("geometry_msgs/Quaternion", ["x", "y", "z", "w"])
+Vector3Stamped = _create_message_class(
+    "geometry_msgs/Vector3Stamped", ["header", "vector"]
+)
+QuaternionStamped = _create_message_class(
+    "geometry_msgs/QuaternionStamped", ["header", "quaternion"]
+)
+Imu = _create_message_class(
+    "sensor_msgs/Imu",
+    [
+        "header",
+        "orientation",
+        "orientation_covariance",
+        "angular_velocity",
+        "angular_velocity_covariance",
+        "linear_acceleration",
+        "linear_acceleration_covariance",
+    ],
+)
+
+
+class RawMessage(RosMessage):
+    """A message of a type that isn't deserialized. header is the
+    deserialized std_msgs/Header if the message starts with one, otherwise
+    None. data is the serialized message.
+    """
+
+    __slots__ = ["type", "header", "data"]
+
+
+def _deserialize_time(buffer):
+    return Time(*buffer.unpack("<2I"))
+
+
+def _deserialize_header(buffer):
+    (seq,) = buffer.unpack("<I")
+    return Header(seq, _deserialize_time(buffer), buffer.read_string())
+
+
+def _deserialize_vector3(buffer):
+    return Vector3(*buffer.unpack("<3d"))
+
+
+def _deserialize_quaternion(buffer):
+    return Quaternion(*buffer.unpack("<4d"))
+
+
+def _deserialize_vector3_stamped(buffer):
+    return Vector3Stamped(_deserialize_header(buffer), _deserialize_vector3(buffer))
+
+
+def _deserialize_quaternion_stamped(buffer):
+    return QuaternionStamped(
+        _deserialize_header(buffer), _deserialize_quaternion(buffer)
+    )
+
+
+def _deserialize_imu(buffer):
+    return Imu(
+        header=_deserialize_header(buffer),
+        orientation=_deserialize_quaternion(buffer),
+        orientation_covariance=buffer.unpack("<9d"),
+        angular_velocity=_deserialize_vector3(buffer),
+        angular_velocity_covariance=buffer.unpack("<9d"),
+        linear_acceleration=_deserialize_vector3(buffer),
+        linear_acceleration_covariance=buffer.unpack("<9d"),
+    )
+
+
+# Message type -> function that deserializes a _Buffer
+MESSAGE_DESERIALIZERS = {
+    "std_msgs/Header": _deserialize_header,
+    "geometry_msgs/Vector3": _deserialize_vector3,
+    "geometry_msgs/Quaternion": _deserialize_quaternion,
+    "geometry_msgs/Vector3Stamped": _deserialize_vector3_stamped,
+    "geometry_msgs/QuaternionStamped": _deserialize_quaternion_stamped,
+    "sensor_msgs/Imu": _deserialize_imu,
+}
+
+
+def deserialize_message(data, msg_type, starts_with_header=False):
+    """Deserializes a message
+
+    Args:
+        data (bytes): the serialized message
+        msg_type (str): the message type (ex. "sensor_msgs/Imu")
+        starts_with_header (bool, optional): whether the first field of an
+            unsupported message type is a std_msgs/Header. Defaults to False.
+
+    Returns:
+        object: the message or a RawMessage if the type isn't supported
+    """
+    deserializer = MESSAGE_DESERIALIZERS.get(msg_type)
+
+    if deserializer is not None:
+        return deserializer(_Buffer(data))
+
+    header = _deserialize_header(_Buffer(data)) if starts_with_header else None
+    return RawMessage(msg_type, header, bytes(data))
+
+
+def _starts_with_header(message_definition):
+    """Checks whether the first field in a message definition is a Header"""
+    for line in message_definition.splitlines():
+        line = line.split("#", 1)[0].strip()
+
+        if line:
+            return line.split()[0] in ("Header", "std_msgs/Header")
+
+    return False
+
+
+def _parse_header_fields(data):
+    """Parses the name=value fields of a record header or connection header
+
+    Returns:
+        dict: a dictionary mapping field name -> bytes value
+    """
+    buffer = _Buffer(data)
+    fields = {}
+
+    while buffer.offset < len(data):
+        field = buffer.read_bytes(buffer.unpack("<I")[0])
+        name, value = field.split(b"=", 1)
+        fields[name.decode("utf-8")] = value
+
+    return fields
+
+
+def _parse_record(data, offset):
+    """Parses a record from a buffer
+
+    Returns:
+        tuple(dict, memoryview, int): the record header fields, the record
+            data and the offset of the next record
+    """
+    buffer = _Buffer(data, offset)
+    (header_length,) = buffer.unpack("<I")
+    header = _parse_header_fields(buffer.read_bytes(header_length))
+    (data_length,) = buffer.unpack("<I")
+    start = buffer.offset
+
+    return header, data[start : start + data_length], start + data_length
+
+
+def _unpack_time(value):
+    return Time(*struct.unpack("<2I", value))
+
+
+def _decompress(data, compression):
+    if compression == "none":
+        return data
+    if compression == "bz2":
+        return bz2.decompress(data)
+    if compression == "lz4":
+        # Only import lz4 if a bag actually uses it
+        import lz4.frame
+
+        return lz4.frame.decompress(data)
+
+    raise ValueError("Unsupported chunk compression: {}".format(compression))
+
+
+class BagReader:
+    def __init__(self, bag_path):
+        """Opens a ROS1 bag and reads its index
+
+        Args:
+            bag_path (str): the path to the bag
+        """
+        self.bag_path = bag_path
+        self._file = open(bag_path, "rb")
+
+        try:
+            self._read_index()
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Closes the bag file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read_record(self, position=None):
+        """Reads a record from the file
+
+        Returns:
+            tuple(dict, bytes): the record header fields and the record data
+        """
+        if position is not None:
+            self._file.seek(position)
+
+        length_bytes = self._file.read(4)
+        if len(length_bytes) < 4:
+            return None, None
+
+        (header_length,) = struct.unpack("<I", length_bytes)
+        header = _parse_header_fields(self._file.read(header_length))
+        (data_length,) = struct.unpack("<I", self._file.read(4))
+
+        return header, self._file.read(data_length)
+
+    def _read_index(self):
+        assert (
+            self._file.read(len(BAG_MAGIC)) == BAG_MAGIC
+        ), "{} is not a ROS bag (version 2.0)".format(self.bag_path)
+
+        header, _ = self._read_record()
+        assert header["op"][0] == OP_BAG_HEADER, "Missing the bag header record"
+
+        (index_position,) = struct.unpack("<Q", header["index_pos"])
+        assert (
+            index_position != 0
+        ), "{} is not indexed. Run `rosbag reindex` first".format(self.bag_path)
+
+        # Connection id -> Connection
+        self.connections = {}
+        self.chunk_infos = []
+
+        header, data = self._read_record(index_position)
+        while header is not None:
+            op = header["op"][0]
+
+            if op == OP_CONNECTION:
+                (connection_id,) = struct.unpack("<I", header["conn"])
+                fields = _parse_header_fields(data)
+                self.connections[connection_id] = Connection(
+                    connection_id,
+                    header["topic"].decode("utf-8"),
+                    fields["type"].decode("utf-8"),
+                    fields["md5sum"].decode("utf-8"),
+                    fields.get("message_definition", b"").decode("utf-8"),
+                )
+            elif op == OP_CHUNK_INFO:
+                (position,) = struct.unpack("<Q", header["chunk_pos"])
+                (count,) = struct.unpack("<I", header["count"])
+                counts = struct.unpack("<{}I".format(2 * count), data)
+                self.chunk_infos.append(
+                    ChunkInfo(
+                        position,
+                        _unpack_time(header["start_time"]),
+                        _unpack_time(header["end_time"]),
+                        dict(zip(counts[::2], counts[1::2])),
+                    )
+                )
+
+            header, data = self._read_record()
+
+        self._starts_with_header = {
+            connection.id: _starts_with_header(connection.message_definition)
+            for connection in self.connections.values()
+        }
+
+    @property
+    def topics(self):
+        """list(str): the topics in the bag"""
+        return sorted({connection.topic for connection in self.connections.values()})
+
+    def _get_connection_ids(self, topics=None):
+        if isinstance(topics, str):
+            topics = [topics]
+
+        return {
+            connection.id
+            for connection in self.connections.values()
+            if topics is None or connection.topic in topics
+        }
+
+    def get_message_count(self, topics=None):
+        """Counts the messages using the chunk index
+
+        Args:
+            topics (list(str), optional): only count messages on these topics.
+                Defaults to all topics.
+
+        Returns:
+            int: the number of messages
+        """
+        connection_ids = self._get_connection_ids(topics)
+
+        return sum(
+            count
+            for chunk_info in self.chunk_infos
+            for connection_id, count in chunk_info.connection_counts.items()
+            if connection_id in connection_ids
+        )
+
+    def _read_chunk_entries(self, chunk_info, connection_ids):
+        """Reads a chunk and the index records that follow it
+
+        Returns:
+            list(tuple): (time in nanoseconds, connection id, offset, chunk data)
+                for every message on the selected connections
+        """
+        header, data = self._read_record(chunk_info.position)
+        assert header["op"][0] == OP_CHUNK, "Expected a chunk record"
+
+        (size,) = struct.unpack("<I", header["size"])
+        chunk_data = memoryview(
+            _decompress(data, header["compression"].decode("utf-8"))
+        )
+        assert len(chunk_data) == size, "The chunk has the wrong size"
+
+        entries = []
+        # There is one index record per connection in the chunk
+        for _ in range(len(chunk_info.connection_counts)):
+            header, data = self._read_record()
+            assert header["op"][0] == OP_INDEX_DATA, "Expected an index record"
+
+            (connection_id,) = struct.unpack("<I", header["conn"])
+            if connection_id not in connection_ids:
+                continue
+
+            for secs, nsecs, offset in struct.iter_unpack("<3I", data):
+                entries.append(
+                    (secs * 1000000000 + nsecs, connection_id, offset, chunk_data)
+                )
+
+        return entries
+
+    def _get_chunk_groups(self, connection_ids):
+        """Groups chunks with overlapping time ranges so messages can be
+        yielded in time order while only a few chunks are decompressed at once
+        """
+        chunk_infos = sorted(
+            (
+                chunk_info
+                for chunk_info in self.chunk_infos
+                if not connection_ids.isdisjoint(chunk_info.connection_counts)
+            ),
+            key=lambda chunk_info: chunk_info.start_time,
+        )
+
+        group = []
+        group_end = None
+        for chunk_info in chunk_infos:
+            if group and chunk_info.start_time >= group_end:
+                yield group
+                group = []
+
+            if not group or chunk_info.end_time > group_end:
+                group_end = chunk_info.end_time
+            group.append(chunk_info)
+
+        if group:
+            yield group
+
+    def read_messages(self, topics=None, raw=False):
+        """Reads messages in time order
+
+        Args:
+            topics (list(str), optional): only read messages on these topics.
+                Defaults to all topics.
+            raw (bool, optional): whether to yield the serialized bytes
+                instead of deserializing the messages. Defaults to False.
+
+        Yields:
+            tuple(str, object, Time): the topic, message and the time the
+                message was recorded
+        """
+        connection_ids = self._get_connection_ids(topics)
+
+        for group in self._get_chunk_groups(connection_ids):
+            entries = []
+            for chunk_info in group:
+                entries.extend(self._read_chunk_entries(chunk_info, connection_ids))
+
+            # Sort by time. The sort is stable so ties keep their chunk order
+            entries.sort(key=lambda entry: entry[0])
+
+            for _, connection_id, offset, chunk_data in entries:
+                header, data, _ = _parse_record(chunk_data, offset)
+                assert header["op"][0] == OP_MESSAGE_DATA, "Expected a message"
+
+                connection = self.connections[connection_id]
+                if raw:
+                    msg = bytes(data)
+                else:
+                    msg = deserialize_message(
+                        data,
+                        connection.type,
+                        starts_with_header=self._starts_with_header[connection_id],
+                    )
+
+                yield connection.topic, msg, _unpack_time(header["time"])
@@ -0,0 +1,110 @@
+"""Selects the library used to parse and serialize JSON.
+
+The fastest installed library is used by default. A specific backend can be
+chosen with the UNIVERSAL_DEVKIT_JSON_BACKEND environment variable or by
+passing ``backend=`` to the functions that read and write JSON.
+"""
+import json
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+# The environment variable used to select a backend
+JSON_BACKEND_ENV_VAR = "UNIVERSAL_DEVKIT_JSON_BACKEND"
+
+# The order backends are tried in when the backend is "auto"
+AUTO_BACKEND_ORDER = ["orjson", "ujson", "simdjson", "json"]
+
+# loads takes str or bytes. dumps always returns bytes (UTF-8)
+JsonBackend = namedtuple("JsonBackend", ["name", "loads", "dumps"])
+
+
+def _json_dumps(data):
+    return json.dumps(data).encode("utf-8")
+
+
+def _import_backend(name):
+    """Imports a JSON backend by name. Raises an ImportError if the library
+    isn't installed.
+    """
+    if name == "json":
+        return JsonBackend("json", json.loads, _json_dumps)
+
+    if name == "orjson":
+        import orjson
+
+        # Match the stdlib's support for non-string keys. Also allow numpy
+        # values (ex. timestamps from a vectorized computation)
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+        def orjson_dumps(data):
+            return orjson.dumps(data, option=options)
+
+        return JsonBackend("orjson", orjson.loads, orjson_dumps)
+
+    if name == "ujson":
+        import ujson
+
+        def ujson_dumps(data):
+            return ujson.dumps(data, escape_forward_slashes=False).encode("utf-8")
+
+        return JsonBackend("ujson", ujson.loads, ujson_dumps)
+
+    if name == "simdjson":
+        import simdjson
+
+        # simdjson only parses, so use the stdlib to serialize
+        return JsonBackend("simdjson", simdjson.loads, _json_dumps)
+
+    raise ValueError(
+        "Unknown JSON backend: {}. Use one of: auto, {}".format(
+            name, ", ".join(AUTO_BACKEND_ORDER)
+        )
+    )
+
+
+def get_available_backends():
+    """Gets the names of the JSON backends that are installed
+
+    Returns:
+        list(str): the backend names in order of preference
+    """
+    available = []
+
+    for name in AUTO_BACKEND_ORDER:
+        try:
+            _import_backend(name)
+        except ImportError:
+            continue
+        available.append(name)
+
+    return available
+
+
+@lru_cache(maxsize=None)
+def _get_backend_by_name(name):
+    if name != "auto":
+        return _import_backend(name)
+
+    for backend_name in AUTO_BACKEND_ORDER:
+        try:
+            return _import_backend(backend_name)
+        except ImportError:
+            continue
+
+
+def get_json_backend(backend=None):
+    """Gets the JSON backend to use
+
+    Args:
+        backend (str, optional): the name of the backend ("auto", "orjson",
+            "ujson", "simdjson" or "json"). Defaults to the value of the
+            UNIVERSAL_DEVKIT_JSON_BACKEND environment variable or "auto".
+
+    Returns:
+        JsonBackend: the backend with its loads and dumps functions
+    """
+    if backend is None:
+        backend = os.environ.get(JSON_BACKEND_ENV_VAR, "auto")
+
+    return _get_backend_by_name(backend)
@@ -0,0 +1,251 @@
+"""Records how long each stage of a build takes and how much memory it uses.
+
+Profiling is off by default. Set the UNIVERSAL_DEVKIT_PROFILE environment
+variable to 1 to print a summary table when a Scene is built or to a file path
+ending in .json to write a JSON report instead. When profiling is off, a stage
+is a shared object whose enter and exit do nothing.
+
+Example::
+
+    >>> profiler = Profiler(enabled=True)
+    >>> with profiler.stage("read") as stage:
+    ...     records = read_records()
+    ...     stage.set_count(len(records))
+    >>> profiler.report()
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import ContextDecorator
+
+try:
+    import resource
+except ImportError:
+    # resource is only available on Unix
+    resource = None
+
+# The environment variable used to enable profiling
+PROFILE_ENV_VAR = "UNIVERSAL_DEVKIT_PROFILE"
+
+# ru_maxrss is in kilobytes on Linux and bytes on macOS
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+# The measurements of a stage. Times are in seconds and memory is in bytes.
+# max_rss is the peak resident set size of the process when the stage ended
+# and peak_traced_memory is the peak memory allocated during the stage (None
+# unless memory is traced). Worker processes aren't included.
+StageRecord = namedtuple(
+    "StageRecord",
+    ["name", "wall_time", "cpu_time", "count", "max_rss", "peak_traced_memory"],
+)
+
+
+def get_max_rss():
+    """Gets the peak resident set size of the process
+
+    Returns:
+        int: the peak RSS in bytes or None if it can't be measured
+    """
+    if resource is None:
+        return None
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT
+
+
+class _NullStage:
+    """The stage used when profiling is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __call__(self, func):
+        return func
+
+    def set_count(self, count):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage(ContextDecorator):
+    def __init__(self, profiler, name, count=None):
+        self.profiler = profiler
+        self.name = name
+        self.count = count
+
+    def _recreate_cm(self):
+        # Every call of a decorated function is timed separately
+        return _Stage(self.profiler, self.name, self.count)
+
+    def set_count(self, count):
+        """Sets the number of items the stage processed"""
+        self.count = count
+
+    def __enter__(self):
+        self.profiler._enter()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall_time = time.perf_counter() - self._start_wall
+        cpu_time = time.process_time() - self._start_cpu
+        peak_traced_memory = self.profiler._exit()
+
+        self.profiler.records.append(
+            StageRecord(
+                self.name,
+                wall_time,
+                cpu_time,
+                self.count,
+                get_max_rss(),
+                peak_traced_memory,
+            )
+        )
+        return False
+
+
+class Profiler:
+    def __init__(self, enabled=False, trace_memory=False, report_path=None):
+        """Records the wall time, CPU time, memory and item count of stages
+
+        Stages can be nested. tracemalloc is only started if trace_memory is
+        set because tracing every allocation slows Python down several times.
+
+        Args:
+            enabled (bool, optional): whether to record stages.
+                Defaults to False.
+            trace_memory (bool, optional): whether to record the peak memory
+                allocated by each stage with tracemalloc. Defaults to False.
+            report_path (str, optional): a path to write a JSON report to
+                instead of printing a table. Defaults to None.
+        """
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.report_path = report_path
+        self.records = []
+
+        # The stages that are running and the peak traced memory in each
+        self._stack = []
+        self._started_tracing = False
+
+    @classmethod
+    def from_environment(cls):
+        """Creates a profiler configured by the UNIVERSAL_DEVKIT_PROFILE
+        environment variable. It is disabled if the variable isn't set or is 0.
+
+        Returns:
+            Profiler: the profiler
+        """
+        value = os.environ.get(PROFILE_ENV_VAR, "")
+        if value in ("", "0"):
+            return cls()
+
+        report_path = value if value.endswith(".json") else None
+        return cls(enabled=True, report_path=report_path)
+
+    def stage(self, name, count=None):
+        """Gets a context manager (or decorator) that records a stage
+
+        Args:
+            name (str): the name of the stage
+            count (int, optional): the number of items the stage processes.
+                It can also be set with set_count inside the stage.
+                Defaults to None.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+
+        return _Stage(self, name, count)
+
+    def _enter(self):
+        if not self.trace_memory:
+            return
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+        # Save the peak of the enclosing stage before resetting it
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        self._stack.append([current, current])
+
+    def _exit(self):
+        if not self.trace_memory:
+            return None
+
+        start, peak = self._stack.pop()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], peak)
+        elif self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+        return peak - start
+
+    def get_report(self):
+        """Gets the records of every stage in the order they finished
+
+        Returns:
+            list(dict): the StageRecord fields of every stage
+        """
+        return [record._asdict() for record in self.records]
+
+    def format_table(self):
+        """Formats the records as a table
+
+        Returns:
+            str: the table
+        """
+
+        def format_memory(value):
+            return "-" if value is None else "{:.1f}".format(value / 2**20)
+
+        rows = [["stage", "wall (s)", "cpu (s)", "items", "max rss (MB)", "peak (MB)"]]
+        for record in self.records:
+            rows.append(
+                [
+                    record.name,
+                    "{:.3f}".format(record.wall_time),
+                    "{:.3f}".format(record.cpu_time),
+                    "-" if record.count is None else str(record.count),
+                    format_memory(record.max_rss),
+                    format_memory(record.peak_traced_memory),
+                ]
+            )
+
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        lines = [
+            "  ".join(
+                value.ljust(width) if i == 0 else value.rjust(width)
+                for i, (value, width) in enumerate(zip(row, widths))
+            )
+            for row in rows
+        ]
+        lines.insert(1, "-" * len(lines[0]))
+        return "\n".join(lines)
+
+    def report(self):
+        """Writes the JSON report if there is a report path or prints the table
+        otherwise. Does nothing if the profiler is disabled.
+        """
+        if not self.enabled:
+            return
+
+        if self.report_path:
+            with open(self.report_path, "w") as f:
+                json.dump(self.get_report(), f, indent=2)
+        else:
+            print(self.format_table())
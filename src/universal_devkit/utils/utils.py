@@ -1,9 +1,11 @@
-import json
+import hashlib
 import os
 import uuid
 from bisect import bisect_left
 from pathlib import Path
 
+from .json_backend import get_json_backend
+
 
 def get_timestamp(imu_dict):
     """The timestamp of a message does not necessarily equal
@@ -28,38 +30,241 @@ def get_timestamp(imu_dict):
     return str(total_time)
 
 
-def read_json(path):
+def read_json(path, backend=None):
     """Loads a dictionary from a JSON file
 
     Args:
         path (str): path to a JSON file
+        backend (str, optional): the JSON library to use.
+            See :func:`get_json_backend`. Defaults to None (auto).
 
     Returns:
         dict: dictionary loaded from JSON
     """
-    with open(path) as f:
-        data = json.load(f)
+    with open(path, "rb") as f:
+        data = get_json_backend(backend).loads(f.read())
     return data
 
 
-def write_json(data, path):
+def write_json(data, path, backend=None):
     """Writes data to a JSON file
 
     Args:
         data (any): data to write
         path (str): path to save the JSON file to
+        backend (str, optional): the JSON library to use.
+            See :func:`get_json_backend`. Defaults to None (auto).
+    """
+    with open(path, "wb") as f:
+        f.write(get_json_backend(backend).dumps(data))
+
+
+class JsonTableWriter:
+    def __init__(self, path, json_lines=False, backend=None):
+        """Writes a table (a list of dictionaries) to a file one record at a
+        time, so the whole table never needs to be held in memory.
+
+        By default the output is a regular JSON array. With json_lines=True
+        every record is written on its own line (JSON Lines). The records are
+        written to a temporary file that only replaces the output if the
+        ``with`` block finishes without an exception.
+
+        Example::
+
+            >>> with JsonTableWriter("sample_data.json") as writer:
+            ...     for record in records:
+            ...         writer.write(record)
+
+        Args:
+            path (str): path to save the file to
+            json_lines (bool, optional): whether to write JSON Lines instead
+                of a JSON array. Defaults to False.
+            backend (str, optional): the JSON library to use.
+                See :func:`get_json_backend`. Defaults to None (auto).
+        """
+        self.path = path
+        self.json_lines = json_lines
+        self.count = 0
+        self._dumps = get_json_backend(backend).dumps
+        self._file = None
+
+    def __enter__(self):
+        # Write to a temporary file in the same directory so the table only
+        # replaces the output once it's complete
+        self._temp_path = "{}.{}.tmp".format(self.path, uuid.uuid4().hex)
+        self._file = open(self._temp_path, "xb")
+
+        if not self.json_lines:
+            self._file.write(b"[")
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        complete = False
+        try:
+            if exc_type is None and not self.json_lines:
+                self._file.write(b"]")
+            complete = exc_type is None
+        finally:
+            self._file.close()
+            self._file = None
+
+            if complete:
+                os.replace(self._temp_path, self.path)
+            else:
+                # Don't leave a partial table behind
+                os.remove(self._temp_path)
+
+    def write(self, record):
+        """Writes a single record
+
+        Args:
+            record (dict): the record to write
+        """
+        if self.json_lines:
+            self._file.write(self._dumps(record))
+            self._file.write(b"\n")
+        else:
+            if self.count > 0:
+                self._file.write(b", ")
+            self._file.write(self._dumps(record))
+
+        self.count += 1
+
+    def write_all(self, records):
+        """Writes every record from an iterable
+
+        Args:
+            records (iterable(dict)): the records to write
+        """
+        for record in records:
+            self.write(record)
+
+
+def write_json_table(records, path, json_lines=False, backend=None):
+    """Writes an iterable of records to a JSON file without building
+    the whole list in memory
+
+    Args:
+        records (iterable(dict)): the records to write
+        path (str): path to save the JSON file to
+        json_lines (bool, optional): whether to write JSON Lines instead
+            of a JSON array. Defaults to False.
+        backend (str, optional): the JSON library to use.
+            See :func:`get_json_backend`. Defaults to None (auto).
+
+    Returns:
+        int: the number of records written
     """
-    with open(path, "w") as f:
-        json.dump(data, f)
+    with JsonTableWriter(path, json_lines=json_lines, backend=backend) as writer:
+        writer.write_all(records)
+
+    return writer.count
 
 
-def create_token():
+def create_token(token_generator=None, key=()):
     """Generates a 32 character unique identifier
 
+    Args:
+        token_generator (TokenGenerator, optional): the generator to create
+            the token with. Defaults to None (a random UUID).
+        key (tuple, optional): the natural key of the record the token is for.
+            Only used by a deterministic TokenGenerator. Defaults to ().
+
     Returns:
         str: unique identifier
     """
-    return uuid.uuid4().hex
+    if token_generator is None:
+        return uuid.uuid4().hex
+
+    return token_generator.create_token(*key)
+
+
+class TokenGenerator:
+    def __init__(self, namespace=None, batch_size=4096):
+        """Generates 32 character tokens.
+
+        There are two modes:
+
+        - random (namespace is None): tokens are random and are created in
+          batches, with a single ``os.urandom`` call per batch.
+        - deterministic: each token is a hash of the namespace and the natural
+          key of the record (ex. sensor channel + timestamp), so rebuilding
+          the same data gives the same tokens.
+
+        Example::
+
+            >>> tokens = TokenGenerator("my-scene")
+            >>> tokens.create_token("sample", 1532402927647951)
+            "8e0e302d6195e840c146dffe0fe0907f"
+
+        Args:
+            namespace (str, optional): the namespace for deterministic tokens.
+                Defaults to None (random tokens).
+            batch_size (int, optional): how many random tokens to create at
+                once. Defaults to 4096.
+        """
+        self.namespace = namespace
+        self.batch_size = batch_size
+        self._buffer = []
+
+    @property
+    def is_deterministic(self):
+        return self.namespace is not None
+
+    def __getstate__(self):
+        # Don't copy the buffered random tokens into worker processes,
+        # otherwise every worker would hand out the same tokens
+        return {"namespace": self.namespace, "batch_size": self.batch_size}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def create_token(self, *key):
+        """Creates a single token
+
+        Args:
+            *key: the natural key of the record. Ignored in random mode.
+
+        Returns:
+            str: a 32 character token
+        """
+        if self.is_deterministic:
+            return self._hash_key(key)
+
+        if not self._buffer:
+            self._buffer = self._create_random_tokens(self.batch_size)
+
+        return self._buffer.pop()
+
+    def create_tokens(self, keys):
+        """Creates a token for each key
+
+        Args:
+            keys (list): the natural key of each record. Each key can be a
+                tuple or a single value. In random mode only the number of
+                keys is used.
+
+        Returns:
+            list(str): a 32 character token for each key
+        """
+        if not self.is_deterministic:
+            return self._create_random_tokens(len(keys))
+
+        return [
+            self._hash_key(key if isinstance(key, tuple) else (key,)) for key in keys
+        ]
+
+    def _hash_key(self, key):
+        # Separate the parts with a character that won't appear in them so
+        # ("a/b",) and ("a", "b") don't give the same token
+        text = "\x1f".join(str(part) for part in (self.namespace, *key))
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _create_random_tokens(count):
+        random_hex = os.urandom(16 * count).hex()
+        return [random_hex[i : i + 32] for i in range(0, 32 * count, 32)]
 
 
 def get_existing_token(data_list, json_path, match_key, token_key):
@@ -235,3 +440,80 @@ def get_closest_match(sorted_list, query_number):
         return after
     else:
         return before
+
+
+def get_closest_match_indices(sorted_array, query_array):
+    """Vectorized version of :func:`get_closest_match` that returns the
+    index of the closest value for every query.
+
+    Args:
+        sorted_array (array_like): a sorted 1D array of numbers to search through
+        query_array (array_like): a 1D array of numbers to search for
+
+    Returns:
+        np.ndarray: the index in sorted_array of the closest value for each query
+    """
+    import numpy as np
+
+    sorted_array = np.asarray(sorted_array, dtype=np.int64)
+    query_array = np.asarray(query_array, dtype=np.int64)
+    assert len(sorted_array) > 0, "Unable to match against an empty array"
+
+    pos = np.searchsorted(sorted_array, query_array, side="left")
+
+    # Clip so the neighbours on both sides are valid indices. The edge cases
+    # (before the first / after the last element) are handled below.
+    before = np.clip(pos - 1, 0, len(sorted_array) - 1)
+    after = np.clip(pos, 0, len(sorted_array) - 1)
+
+    use_after = (pos == 0) | (
+        (pos < len(sorted_array))
+        & (sorted_array[after] - query_array < query_array - sorted_array[before])
+    )
+    return np.where(use_after, after, before)
+
+
+def get_closest_matches(sorted_array, query_array):
+    """Vectorized version of :func:`get_closest_match`.
+
+    Resolves the closest value for every query in a single ``searchsorted``
+    pass. Ties are broken the same way as :func:`get_closest_match`
+    (the smaller number wins).
+
+    Example::
+
+        >>> get_closest_matches([10, 20, 30], [14, 15, 16, 99])
+        array([10, 10, 20, 30])
+
+    Args:
+        sorted_array (array_like): a sorted 1D array of numbers to search through
+        query_array (array_like): a 1D array of numbers to search for
+
+    Returns:
+        np.ndarray: the closest value in sorted_array for each query
+    """
+    import numpy as np
+
+    sorted_array = np.asarray(sorted_array, dtype=np.int64)
+    return sorted_array[get_closest_match_indices(sorted_array, query_array)]
+
+
+def associate_timestamps(timestamps, sample_timestamps, ego_pose_timestamps):
+    """Finds the closest sample and ego pose timestamp for every timestamp
+    in a batch (ex. all the files for a single sensor).
+
+    Args:
+        timestamps (array_like): int64 timestamps to associate
+        sample_timestamps (array_like): sorted sample timestamps
+        ego_pose_timestamps (array_like): sorted ego pose timestamps
+
+    Returns:
+        tuple(np.ndarray, np.ndarray): the closest sample timestamps,
+            the closest ego pose timestamps
+    """
+    import numpy as np
+
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    closest_samples = get_closest_matches(sample_timestamps, timestamps)
+    closest_ego_poses = get_closest_matches(ego_pose_timestamps, timestamps)
+    return closest_samples, closest_ego_poses
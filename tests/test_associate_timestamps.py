@@ -0,0 +1,37 @@
+import numpy as np
+
+from universal_devkit.utils import associate_timestamps, get_closest_matches
+from universal_devkit.utils.utils import get_closest_match
+
+
+def test_get_closest_matches_ties_and_edges():
+    sorted_list = [10, 20, 30]
+    queries = [0, 10, 14, 15, 16, 25, 30, 99]
+
+    matches = get_closest_matches(sorted_list, queries)
+
+    # Ties (15 and 25) should resolve to the smaller number
+    assert matches.tolist() == [10, 10, 10, 10, 20, 20, 30, 30]
+
+
+def test_get_closest_matches_agrees_with_scalar():
+    rng = np.random.default_rng(0)
+    sorted_list = np.sort(rng.integers(0, 10000, size=200)).tolist()
+    queries = rng.integers(-100, 10100, size=5000)
+
+    matches = get_closest_matches(sorted_list, queries)
+    expected = [get_closest_match(sorted_list, q) for q in queries.tolist()]
+
+    assert matches.tolist() == expected
+
+
+def test_associate_timestamps():
+    sample_timestamps = [100, 200, 300]
+    ego_pose_timestamps = [90, 110, 190, 210, 290, 310]
+
+    closest_samples, closest_ego_poses = associate_timestamps(
+        [105, 195, 305], sample_timestamps, ego_pose_timestamps
+    )
+
+    assert closest_samples.tolist() == [100, 200, 300]
+    assert closest_ego_poses.tolist() == [110, 190, 310]
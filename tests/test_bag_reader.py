@@ -0,0 +1,341 @@
+import bz2
+import struct
+
+import numpy as np
+import pytest
+from utils import equal_dicts, get_relative_path
+
+from universal_devkit.prepare_data.yaml_to_json import read_bag_messages
+from universal_devkit.scripts.correct_timestamps import correct_timestamps
+from universal_devkit.scripts.ros_imu_pose import ros_imu_pose
+from universal_devkit.utils.bag_reader import BagReader, Header, RawMessage, Time
+from universal_devkit.utils.utils import read_json
+
+BAG_MAGIC = b"#ROSBAG V2.0\n"
+
+IMU_TOPIC = "/imu/data/raw"
+LIDAR_TOPIC = "/lidar/points"
+
+IMU_DEFINITION = "std_msgs/Header header\ngeometry_msgs/Quaternion orientation\n"
+POINTS_DEFINITION = "# A stamped message\nHeader header\nuint32 width\n"
+STRING_DEFINITION = "string data\n"
+
+# topic -> (connection id, type, message definition)
+CONNECTIONS = {
+    IMU_TOPIC: (0, "sensor_msgs/Imu", IMU_DEFINITION),
+    LIDAR_TOPIC: (1, "sensor_msgs/PointCloud2", POINTS_DEFINITION),
+    "/status": (2, "std_msgs/String", STRING_DEFINITION),
+}
+
+
+def pack_fields(fields):
+    data = b""
+    for name, value in fields.items():
+        field = name.encode() + b"=" + value
+        data += struct.pack("<I", len(field)) + field
+    return data
+
+
+def pack_record(fields, data):
+    header = pack_fields(fields)
+    return struct.pack("<I", len(header)) + header + struct.pack("<I", len(data)) + data
+
+
+def pack_time(secs, nsecs):
+    return struct.pack("<2I", secs, nsecs)
+
+
+def pack_header(seq, secs, nsecs, frame_id):
+    return (
+        struct.pack("<3I", seq, secs, nsecs)
+        + struct.pack("<I", len(frame_id))
+        + frame_id.encode()
+    )
+
+
+def pack_imu(seq, secs, nsecs, orientation):
+    covariance = struct.pack("<9d", *range(9))
+    return (
+        pack_header(seq, secs, nsecs, "imu")
+        + struct.pack("<4d", *orientation)
+        + covariance
+        + struct.pack("<3d", 1.0, 2.0, 3.0)
+        + covariance
+        + struct.pack("<3d", 4.0, 5.0, 6.0)
+        + covariance
+    )
+
+
+def pack_connection(topic):
+    connection_id, msg_type, definition = CONNECTIONS[topic]
+    return pack_record(
+        {
+            "op": b"\x07",
+            "conn": struct.pack("<I", connection_id),
+            "topic": topic.encode(),
+        },
+        pack_fields(
+            {
+                "topic": topic.encode(),
+                "type": msg_type.encode(),
+                "md5sum": b"*",
+                "message_definition": definition.encode(),
+            }
+        ),
+    )
+
+
+def compress(data, compression):
+    if compression == "bz2":
+        return bz2.compress(data)
+    if compression == "lz4":
+        import lz4.frame
+
+        return lz4.frame.compress(data)
+    return data
+
+
+def write_bag(path, chunks, compression="none"):
+    """Writes a ROS1 v2.0 bag
+
+    Args:
+        path (str): the path to write the bag to
+        chunks (list(list(tuple))): the messages in each chunk as tuples of
+            (topic, (secs, nsecs), serialized message)
+        compression (str, optional): the chunk compression
+    """
+    body = b""
+    chunk_infos = []
+    bag_header_length = 4096
+
+    for messages in chunks:
+        chunk = b""
+        # connection id -> list of (secs, nsecs, offset)
+        index = {}
+
+        for topic, (secs, nsecs), data in messages:
+            connection_id = CONNECTIONS[topic][0]
+            if connection_id not in index:
+                chunk += pack_connection(topic)
+                index[connection_id] = []
+
+            index[connection_id].append((secs, nsecs, len(chunk)))
+            chunk += pack_record(
+                {
+                    "op": b"\x02",
+                    "conn": struct.pack("<I", connection_id),
+                    "time": pack_time(secs, nsecs),
+                },
+                data,
+            )
+
+        chunk_position = len(BAG_MAGIC) + bag_header_length + len(body)
+        body += pack_record(
+            {
+                "op": b"\x05",
+                "compression": compression.encode(),
+                "size": struct.pack("<I", len(chunk)),
+            },
+            compress(chunk, compression),
+        )
+
+        for connection_id, entries in index.items():
+            body += pack_record(
+                {
+                    "op": b"\x04",
+                    "ver": struct.pack("<I", 1),
+                    "conn": struct.pack("<I", connection_id),
+                    "count": struct.pack("<I", len(entries)),
+                },
+                b"".join(struct.pack("<3I", *entry) for entry in entries),
+            )
+
+        times = [time for _, time, _ in messages]
+        chunk_infos.append(
+            pack_record(
+                {
+                    "op": b"\x06",
+                    "ver": struct.pack("<I", 1),
+                    "chunk_pos": struct.pack("<Q", chunk_position),
+                    "start_time": pack_time(*min(times)),
+                    "end_time": pack_time(*max(times)),
+                    "count": struct.pack("<I", len(index)),
+                },
+                b"".join(
+                    struct.pack("<2I", connection_id, len(entries))
+                    for connection_id, entries in index.items()
+                ),
+            )
+        )
+
+    index_position = len(BAG_MAGIC) + bag_header_length + len(body)
+    body += b"".join(pack_connection(topic) for topic in CONNECTIONS)
+    body += b"".join(chunk_infos)
+
+    fields = pack_fields(
+        {
+            "op": b"\x03",
+            "index_pos": struct.pack("<Q", index_position),
+            "conn_count": struct.pack("<I", len(CONNECTIONS)),
+            "chunk_count": struct.pack("<I", len(chunks)),
+        }
+    )
+    # The bag header record is padded to 4096 bytes
+    padding = b" " * (bag_header_length - 8 - len(fields))
+    bag_header = struct.pack("<I", len(fields)) + fields
+    bag_header += struct.pack("<I", len(padding)) + padding
+
+    with open(path, "wb") as f:
+        f.write(BAG_MAGIC + bag_header + body)
+
+
+def create_imu_messages(num_messages, start=0):
+    return [
+        (
+            IMU_TOPIC,
+            (100 + i, 0),
+            # The header time is later than the bag time
+            pack_imu(i, 100 + i, 500, (0.1 * i, 0.2, 0.3, 1.0)),
+        )
+        for i in range(start, start + num_messages)
+    ]
+
+
+@pytest.fixture
+def bag_path(tmp_path):
+    chunks = [
+        create_imu_messages(3)
+        + [
+            (
+                LIDAR_TOPIC,
+                (100, 5),
+                pack_header(0, 99, 7, "lidar") + b"\x01\x00\x00\x00",
+            ),
+            ("/status", (101, 5), struct.pack("<I", 2) + b"ok"),
+        ],
+        create_imu_messages(3, start=3),
+    ]
+    path = str(tmp_path / "test.bag")
+    write_bag(path, chunks)
+    return path
+
+
+@pytest.mark.parametrize("compression", ["none", "bz2", "lz4"])
+def test_read_imu_messages(tmp_path, compression):
+    if compression == "lz4":
+        pytest.importorskip("lz4.frame")
+
+    path = str(tmp_path / "test.bag")
+    write_bag(
+        path, [create_imu_messages(4), create_imu_messages(4, start=4)], compression
+    )
+
+    with BagReader(path) as bag:
+        assert bag.topics == sorted(CONNECTIONS)
+        assert bag.get_message_count(topics=[IMU_TOPIC]) == 8
+
+        messages = list(bag.read_messages(topics=[IMU_TOPIC]))
+
+    assert len(messages) == 8
+    for i, (topic, msg, timestamp) in enumerate(messages):
+        assert topic == IMU_TOPIC
+        assert timestamp == Time(100 + i, 0)
+        assert msg.header == Header(i, Time(100 + i, 500), "imu")
+        assert [msg.orientation.x, msg.orientation.w] == [0.1 * i, 1.0]
+        assert msg.orientation_covariance == tuple(float(v) for v in range(9))
+        assert msg.linear_acceleration.z == 6.0
+
+
+def test_read_all_messages(bag_path):
+    with BagReader(bag_path) as bag:
+        messages = list(bag.read_messages())
+
+    # Messages are sorted by the time they were recorded
+    timestamps = [timestamp.to_nsec() for _, _, timestamp in messages]
+    assert timestamps == sorted(timestamps)
+    assert len(messages) == 8
+
+    lidar = [msg for topic, msg, _ in messages if topic == LIDAR_TOPIC]
+    assert isinstance(lidar[0], RawMessage)
+    assert lidar[0].type == "sensor_msgs/PointCloud2"
+    assert lidar[0].header.stamp == Time(99, 7)
+
+    status = [msg for topic, msg, _ in messages if topic == "/status"]
+    assert status[0].header is None
+    assert status[0].data == struct.pack("<I", 2) + b"ok"
+
+    with BagReader(bag_path) as bag:
+        raw = [msg for _, msg, _ in bag.read_messages(topics="/status", raw=True)]
+    assert raw == [status[0].data]
+
+
+def test_overlapping_chunks(tmp_path):
+    path = str(tmp_path / "test.bag")
+    messages = create_imu_messages(6)
+    write_bag(path, [messages[::2], messages[1::2]])
+
+    with BagReader(path) as bag:
+        seqs = [msg.header.seq for _, msg, _ in bag.read_messages()]
+
+    assert seqs == list(range(6))
+
+
+def test_unindexed_bag(tmp_path, bag_path):
+    with open(bag_path, "rb") as f:
+        data = bytearray(f.read())
+
+    # Zero the index position like an unclosed bag
+    index_pos = data.index(b"index_pos=") + len(b"index_pos=")
+    data[index_pos : index_pos + 8] = bytes(8)
+    path = tmp_path / "unindexed.bag"
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(AssertionError, match="not indexed"):
+        BagReader(str(path))
+
+
+def test_scripts_without_ros(tmp_path, bag_path):
+    # rosbag isn't installed so the scripts fall back to BagReader
+    (file_path,) = ros_imu_pose(
+        bag_path, IMU_TOPIC, str(tmp_path / "imu"), output_format="npz"
+    )
+    with np.load(file_path) as arrays:
+        assert arrays["timestamps"].tolist() == [
+            (100 + i) * 1000000000 + 500 for i in range(6)
+        ]
+        assert arrays["rotations"][2].tolist() == [1.0, 0.2, 0.2, 0.3]
+
+    messages = list(read_bag_messages(bag_path, IMU_TOPIC))
+    assert [msg.header.seq for msg in messages] == list(range(6))
+
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    (input_dir / "100000000000.pcd").write_text("")
+    (input_dir / "100000000005.pcd").write_text("")
+    unmatched = correct_timestamps(
+        str(input_dir), bag_path, str(tmp_path / "output"), topics=[LIDAR_TOPIC]
+    )
+
+    assert unmatched == [str(input_dir / "100000000000.pcd")]
+    assert [p.name for p in (tmp_path / "output").iterdir()] == ["99000000007.pcd"]
+
+
+def test_recorded_imu_bag(tmp_path):
+    bag_path = get_relative_path("assets/IMU_pose/single_file_input.bag")
+    correct_data = read_json(
+        get_relative_path("assets/IMU_pose/single_file_correct.json")
+    )
+
+    (file_path,) = ros_imu_pose(str(bag_path), IMU_TOPIC, str(tmp_path))
+    output_data = read_json(file_path)
+
+    # The timestamps in the expected output are placeholders
+    assert len(output_data) == len(correct_data)
+    for output_d, correct_d in zip(output_data, correct_data):
+        assert equal_dicts(output_d, correct_d, ignore_keys=["timestamp"])
+
+    with BagReader(str(bag_path)) as bag:
+        _, msg, timestamp = next(bag.read_messages(topics=[IMU_TOPIC]))
+
+    assert msg.header.stamp == Time(1561043414, 125175558)
+    assert str(timestamp) == "1561043414125395933"
@@ -2,11 +2,30 @@ import numpy as np
 
 from universal_devkit.scripts.calculate_extrinsic_matrix import (
     euler_angle_to_rotation_matrix,
+    euler_angles_to_rotation_matrices,
     extrinsic_to_static_transform,
+    extrinsics_to_static_transforms,
+    get_relative_transformation,
+    get_relative_transformations,
+    invert_transformations,
+    quaternions_to_rotation_matrices,
+    rotation_matrices_to_euler_angles,
+    rotation_matrices_to_quaternions,
+    rotation_matrix_to_euler_angle,
     static_transform_to_extrinsic,
+    static_transforms_to_extrinsics,
 )
 
 
+def get_random_static_transforms(num_transforms, seed=0):
+    rng = np.random.default_rng(seed)
+    translations = rng.uniform(-5, 5, size=(num_transforms, 3))
+    # Keep the middle angle within (-pi/2, pi/2) so the euler angles are unique
+    angles = rng.uniform(-np.pi, np.pi, size=(num_transforms, 3))
+    angles[:, 1] /= 2.5
+    return np.hstack([translations, angles])
+
+
 def test_euler_angle_to_rotation_matrix():
     _, _, _, yaw, pitch, roll = [0.5080, 0.0, 0.1778, 0, 0.05, 0]
     rotation = euler_angle_to_rotation_matrix([yaw, pitch, roll])
@@ -54,3 +73,84 @@ def test_static_transform_to_extrinsic():
         ]
     )
     assert np.allclose(camera_to_base, correct_extrinsic)
+
+
+def test_batched_euler_angles_match_scalar():
+    angles = get_random_static_transforms(50)[:, 3:]
+
+    rotations = euler_angles_to_rotation_matrices(angles)
+    assert rotations.shape == (50, 3, 3)
+
+    for angle, rotation in zip(angles, rotations):
+        assert np.allclose(rotation, euler_angle_to_rotation_matrix(angle))
+        assert np.allclose(
+            rotation_matrices_to_euler_angles(rotation),
+            rotation_matrix_to_euler_angle(rotation),
+        )
+
+    assert np.allclose(
+        rotation_matrices_to_euler_angles(rotations),
+        [rotation_matrix_to_euler_angle(rotation) for rotation in rotations],
+    )
+
+
+def test_batched_static_transforms_match_scalar():
+    transforms = get_random_static_transforms(50)
+
+    extrinsics = static_transforms_to_extrinsics(transforms)
+    assert extrinsics.shape == (50, 4, 4)
+
+    for transform, extrinsic in zip(transforms, extrinsics):
+        assert np.allclose(extrinsic, static_transform_to_extrinsic(transform))
+
+    assert np.allclose(
+        extrinsics_to_static_transforms(extrinsics),
+        [extrinsic_to_static_transform(extrinsic) for extrinsic in extrinsics],
+    )
+
+
+def test_quaternions_to_rotation_matrices():
+    # 90 degrees about z
+    rotation = quaternions_to_rotation_matrices([np.sqrt(0.5), 0, 0, np.sqrt(0.5)])
+    assert np.allclose(rotation, [[0, -1, 0], [1, 0, 0], [0, 0, 1]])
+
+    # Unnormalized quaternions are normalized
+    assert np.allclose(quaternions_to_rotation_matrices([2, 0, 0, 0]), np.eye(3))
+
+
+def test_quaternion_round_trip():
+    rng = np.random.default_rng(0)
+    quaternions = rng.normal(size=(200, 4))
+    quaternions /= np.linalg.norm(quaternions, axis=1, keepdims=True)
+    quaternions[quaternions[:, 0] < 0] *= -1
+
+    # Include rotations of 180 degrees where w is 0
+    quaternions[:3] = [[0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]]
+
+    rotations = quaternions_to_rotation_matrices(quaternions)
+    assert np.allclose(rotations @ np.swapaxes(rotations, 1, 2), np.eye(3))
+    assert np.allclose(rotation_matrices_to_quaternions(rotations), quaternions)
+
+
+def test_invert_transformations():
+    extrinsics = static_transforms_to_extrinsics(get_random_static_transforms(20))
+
+    inverses = invert_transformations(extrinsics)
+    assert np.allclose(inverses, np.linalg.inv(extrinsics))
+    assert np.allclose(inverses @ extrinsics, np.eye(4))
+
+
+def test_batched_relative_transformations_match_scalar():
+    a_to_base = static_transforms_to_extrinsics(get_random_static_transforms(20))
+    b_to_base = static_transforms_to_extrinsics(get_random_static_transforms(20, 1))
+
+    relative = get_relative_transformations(a_to_base, b_to_base)
+    for a, b, a_to_b in zip(a_to_base, b_to_base, relative):
+        assert np.allclose(a_to_b, get_relative_transformation(a, b))
+
+    # A single transformation is broadcast against a batch
+    relative = get_relative_transformations(a_to_base[0], b_to_base)
+    assert relative.shape == (20, 4, 4)
+    assert np.allclose(
+        relative[5], get_relative_transformation(a_to_base[0], b_to_base[5])
+    )
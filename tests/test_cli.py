@@ -0,0 +1,87 @@
+import argparse
+import importlib
+import subprocess
+import sys
+
+import pytest
+
+from universal_devkit.cli import COMMANDS, main, parse_args
+from universal_devkit.scripts.create_synthetic_scene import (
+    create_synthetic_logs,
+    create_synthetic_scene,
+)
+
+
+def test_help(capsys):
+    with pytest.raises(SystemExit):
+        main(["--help"])
+
+    output = capsys.readouterr().out
+    for command in COMMANDS:
+        assert command in output
+
+
+def test_lazy_imports():
+    # Parsing the arguments of a command only imports the module it runs, so
+    # the lightweight commands don't import the heavy modules
+    code = (
+        "import sys\n"
+        "from universal_devkit.cli import parse_args\n"
+        "parse_args(['logs', '-i', 'in'])\n"
+        "heavy = ['numpy', 'cv2', 'tqdm', 'bbox_utils', 'importlib.metadata']\n"
+        "print([name for name in heavy if name in sys.modules])\n"
+        "parse_args(['scene', '-i', 'in', '-o', 'out'])\n"
+        "print([name for name in heavy if name in sys.modules])\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+
+    assert output.split("\n")[:2] == ["[]", "['numpy']"]
+
+
+@pytest.mark.parametrize("command", list(COMMANDS))
+def test_command_arguments(command, capsys):
+    # The arguments come from the add_arguments function of each module
+    module = importlib.import_module(COMMANDS[command][1])
+    parser = argparse.ArgumentParser()
+    module.add_arguments(parser)
+    options = [action.option_strings for action in parser._actions[1:]]
+
+    with pytest.raises(SystemExit):
+        main([command, "--help"])
+
+    output = capsys.readouterr().out
+    for option_strings in options:
+        assert option_strings[-1] in output
+
+
+def test_command_choices():
+    from universal_devkit.prepare_data.tracking import MATCHING_METHODS
+
+    args = parse_args(["scene", "-i", "in", "-o", "out", "--tracking_method", "greedy"])
+    assert args.tracking_method in MATCHING_METHODS
+
+    with pytest.raises(SystemExit):
+        parse_args(["scene", "-i", "in", "-o", "out", "--tracking_method", "none"])
+
+
+def test_logs_and_scene(tmp_path):
+    logs_dir = create_synthetic_logs(str(tmp_path / "logs"), num_files=3)
+    main(["logs", "-i", logs_dir, "--json_lines"])
+    assert (tmp_path / "logs" / "get_logs.jsonl").exists()
+
+    scene_dir = create_synthetic_scene(str(tmp_path / "scene"), num_files=20)
+    main(["scene", "-i", scene_dir, "-o", str(tmp_path / "output"), "-n", "test"])
+    assert (tmp_path / "output" / "sample_data.json").exists()
+
+
+def test_extrinsics(capsys):
+    main(
+        ["extrinsics", "-s", "0.508", "0", "0.1778", "0", "0.05", "0"]
+        + ["-t", "0.4445", "0", "0.09525", "0", "0.06981", "0"]
+    )
+
+    output = capsys.readouterr().out
+    assert "Translation (x, y, z): -0.0592948" in output
+    assert "Rotation (y, p, r): 0.0 0.01981" in output
@@ -0,0 +1,159 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+from bbox_utils import BoundingBox
+
+from universal_devkit.scripts.convert_yolo_to_xyxy import (
+    convert_images_from_yolo_to_xyxy,
+    convert_yolo_labels_to_xyxy,
+    read_yolo_labels,
+)
+from universal_devkit.utils.utils import read_json
+
+IMAGE_WIDTH = 40
+IMAGE_HEIGHT = 30
+NUM_IMAGES = 5
+
+
+@pytest.fixture
+def yolo_dir(tmp_path):
+    yolo_dir = tmp_path / "yolo"
+    (yolo_dir / "images").mkdir(parents=True)
+    (yolo_dir / "labels").mkdir()
+
+    rng = np.random.default_rng(0)
+    for i in range(NUM_IMAGES):
+        image = rng.integers(
+            0, 255, size=(IMAGE_HEIGHT, IMAGE_WIDTH, 3), dtype=np.uint8
+        )
+        cv2.imwrite(str(yolo_dir / "images" / "{}.jpg".format(i)), image)
+
+        lines = []
+        for class_id in range(i + 1):
+            center = rng.uniform(0.2, 0.8, size=2)
+            size = rng.uniform(0.05, 0.3, size=2)
+            lines.append("{} {} {} {} {}\n".format(class_id, *center, *size))
+        (yolo_dir / "labels" / "{}.txt".format(i)).write_text("".join(lines))
+
+    return yolo_dir
+
+
+def read_labels(output_dir):
+    label_dir = os.path.join(output_dir, "labels")
+    return {
+        name: read_json(os.path.join(label_dir, name)) for name in os.listdir(label_dir)
+    }
+
+
+def test_convert_keeps_image_bytes(yolo_dir, tmp_path):
+    output_dir = tmp_path / "output"
+    convert_images_from_yolo_to_xyxy(str(yolo_dir), str(output_dir))
+
+    labels = read_labels(output_dir)
+    assert sorted(labels) == ["{}.jpg.json".format(i) for i in range(NUM_IMAGES)]
+
+    for i in range(NUM_IMAGES):
+        label = labels["{}.jpg.json".format(i)]
+        assert label["image_name"] == "{}.jpg".format(i)
+        assert label["dimensions"] == [IMAGE_HEIGHT, IMAGE_WIDTH, 3]
+        assert len(label["annotations"]) == i + 1
+
+        for annotation in label["annotations"]:
+            x1, y1, x2, y2 = annotation["xyxy"]
+            assert 0 <= x1 < x2 <= IMAGE_WIDTH
+            assert 0 <= y1 < y2 <= IMAGE_HEIGHT
+
+        original = yolo_dir / "images" / "{}.jpg".format(i)
+        output = output_dir / "images" / "{}.jpg".format(i)
+        assert output.read_bytes() == original.read_bytes()
+        assert os.path.samefile(original, output)
+
+
+def test_convert_png_mode(yolo_dir, tmp_path):
+    hardlink_dir = tmp_path / "hardlink"
+    png_dir = tmp_path / "png"
+    convert_images_from_yolo_to_xyxy(str(yolo_dir), str(hardlink_dir))
+    convert_images_from_yolo_to_xyxy(str(yolo_dir), str(png_dir), image_mode="png")
+
+    hardlink_labels = read_labels(hardlink_dir)
+    png_labels = read_labels(png_dir)
+
+    for i in range(NUM_IMAGES):
+        png_label = png_labels["{}.png.json".format(i)]
+        hardlink_label = hardlink_labels["{}.jpg.json".format(i)]
+
+        assert png_label["image_name"] == "{}.png".format(i)
+        assert png_label["dimensions"] == hardlink_label["dimensions"]
+        assert png_label["annotations"] == hardlink_label["annotations"]
+
+        image = cv2.imread(str(png_dir / "images" / "{}.png".format(i)))
+        assert image.shape == (IMAGE_HEIGHT, IMAGE_WIDTH, 3)
+
+
+def test_convert_with_workers(yolo_dir, tmp_path):
+    serial_dir = tmp_path / "serial"
+    parallel_dir = tmp_path / "parallel"
+    convert_images_from_yolo_to_xyxy(str(yolo_dir), str(serial_dir), image_mode="copy")
+    convert_images_from_yolo_to_xyxy(
+        str(yolo_dir), str(parallel_dir), image_mode="copy", workers=2
+    )
+
+    assert read_labels(serial_dir) == read_labels(parallel_dir)
+    assert sorted(os.listdir(parallel_dir / "images")) == sorted(
+        os.listdir(yolo_dir / "images")
+    )
+
+
+def test_convert_yolo_labels_matches_bounding_box(tmp_path):
+    rng = np.random.default_rng(1)
+    num_boxes = 500
+    labels = np.column_stack(
+        [
+            rng.integers(0, 10, size=num_boxes),
+            rng.uniform(0.1, 0.9, size=(num_boxes, 2)),
+            rng.uniform(0.01, 0.2, size=(num_boxes, 2)),
+        ]
+    )
+    label_path = tmp_path / "labels.txt"
+    label_path.write_text(
+        "".join("{:.0f} {} {} {} {}\n".format(*row) for row in labels)
+    )
+    image_dimension = [IMAGE_HEIGHT, IMAGE_WIDTH, 3]
+
+    class_ids, xyxy = convert_yolo_labels_to_xyxy(
+        read_yolo_labels(str(label_path)), image_dimension
+    )
+
+    for row, class_id, box in zip(labels, class_ids.tolist(), xyxy.tolist()):
+        bbox = BoundingBox.from_yolo(
+            row[1:3], row[3], row[4], np.array(image_dimension[:2])
+        )
+        xy1, xy2 = bbox.to_xyxy()
+        assert class_id == int(row[0])
+        assert box == xy1.tolist() + xy2.tolist()
+
+
+def test_convert_yolo_labels_clips_to_image():
+    labels = np.array([[3, 0.05, 0.95, 0.5, 0.5], [1, 0.5, 0.5, 0.2, 0.2]])
+    image_dimension = [IMAGE_HEIGHT, IMAGE_WIDTH, 3]
+
+    class_ids, xyxy = convert_yolo_labels_to_xyxy(labels, image_dimension)
+    assert class_ids.tolist() == [3, 1]
+    assert xyxy.tolist() == [[0, 21, 12, 30], [16, 12, 24, 18]]
+
+    _, unclipped = convert_yolo_labels_to_xyxy(labels, image_dimension, clip=False)
+    assert unclipped.tolist() == [[-8, 21, 12, 36], [16, 12, 24, 18]]
+
+
+def test_read_empty_yolo_labels(tmp_path):
+    label_path = tmp_path / "labels.txt"
+    label_path.write_text("")
+
+    labels = read_yolo_labels(str(label_path))
+    assert labels.shape == (0, 5)
+
+    class_ids, xyxy = convert_yolo_labels_to_xyxy(labels, [IMAGE_HEIGHT, IMAGE_WIDTH])
+    assert class_ids.shape == (0,)
+    assert xyxy.shape == (0, 4)
@@ -0,0 +1,110 @@
+import json
+import sys
+from types import ModuleType, SimpleNamespace
+
+from universal_devkit.scripts.correct_timestamps import (
+    correct_timestamps,
+    get_header_timestamp,
+    index_directory,
+)
+
+
+def create_message(secs, nsecs):
+    return SimpleNamespace(
+        header=SimpleNamespace(stamp=SimpleNamespace(secs=secs, nsecs=nsecs))
+    )
+
+
+class FakeBag:
+    def __init__(self, messages):
+        self.messages = messages
+        self.closed = False
+
+    def read_messages(self, topics=None):
+        for topic, msg, timestamp in self.messages:
+            if topics is None or topic in topics:
+                yield topic, msg, timestamp
+
+    def close(self):
+        self.closed = True
+
+
+def test_index_directory(tmp_path):
+    for name in ["100.pcd", "200.pcd.json", "300.png", "300.json", ".hidden"]:
+        (tmp_path / name).write_text("")
+    (tmp_path / "400.dir").mkdir()
+
+    file_index = index_directory(str(tmp_path))
+
+    assert sorted(file_index) == ["100", "200", "300"]
+    assert file_index["100"] == [str(tmp_path / "100.pcd")]
+    assert file_index["200"] == [str(tmp_path / "200.pcd.json")]
+    assert sorted(file_index["300"]) == [
+        str(tmp_path / "300.json"),
+        str(tmp_path / "300.png"),
+    ]
+
+
+def test_get_header_timestamp():
+    assert get_header_timestamp(create_message(1532402927, 647951000)) == (
+        "1532402927647951000"
+    )
+    assert get_header_timestamp(create_message(1, 5)) == "1000000005"
+    assert get_header_timestamp(SimpleNamespace(data=1)) is None
+
+
+def test_correct_timestamps(tmp_path):
+    input_dir = tmp_path / "input"
+    output_dir = tmp_path / "output"
+    input_dir.mkdir()
+    for name in ["100.pcd", "200.pcd.json", "300.pcd", "400.pcd"]:
+        (input_dir / name).write_text(name)
+
+    bag = FakeBag(
+        [
+            ("/lidar", create_message(1, 0), 100),
+            ("/lidar", create_message(2, 5), 200),
+            ("/camera", create_message(3, 0), 300),
+            ("/lidar", create_message(4, 0), 500),
+        ]
+    )
+
+    unmatched = correct_timestamps(
+        str(input_dir),
+        "test.bag",
+        str(output_dir),
+        topics=["/lidar"],
+        open_bag=lambda path: bag,
+    )
+
+    assert bag.closed
+    assert sorted(p.name for p in output_dir.iterdir()) == [
+        "1000000000.pcd",
+        "2000000005.pcd.json",
+    ]
+    assert (output_dir / "2000000005.pcd.json").read_text() == "200.pcd.json"
+    assert unmatched == [str(input_dir / "300.pcd"), str(input_dir / "400.pcd")]
+
+
+def test_correct_timestamps_json_fallback(tmp_path, monkeypatch):
+    input_dir = tmp_path / "input"
+    output_dir = tmp_path / "output"
+    input_dir.mkdir()
+    (input_dir / "100.json").write_text("")
+
+    # Messages without a header attribute are converted to JSON instead
+    converter = ModuleType("rospy_message_converter")
+    converter.json_message_converter = SimpleNamespace(
+        convert_ros_message_to_json=lambda msg: json.dumps(
+            {"header": {"stamp": {"secs": msg["secs"], "nsecs": msg["nsecs"]}}}
+        )
+    )
+    monkeypatch.setitem(sys.modules, "rospy_message_converter", converter)
+
+    bag = FakeBag([("/imu", {"secs": 7, "nsecs": 3}, 100)])
+    unmatched = correct_timestamps(
+        str(input_dir), "test.bag", str(output_dir), open_bag=lambda path: bag
+    )
+
+    assert unmatched == []
+    assert [p.name for p in output_dir.iterdir()] == ["7000000003.json"]
@@ -1,3 +1,4 @@
+import json
 import os
 
 from utils import equal_dicts, get_relative_path
@@ -33,3 +34,20 @@ def test_create_logs_json():
         assert equal_dicts(output_d, correct_d, ignore_keys=ignore_keys)
 
     os.remove(output_file_path)
+
+
+def test_create_logs_json_lines():
+    example_logs_path = get_relative_path("assets/example_logs")
+    output_file_path = get_relative_path("assets/example_logs/get_logs.jsonl")
+
+    count = get_logs(str(example_logs_path), json_lines=True)
+
+    with open(output_file_path) as f:
+        output_data = [json.loads(line) for line in f]
+
+    correct_data = read_json(get_relative_path("assets/create_logs_json_correct.json"))
+    assert count == len(output_data) == len(correct_data)
+    for output_d, correct_d in zip(output_data, correct_data):
+        assert equal_dicts(output_d, correct_d, ignore_keys=["token"])
+
+    os.remove(output_file_path)
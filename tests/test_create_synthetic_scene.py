@@ -0,0 +1,73 @@
+import os
+
+import cv2
+
+from universal_devkit.prepare_data.create_logs_json import get_logs
+from universal_devkit.prepare_data.scene import Scene
+from universal_devkit.scripts.convert_yolo_to_xyxy import (
+    convert_images_from_yolo_to_xyxy,
+)
+from universal_devkit.scripts.create_synthetic_scene import (
+    IMAGE_HEIGHT,
+    IMAGE_WIDTH,
+    create_synthetic_logs,
+    create_synthetic_sample_annotations,
+    create_synthetic_scene,
+    create_synthetic_supervisely,
+    create_synthetic_yolo,
+)
+from universal_devkit.scripts.supervisely_3d_to_universal import (
+    convert_supervisely_3d_to_universal,
+)
+from universal_devkit.utils.utils import TokenGenerator, read_json
+
+
+def test_create_synthetic_scene(tmp_path):
+    create_synthetic_scene(str(tmp_path), num_files=40, num_objects=3)
+
+    camera_files = os.listdir(tmp_path / "samples" / "CAM_FRONT")
+    assert len(camera_files) == 6
+    image = cv2.imread(str(tmp_path / "samples" / "CAM_FRONT" / min(camera_files)))
+    assert image.shape == (IMAGE_HEIGHT, IMAGE_WIDTH, 3)
+
+    annotation_dir = tmp_path / "samples" / "LIDAR_TOP" / "annotations"
+    annotations = read_json(str(next(annotation_dir.iterdir())))
+    assert all("instance_token" not in ann for ann in annotations)
+
+    scene = Scene(str(tmp_path), token_generator=TokenGenerator("synthetic"))
+
+    # 10 files per sensor, half of them are samples. The objects are tracked
+    # across every sample
+    assert len(scene.SAMPLE_TIMESTAMPS) == 5
+    assert len(scene.SAMPLE_ANNOTATIONS) == 15
+    assert len(scene.INSTANCE_DATA_DICT) == 3
+    assert sorted(scene.SENSOR_JSON_DICT) == [
+        "CAM_BACK",
+        "CAM_FRONT",
+        "LIDAR_TOP",
+        "RADAR_FRONT",
+    ]
+
+
+def test_create_synthetic_inputs(tmp_path):
+    assert get_logs(create_synthetic_logs(str(tmp_path / "logs"), num_files=5)) == 5
+    logs = read_json(str(tmp_path / "logs" / "get_logs.json"))
+    assert [log["logfile"] for log in logs] == ["log{}.txt".format(i) for i in range(5)]
+
+    convert_supervisely_3d_to_universal(
+        create_synthetic_supervisely(str(tmp_path / "supervisely"), num_files=4),
+        str(tmp_path / "supervisely_output"),
+    )
+    output_files = sorted(os.listdir(tmp_path / "supervisely_output"))
+    assert len(output_files) == 4
+    assert len(read_json(str(tmp_path / "supervisely_output" / output_files[0]))) == 5
+
+    convert_images_from_yolo_to_xyxy(
+        create_synthetic_yolo(str(tmp_path / "yolo"), num_files=3),
+        str(tmp_path / "xyxy"),
+        extension=".png",
+    )
+    assert len(os.listdir(tmp_path / "xyxy" / "labels")) == 3
+
+    annotations = create_synthetic_sample_annotations(100, num_objects=10)
+    assert len({ann["instance_token"] for ann in annotations}) == 10
@@ -0,0 +1,159 @@
+import time
+
+import numpy as np
+import pytest
+
+from universal_devkit.prepare_data.ego_pose import (
+    EgoPoseTable,
+    get_ego_pose_validation_report,
+    validate_ego_pose,
+)
+from universal_devkit.utils.utils import get_closest_match
+
+
+def get_z_rotation(angle):
+    # Quaternion in [w, x, y, z] order for a rotation about the z axis
+    return [np.cos(angle / 2), 0.0, 0.0, np.sin(angle / 2)]
+
+
+@pytest.fixture
+def ego_pose_list():
+    return [
+        {
+            "timestamp": 2000,
+            "rotation": get_z_rotation(np.pi / 2),
+            "translation": [10.0, 20.0, 0.0],
+            "token": "b",
+        },
+        {
+            "timestamp": 1000,
+            "rotation": get_z_rotation(0.0),
+            "translation": [0.0, 0.0, 0.0],
+            "token": "a",
+        },
+        {
+            "timestamp": 3000,
+            "rotation": get_z_rotation(np.pi / 2),
+            "translation": [10.0, 20.0, 5.0],
+            "token": "c",
+        },
+    ]
+
+
+def test_ego_pose_table_from_list(ego_pose_list):
+    table = EgoPoseTable.from_list(ego_pose_list)
+
+    assert table.timestamps.tolist() == [1000, 2000, 3000]
+    assert table.tokens.tolist() == ["a", "b", "c"]
+    assert table.to_list() == sorted(ego_pose_list, key=lambda d: d["timestamp"])
+
+
+def test_ego_pose_table_nearest(ego_pose_list):
+    table = EgoPoseTable.from_list(ego_pose_list)
+    queries = [0, 1000, 1500, 1501, 2600, 9000]
+
+    indices = table.nearest(queries)
+
+    timestamps = table.timestamps.tolist()
+    assert table.timestamps[indices].tolist() == [
+        get_closest_match(timestamps, q) for q in queries
+    ]
+
+
+def test_ego_pose_table_interpolate(ego_pose_list):
+    table = EgoPoseTable.from_list(ego_pose_list)
+
+    rotations, translations = table.interpolate([500, 1500, 2500, 3500])
+
+    assert np.allclose(translations[0], [0.0, 0.0, 0.0])
+    assert np.allclose(translations[1], [5.0, 10.0, 0.0])
+    assert np.allclose(translations[2], [10.0, 20.0, 2.5])
+    assert np.allclose(translations[3], [10.0, 20.0, 5.0])
+
+    assert np.allclose(rotations[0], get_z_rotation(0.0))
+    assert np.allclose(rotations[1], get_z_rotation(np.pi / 4))
+    assert np.allclose(rotations[2], get_z_rotation(np.pi / 2))
+    assert np.allclose(np.linalg.norm(rotations, axis=1), 1.0)
+
+
+@pytest.mark.parametrize("file_name", ["ego_pose_table", "ego_pose.npz"])
+def test_ego_pose_table_save_and_load(tmp_path, ego_pose_list, file_name):
+    table = EgoPoseTable.from_list(ego_pose_list)
+    path = str(tmp_path / file_name)
+
+    table.save(path)
+    loaded = EgoPoseTable.load(path)
+
+    assert np.array_equal(loaded.timestamps, table.timestamps)
+    assert np.array_equal(loaded.rotations, table.rotations)
+    assert np.array_equal(loaded.translations, table.translations)
+    assert loaded.to_list() == table.to_list()
+
+
+def test_ego_pose_validation_report():
+    unit = get_z_rotation(0.0)
+    ego_pose_list = [
+        {"timestamp": 1000, "rotation": unit, "translation": [0.0, 0.0, 0.0]},
+        {"timestamp": 1000.5, "rotation": unit, "translation": [0.0, 0.0, 0.0]},
+        {"timestamp": 2000, "rotation": [1.0, 0.0, 0.0], "translation": [0.0] * 3},
+        {"timestamp": 2000, "rotation": unit, "translation": [0.0, float("nan"), 0]},
+        {"timestamp": 1500, "rotation": [2.0, 0.0, 0.0, 0.0], "translation": [0] * 3},
+        {"rotation": unit},
+        {"timestamp": 3000, "rotation": unit, "translation": [0.0, "a", 0.0]},
+        {"timestamp": 4000, "rotation": unit, "translation": [0.0, 0.0, 0.0]},
+    ]
+
+    report = get_ego_pose_validation_report(ego_pose_list)
+
+    assert report == {
+        "missing_timestamp": [5],
+        "timestamp_not_int": [1],
+        "timestamp_not_increasing": [3, 4],
+        "duplicate_timestamp": [2, 3],
+        "missing_rotation": [],
+        "rotation_not_length_4": [2],
+        "rotation_not_unit": [4],
+        "missing_translation": [5],
+        "translation_not_length_3": [],
+        "not_finite": [3, 6],
+    }
+
+    with pytest.raises(AssertionError):
+        validate_ego_pose(ego_pose_list)
+
+
+def test_validate_ego_pose_speed():
+    def validate_loop(ego_pose_list):
+        # The per-pose loop validate_ego_pose used to run
+        for ego_pose in ego_pose_list:
+            assert "timestamp" in ego_pose
+            assert isinstance(ego_pose["timestamp"], int)
+            assert "rotation" in ego_pose
+            assert len(ego_pose["rotation"]) == 4
+            assert "translation" in ego_pose
+            assert len(ego_pose["translation"]) == 3
+
+    def get_time(validate):
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            validate(ego_pose_list)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    unit = [1.0, 0.0, 0.0, 0.0]
+    ego_pose_list = [
+        {"timestamp": i, "rotation": unit, "translation": [float(i), 0.0, 0.0]}
+        for i in range(100000)
+    ]
+
+    # Leave room for noise on shared machines
+    assert get_time(validate_ego_pose) < 1.5 * get_time(validate_loop)
+
+
+def test_validate_ego_pose(ego_pose_list):
+    # Unsorted poses are reported but are still a valid format
+    validate_ego_pose(ego_pose_list)
+    assert get_ego_pose_validation_report(ego_pose_list)[
+        "timestamp_not_increasing"
+    ] == [1]
@@ -0,0 +1,69 @@
+import cv2
+import numpy as np
+import pytest
+
+from universal_devkit.prepare_data.image_utils import (
+    get_image_dimensions,
+    read_image_dimensions_from_header,
+)
+
+# Image sizes are deliberately not square so width/height swaps are caught
+IMAGE_WIDTH = 37
+IMAGE_HEIGHT = 21
+
+
+@pytest.fixture
+def image():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 255, size=(IMAGE_HEIGHT, IMAGE_WIDTH, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("extension", [".png", ".jpg", ".bmp", ".ppm"])
+def test_read_image_dimensions_from_header(tmp_path, image, extension):
+    image_path = str(tmp_path / ("image" + extension))
+    cv2.imwrite(image_path, image)
+
+    assert read_image_dimensions_from_header(image_path) == (
+        IMAGE_WIDTH,
+        IMAGE_HEIGHT,
+    )
+
+
+def test_read_ppm_dimensions_with_comments(tmp_path):
+    image_path = tmp_path / "image.pgm"
+    pixels = " ".join(["0"] * IMAGE_WIDTH * IMAGE_HEIGHT)
+    image_path.write_text(
+        "P2\n# created by a test\n{} {}\n255\n{}\n".format(
+            IMAGE_WIDTH, IMAGE_HEIGHT, pixels
+        )
+    )
+
+    assert read_image_dimensions_from_header(str(image_path)) == (
+        IMAGE_WIDTH,
+        IMAGE_HEIGHT,
+    )
+
+
+def test_read_jpeg_dimensions_with_exif(tmp_path, image):
+    image_path = tmp_path / "image.jpg"
+    _, encoded = cv2.imencode(".jpg", image)
+    encoded = encoded.tobytes()
+
+    # Insert a large APP1 segment after the SOI marker so the frame header is
+    # beyond the initial header read
+    app1_data = b"Exif\x00\x00" + bytes(20000)
+    app1 = b"\xff\xe1" + (len(app1_data) + 2).to_bytes(2, "big") + app1_data
+    image_path.write_bytes(encoded[:2] + app1 + encoded[2:])
+
+    assert read_image_dimensions_from_header(str(image_path)) == (
+        IMAGE_WIDTH,
+        IMAGE_HEIGHT,
+    )
+
+
+def test_get_image_dimensions_falls_back_to_cv2(tmp_path, image):
+    image_path = str(tmp_path / "image.tiff")
+    cv2.imwrite(image_path, image)
+
+    assert read_image_dimensions_from_header(image_path) is None
+    assert get_image_dimensions(image_path) == (IMAGE_WIDTH, IMAGE_HEIGHT)
@@ -0,0 +1,109 @@
+import random
+
+import pytest
+
+from universal_devkit.prepare_data.instance import (
+    factorize,
+    get_instance_data,
+    get_instance_data_columnar,
+    group_instances,
+)
+
+
+def create_annotation(token, instance_token, timestamp, category_token="car"):
+    return {
+        "token": token,
+        "instance_token": instance_token,
+        "timestamp": timestamp,
+        "category_token": category_token,
+    }
+
+
+def create_random_annotations(rng, num_annotations):
+    return [
+        create_annotation(
+            "annotation-{}".format(i),
+            "instance-{}".format(rng.randint(0, 5)),
+            rng.randint(0, 5),
+            "category-{}".format(rng.randint(0, 2)),
+        )
+        for i in range(num_annotations)
+    ]
+
+
+@pytest.mark.parametrize("get", [get_instance_data, get_instance_data_columnar])
+def test_get_instance_data(get):
+    annotations = [
+        create_annotation("a", "car", 2000),
+        create_annotation("b", "truck", 1000, "truck"),
+        # Both earlier and later than the first annotation of the car
+        create_annotation("c", "car", 3000, "bus"),
+        create_annotation("d", "car", 1000),
+    ]
+
+    assert get(annotations) == {
+        "car": {
+            "token": "car",
+            "category_token": "car",
+            "nbr_annotations": 3,
+            "first_annotation_token": "d",
+            "last_annotation_token": "c",
+        },
+        "truck": {
+            "token": "truck",
+            "category_token": "truck",
+            "nbr_annotations": 1,
+            "first_annotation_token": "b",
+            "last_annotation_token": "b",
+        },
+    }
+
+
+@pytest.mark.parametrize("get", [get_instance_data, get_instance_data_columnar])
+def test_first_and_last_annotations(get):
+    instance = get(
+        [
+            create_annotation("a", "car", 2000),
+            create_annotation("b", "car", 1000),
+            create_annotation("c", "car", 500),
+            create_annotation("d", "car", 3000),
+            create_annotation("e", "car", 3000),
+        ]
+    )["car"]
+
+    assert instance["first_annotation_token"] == "c"
+    # Ties go to the annotation that comes first
+    assert instance["last_annotation_token"] == "d"
+
+
+def test_get_instance_data_columnar_matches():
+    rng = random.Random(0)
+
+    for num_annotations in [0, 1, 2, 10, 100]:
+        annotations = create_random_annotations(rng, num_annotations)
+
+        expected = get_instance_data(annotations)
+        instance_data = get_instance_data_columnar(annotations)
+
+        assert instance_data == expected
+        assert list(instance_data) == list(expected)
+
+
+def test_factorize():
+    codes, uniques = factorize(["b", "a", "b", "c", "a"])
+
+    assert codes.tolist() == [0, 1, 0, 2, 1]
+    assert uniques == ["b", "a", "c"]
+
+
+def test_group_instances():
+    instances, counts, first_seen, earliest, latest = group_instances(
+        ["b", "a", "b", "b"], [5, 1, 3, 5]
+    )
+
+    assert instances == ["b", "a"]
+    assert counts.tolist() == [3, 1]
+    assert first_seen.tolist() == [0, 1]
+    assert earliest.tolist() == [2, 1]
+    # Ties go to the annotation that comes first
+    assert latest.tolist() == [0, 1]
@@ -0,0 +1,43 @@
+import pytest
+
+from universal_devkit.utils.json_backend import (
+    JSON_BACKEND_ENV_VAR,
+    get_available_backends,
+    get_json_backend,
+)
+from universal_devkit.utils.utils import read_json, write_json
+
+DATA = [
+    {
+        "token": "21b94b76565f49deb569fba4d3d623ca",
+        "translation": [6.536307742091793, -2.1117338632172125, 0.6549238563313258],
+        "attribute_tokens": [],
+        "filename": "samples/LIDAR_TOP/1532402927647951.pcd",
+        "num_lidar_pts": 12,
+        "is_key_frame": True,
+        "labeller": "ünïcode",
+    }
+]
+
+
+@pytest.mark.parametrize("backend", get_available_backends())
+def test_json_backend_round_trip(tmp_path, backend):
+    path = str(tmp_path / "data.json")
+
+    write_json(DATA, path, backend=backend)
+
+    assert read_json(path, backend=backend) == DATA
+    assert read_json(path, backend="json") == DATA
+
+
+def test_json_backend_from_environment(monkeypatch):
+    monkeypatch.setenv(JSON_BACKEND_ENV_VAR, "json")
+    assert get_json_backend().name == "json"
+
+    monkeypatch.delenv(JSON_BACKEND_ENV_VAR)
+    assert get_json_backend().name == get_available_backends()[0]
+
+
+def test_unknown_json_backend():
+    with pytest.raises(ValueError):
+        get_json_backend("not-a-backend")
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from universal_devkit.utils import JsonTableWriter, read_json, write_json_table
+
+
+def get_records():
+    # A generator so the records are never held in a list
+    for i in range(5):
+        yield {"token": str(i), "timestamp": i, "values": [i, i + 0.5]}
+
+
+def test_write_json_table(tmp_path):
+    output_path = str(tmp_path / "table.json")
+
+    count = write_json_table(get_records(), output_path)
+
+    assert count == 5
+    assert read_json(output_path) == list(get_records())
+
+
+def test_write_json_table_json_lines(tmp_path):
+    output_path = tmp_path / "table.jsonl"
+
+    write_json_table(get_records(), str(output_path), json_lines=True)
+
+    lines = output_path.read_text().splitlines()
+    assert [json.loads(line) for line in lines] == list(get_records())
+
+
+def test_write_empty_json_table(tmp_path):
+    output_path = str(tmp_path / "table.json")
+
+    with JsonTableWriter(output_path) as writer:
+        pass
+
+    assert writer.count == 0
+    assert read_json(output_path) == []
+
+
+@pytest.mark.parametrize("json_lines", [False, True])
+def test_json_table_writer_exception(tmp_path, json_lines):
+    output_path = tmp_path / "table.json"
+
+    with pytest.raises(RuntimeError):
+        with JsonTableWriter(str(output_path), json_lines=json_lines) as writer:
+            writer.write_all(get_records())
+            raise RuntimeError("Failed while writing")
+
+    # Neither the partial table nor the temporary file are left behind
+    assert list(tmp_path.iterdir()) == []
+
+    # An existing table is kept
+    write_json_table(get_records(), str(output_path), json_lines=json_lines)
+    contents = output_path.read_text()
+    with pytest.raises(RuntimeError):
+        with JsonTableWriter(str(output_path), json_lines=json_lines) as writer:
+            writer.write({"token": "partial"})
+            raise RuntimeError("Failed while writing")
+
+    assert output_path.read_text() == contents
+    assert list(tmp_path.iterdir()) == [output_path]
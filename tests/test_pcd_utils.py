@@ -0,0 +1,146 @@
+import struct
+
+import numpy as np
+import pytest
+
+from universal_devkit.prepare_data.pcd_utils import (
+    lzf_decompress,
+    read_pcd,
+    read_pcd_header,
+)
+from universal_devkit.prepare_data.sample import get_file_data
+
+# A lidar point with a padding field like the ones PCL writes
+POINT_DTYPE = np.dtype(
+    [
+        ("x", "<f4"),
+        ("y", "<f4"),
+        ("z", "<f4"),
+        ("intensity", "<u1"),
+        ("_", "<u1", (3,)),
+        ("ring", "<u2"),
+        ("time", "<f8"),
+    ]
+)
+
+HEADER = """# .PCD v0.7 - Point Cloud Data file format
+VERSION 0.7
+FIELDS x y z intensity _ ring time
+SIZE 4 4 4 1 1 2 8
+TYPE F F F U U U F
+COUNT 1 1 1 1 3 1 1
+WIDTH {points}
+HEIGHT 1
+VIEWPOINT 1 2 3 1 0 0 0
+POINTS {points}
+DATA {data}
+"""
+
+
+def create_points(num_points):
+    points = np.zeros(num_points, dtype=POINT_DTYPE)
+    points["x"] = np.arange(num_points) * 0.5
+    points["y"] = -np.arange(num_points)
+    points["z"] = 1.25
+    points["intensity"] = np.arange(num_points) % 256
+    points["ring"] = np.arange(num_points) % 32
+    points["time"] = np.arange(num_points) * 1e-3
+    return points
+
+
+def lzf_compress_literals(data):
+    """Encodes data as LZF literal runs (no back references)"""
+    output = b""
+    for i in range(0, len(data), 32):
+        run = data[i : i + 32]
+        output += bytes([len(run) - 1]) + run
+    return output
+
+
+def write_pcd(path, points, data):
+    header = HEADER.format(points=len(points), data=data).encode()
+
+    if data == "ascii":
+        lines = [
+            "{} {} {} {} {} {} {} {} {:.6f}".format(
+                p["x"], p["y"], p["z"], p["intensity"], *p["_"], p["ring"], p["time"]
+            )
+            for p in points
+        ]
+        payload = "".join(line + "\n" for line in lines).encode()
+    elif data == "binary":
+        payload = points.tobytes()
+    else:
+        # Each field is stored contiguously
+        uncompressed = b"".join(
+            np.ascontiguousarray(points[name]).tobytes() for name in POINT_DTYPE.names
+        )
+        compressed = lzf_compress_literals(uncompressed)
+        payload = struct.pack("<II", len(compressed), len(uncompressed)) + compressed
+
+    with open(path, "wb") as f:
+        f.write(header + payload)
+
+
+@pytest.mark.parametrize("data", ["ascii", "binary", "binary_compressed"])
+def test_read_pcd(tmp_path, data):
+    path = str(tmp_path / "test.pcd")
+    points = create_points(100)
+    write_pcd(path, points, data)
+
+    cloud = read_pcd(path)
+
+    assert cloud.num_points == 100
+    assert cloud.fields == ["x", "y", "z", "intensity", "_", "ring", "time"]
+    assert cloud.viewpoint == [1.0, 2.0, 3.0, 1.0, 0.0, 0.0, 0.0]
+    assert cloud.points.dtype == POINT_DTYPE
+    for name in POINT_DTYPE.names:
+        np.testing.assert_allclose(cloud.points[name], points[name], rtol=1e-6)
+
+
+def test_read_binary_pcd_is_memory_mapped(tmp_path):
+    path = str(tmp_path / "test.pcd")
+    write_pcd(path, create_points(10), "binary")
+
+    assert isinstance(read_pcd(path).points, np.memmap)
+    assert not isinstance(read_pcd(path, mmap=False).points, np.memmap)
+
+
+def test_read_empty_pcd(tmp_path):
+    path = str(tmp_path / "test.pcd")
+    write_pcd(path, create_points(0), "binary")
+
+    cloud = read_pcd(path)
+    assert cloud.num_points == 0
+    assert cloud.points.shape == (0,)
+
+
+def test_truncated_pcd(tmp_path):
+    path = tmp_path / "test.pcd"
+    write_pcd(str(path), create_points(10), "binary")
+    path.write_bytes(path.read_bytes()[:-1])
+
+    with pytest.raises(AssertionError, match="fewer points"):
+        read_pcd(str(path))
+
+
+def test_lzf_back_references():
+    # "abc" then a 6 byte back reference 3 bytes back (overlapping) and a
+    # 4 byte back reference 9 bytes back
+    compressed = bytes([2]) + b"abc" + bytes([4 << 5, 2]) + bytes([2 << 5, 8])
+
+    assert lzf_decompress(compressed, 13) == b"abcabcabcabca"
+
+
+def test_get_file_data(tmp_path):
+    path = str(tmp_path / "1000.pcd")
+    write_pcd(path, create_points(5), "binary_compressed")
+
+    assert read_pcd_header(path).data == "binary_compressed"
+    assert get_file_data(path, "radar") == {
+        "fileformat": ".pcd",
+        "height": 0,
+        "width": 0,
+        "num_points": 5,
+        "fields": ["x", "y", "z", "intensity", "_", "ring", "time"],
+    }
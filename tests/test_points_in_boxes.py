@@ -0,0 +1,158 @@
+import numpy as np
+import pytest
+
+from universal_devkit.prepare_data.points_in_boxes import (
+    count_points_in_boxes,
+    get_box_rotation_matrices,
+)
+from universal_devkit.prepare_data.sample_annotation import get_sample_annotation
+from universal_devkit.scripts.calculate_extrinsic_matrix import (
+    get_homogeneous_transformations,
+)
+from universal_devkit.scripts.supervisely_3d_to_universal import (
+    convert_supervisely_3d_to_universal,
+)
+from universal_devkit.utils.utils import read_json, write_json
+
+PCD_HEADER = (
+    "VERSION 0.7\nFIELDS x y z\nSIZE 4 4 4\nTYPE F F F\nCOUNT 1 1 1\n"
+    "WIDTH {points}\nHEIGHT 1\nPOINTS {points}\nDATA ascii\n"
+)
+
+
+def write_pcd(path, points):
+    with open(str(path), "w") as f:
+        f.write(PCD_HEADER.format(points=len(points)))
+        for point in points:
+            f.write("{} {} {}\n".format(*point))
+
+
+def count_brute_force(points, translations, sizes, rotations):
+    rotations = get_box_rotation_matrices(rotations)
+    counts = []
+    for translation, size, rotation in zip(translations, sizes, rotations):
+        local = (points - translation) @ rotation
+        counts.append(np.all(np.abs(local) <= np.asarray(size) / 2, axis=1).sum())
+    return np.array(counts)
+
+
+def create_boxes(rng, num_boxes, rotation_size):
+    translations = rng.uniform(-40, 40, (num_boxes, 3))
+    translations[:, 2] = rng.uniform(-1, 1, num_boxes)
+    sizes = rng.uniform(0.5, 6, (num_boxes, 3))
+    rotations = rng.normal(size=(num_boxes, rotation_size))
+    if rotation_size == 4:
+        rotations /= np.linalg.norm(rotations, axis=1, keepdims=True)
+    return translations, sizes, rotations
+
+
+@pytest.mark.parametrize("rotation_size", [3, 4])
+@pytest.mark.parametrize("cell_size", [None, 0.1, 100.0])
+def test_count_points_in_boxes(rotation_size, cell_size):
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-50, 50, (20000, 3))
+    points[:, 2] = rng.uniform(-3, 3, len(points))
+    translations, sizes, rotations = create_boxes(rng, 50, rotation_size)
+
+    counts = count_points_in_boxes(
+        points, translations, sizes, rotations, cell_size=cell_size
+    )
+
+    expected = count_brute_force(points, translations, sizes, rotations)
+    assert expected.sum() > 0
+    np.testing.assert_array_equal(counts, expected)
+
+
+def test_count_points_in_boxes_rotation_matrices():
+    rng = np.random.default_rng(1)
+    points = rng.uniform(-50, 50, (5000, 4))
+    translations, sizes, rotations = create_boxes(rng, 20, 4)
+
+    np.testing.assert_array_equal(
+        count_points_in_boxes(
+            points, translations, sizes, get_box_rotation_matrices(rotations)
+        ),
+        count_brute_force(points[:, :3], translations, sizes, rotations),
+    )
+
+
+def test_count_points_in_rotated_box():
+    # A 4x1x1 box rotated 90 degrees about z covers y in [-2, 2]
+    yaw = np.pi / 2
+    rotation = [np.cos(yaw / 2), 0.0, 0.0, np.sin(yaw / 2)]
+    points = [[0.0, 1.5, 0.0], [0.0, 2.0, 0.0], [1.5, 0.0, 0.0], [0.0, -1.9, 0.4]]
+
+    counts = count_points_in_boxes(points, [[0, 0, 0]], [[4, 1, 1]], [rotation])
+
+    assert counts.tolist() == [3]
+
+
+def test_count_points_in_boxes_empty():
+    box = ([[0, 0, 0]], [[1, 1, 1]], [[0, 0, 0]])
+    assert count_points_in_boxes(np.zeros((0, 3)), *box).tolist() == [0]
+
+    no_boxes = count_points_in_boxes(np.zeros((5, 3)), [], [], np.zeros((0, 4)))
+    assert no_boxes.shape == (0,)
+
+
+def test_get_sample_annotation_point_counts(tmp_path):
+    for sensor in ["LIDAR_TOP", "RADAR_FRONT"]:
+        (tmp_path / sensor / "annotations").mkdir(parents=True)
+
+    write_pcd(tmp_path / "LIDAR_TOP" / "1000.pcd", [[0, 0, 0], [0.2, 0, 0], [5, 5, 0]])
+    write_json(
+        [
+            {
+                "translation": [0.0, 0.0, 0.0],
+                "size": [1.0, 1.0, 1.0],
+                "rotation": [1.0, 0.0, 0.0, 0.0],
+            },
+            {
+                "translation": [5.0, 5.0, 0.0],
+                "size": [1.0, 1.0, 1.0],
+                "rotation": [1.0, 0.0, 0.0, 0.0],
+                "num_lidar_pts": 7,
+            },
+        ],
+        str(tmp_path / "LIDAR_TOP" / "annotations" / "1000.pcd.json"),
+    )
+
+    # The radar is 10m in front of the lidar
+    radar_path = str(tmp_path / "RADAR_FRONT" / "1000.pcd")
+    write_pcd(radar_path, [[-10, 0, 0], [-5, 5, 0], [-5, 5, 0.1], [0, 0, 0]])
+    radar_to_lidar = get_homogeneous_transformations(np.eye(3), [10.0, 0.0, 0.0])
+
+    annotations = get_sample_annotation(
+        str(tmp_path),
+        {
+            "filename": str(tmp_path / "LIDAR_TOP" / "1000.pcd"),
+            "sample_token": "s",
+            "token": "sd",
+            "timestamp": 1000,
+        },
+        radar_files=[(radar_path, radar_to_lidar)],
+    )
+
+    # Counts in the annotation file are kept
+    assert [ann["num_lidar_pts"] for ann in annotations] == [2, 7]
+    assert [ann["num_radar_pts"] for ann in annotations] == [1, 2]
+
+
+def test_supervisely_point_counts(tmp_path):
+    figure = {
+        "key": "figure",
+        "objectKey": "object",
+        "labelerLogin": "labeler",
+        "createdAt": "2021-01-01T00:00:00.000Z",
+        "geometry": {
+            "position": {"x": 0.0, "y": 0.0, "z": 0.0},
+            "dimensions": {"x": 4.0, "y": 1.0, "z": 1.0},
+            "rotation": {"x": 0.0, "y": 0.0, "z": np.pi / 2},
+        },
+    }
+    write_json({"figures": [figure]}, str(tmp_path / "1000.pcd.json"))
+    write_pcd(tmp_path / "1000.pcd", [[0, 1.5, 0], [1.5, 0, 0]])
+
+    convert_supervisely_3d_to_universal(str(tmp_path), str(tmp_path / "output"))
+
+    assert read_json(str(tmp_path / "output" / "1000.pcd.json"))[0]["num_lidar"] == 1
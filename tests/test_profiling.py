@@ -0,0 +1,75 @@
+import json
+
+from universal_devkit.prepare_data.scene import Scene, main
+from universal_devkit.scripts.create_synthetic_scene import create_synthetic_scene
+from universal_devkit.utils.profiling import PROFILE_ENV_VAR, Profiler
+
+SCENE_STAGES = [
+    "get_sensor_json",
+    "get_sensor_calibration",
+    "get_ego_pose_data",
+    "get_sample_json",
+    "get_sample_data (samples)",
+    "get_sample_data (sweeps)",
+    "get_sample_annotations",
+    "get_instance_data",
+]
+
+
+def test_profiler_stages():
+    profiler = Profiler(enabled=True, trace_memory=True)
+
+    with profiler.stage("outer") as outer:
+        with profiler.stage("inner", count=3):
+            data = [0] * 100000
+        outer.set_count(len(data))
+
+    @profiler.stage("decorated")
+    def decorated():
+        return sum(range(1000))
+
+    decorated()
+    decorated()
+
+    inner, outer, first, second = profiler.records
+    assert [record.name for record in profiler.records] == [
+        "inner",
+        "outer",
+        "decorated",
+        "decorated",
+    ]
+    assert (inner.count, outer.count) == (3, 100000)
+    assert outer.wall_time >= inner.wall_time >= 0
+    # The list is 800 KB and the outer stage includes the inner stage's peak
+    assert outer.peak_traced_memory >= inner.peak_traced_memory >= 800000
+    assert outer.max_rss > 0
+    assert "decorated" in profiler.format_table()
+
+
+def test_disabled_profiler():
+    profiler = Profiler()
+
+    with profiler.stage("stage") as stage:
+        stage.set_count(1)
+
+    assert profiler.stage("a") is profiler.stage("b")
+    assert profiler.records == []
+
+
+def test_scene_profile(tmp_path, monkeypatch, capsys):
+    create_synthetic_scene(str(tmp_path / "scene"), num_files=40)
+
+    report_path = tmp_path / "profile.json"
+    monkeypatch.setenv(PROFILE_ENV_VAR, str(report_path))
+    Scene(str(tmp_path / "scene"))
+
+    report = json.loads(report_path.read_text())
+    assert [record["name"] for record in report] == SCENE_STAGES
+    assert report[SCENE_STAGES.index("get_sample_data (samples)")]["count"] == 20
+
+    monkeypatch.delenv(PROFILE_ENV_VAR)
+    main(str(tmp_path / "scene"), str(tmp_path / "output"), profile=True)
+
+    table = capsys.readouterr().out
+    for stage in SCENE_STAGES + ["write_tables"]:
+        assert stage in table
@@ -0,0 +1,120 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from universal_devkit.prepare_data.ego_pose import EgoPoseTable
+from universal_devkit.scripts.ros_imu_pose import ImuPoseBuffer, ros_imu_pose
+
+NUM_MESSAGES = 10
+TOPIC = "/imu/data/raw"
+
+
+class FakeBag:
+    def __init__(self, messages):
+        self.messages = messages
+
+    def read_messages(self, topics=None):
+        for msg in self.messages:
+            yield TOPIC, msg, 0
+
+    def close(self):
+        pass
+
+
+def create_messages(num_messages):
+    messages = []
+
+    for i in range(num_messages):
+        stamp = SimpleNamespace(secs=1600000000 + i, nsecs=i * 1000)
+        orientation = SimpleNamespace(w=1.0, x=0.1 * i, y=0.2 * i, z=0.3 * i)
+        messages.append(
+            SimpleNamespace(
+                header=SimpleNamespace(stamp=stamp), orientation=orientation
+            )
+        )
+
+    return messages
+
+
+def get_expected_timestamps(num_messages):
+    return [(1600000000 + i) * 1000000000 + i * 1000 for i in range(num_messages)]
+
+
+def test_imu_pose_buffer_grows():
+    buffer = ImuPoseBuffer(capacity=1)
+
+    for i in range(5):
+        buffer.append(i, [1.0, 0.0, 0.0, i])
+
+    arrays = buffer.get_arrays()
+    assert len(buffer) == 5
+    assert arrays["timestamps"].tolist() == list(range(5))
+    assert arrays["rotations"][:, 3].tolist() == list(range(5))
+    assert arrays["translations"].shape == (5, 3)
+
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.get_arrays()["rotations"].shape == (0, 4)
+
+
+def test_ros_imu_pose_npz(tmp_path):
+    messages = create_messages(NUM_MESSAGES)
+    file_paths = ros_imu_pose(
+        "test.bag",
+        TOPIC,
+        str(tmp_path),
+        output_format="npz",
+        open_bag=lambda path: FakeBag(messages),
+    )
+
+    assert file_paths == [os.path.join(str(tmp_path), "imu.npz")]
+
+    table = EgoPoseTable.load(file_paths[0])
+    assert table.timestamps.tolist() == get_expected_timestamps(NUM_MESSAGES)
+    assert table.rotations[3].tolist() == [1.0, 0.1 * 3, 0.2 * 3, 0.3 * 3]
+    assert not table.translations.any()
+
+
+def test_ros_imu_pose_chunks(tmp_path):
+    messages = create_messages(NUM_MESSAGES)
+    file_paths = ros_imu_pose(
+        "test.bag",
+        TOPIC,
+        str(tmp_path),
+        output_format="npz",
+        chunk_size=4,
+        open_bag=lambda path: FakeBag(messages),
+    )
+
+    assert [os.path.basename(path) for path in file_paths] == [
+        "imu_00000.npz",
+        "imu_00001.npz",
+        "imu_00002.npz",
+    ]
+
+    timestamps = []
+    for path in file_paths:
+        with np.load(path) as arrays:
+            assert len(arrays["timestamps"]) <= 4
+            timestamps.extend(arrays["timestamps"].tolist())
+
+    assert timestamps == get_expected_timestamps(NUM_MESSAGES)
+
+
+def test_ros_imu_pose_parquet(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    messages = create_messages(NUM_MESSAGES)
+    (file_path,) = ros_imu_pose(
+        "test.bag",
+        TOPIC,
+        str(tmp_path),
+        output_format="parquet",
+        open_bag=lambda path: FakeBag(messages),
+    )
+
+    table = pq.read_table(file_path).to_pydict()
+    assert table["timestamps"] == get_expected_timestamps(NUM_MESSAGES)
+    assert table["rotations"][3] == [1.0, 0.1 * 3, 0.2 * 3, 0.3 * 3]
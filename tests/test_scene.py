@@ -0,0 +1,334 @@
+import cv2
+import numpy as np
+import pytest
+
+from universal_devkit.prepare_data.scene import Scene, main
+from universal_devkit.prepare_data.sensor import get_sensor_calibration
+from universal_devkit.utils.utils import TokenGenerator, read_json, write_json
+
+LIDAR_TIMESTAMPS = [1000, 2000, 3000]
+CAMERA_TIMESTAMPS = [1010, 1490, 1510, 2020, 2990]
+
+PCD_HEADER = (
+    "VERSION 0.7\nFIELDS x y z\nSIZE 4 4 4\nTYPE F F F\nCOUNT 1 1 1\n"
+    "WIDTH 1\nHEIGHT 1\nPOINTS 1\nDATA ascii\n"
+)
+
+
+@pytest.fixture
+def scene_dir(tmp_path):
+    """Creates a small scene with a lidar and a camera"""
+    for folder in ["samples", "sweeps"]:
+        for sensor in ["LIDAR_TOP", "CAM_FRONT"]:
+            (tmp_path / folder / sensor).mkdir(parents=True)
+
+    for sensor in ["LIDAR_TOP", "CAM_FRONT"]:
+        write_json(
+            {"translation": [0.0, 0.0, 0.0], "rotation": [1.0, 0.0, 0.0, 0.0]},
+            str(tmp_path / "samples" / sensor / "calibrated_sensor.json"),
+        )
+
+    (tmp_path / "samples" / "LIDAR_TOP" / "annotations").mkdir()
+    for timestamp in LIDAR_TIMESTAMPS:
+        (tmp_path / "samples" / "LIDAR_TOP" / "{}.pcd".format(timestamp)).write_text(
+            PCD_HEADER + "1.0 2.0 3.0\n"
+        )
+        write_json(
+            [
+                {
+                    "category_token": "car",
+                    "instance_token": "car-{}".format(i),
+                    "translation": [float(i), 0.0, 0.0],
+                    "size": [1.0, 1.0, 1.0],
+                    "rotation": [1.0, 0.0, 0.0, 0.0],
+                }
+                for i in range(2)
+            ],
+            str(
+                tmp_path
+                / "samples"
+                / "LIDAR_TOP"
+                / "annotations"
+                / "{}.pcd.json".format(timestamp)
+            ),
+        )
+
+    image = np.zeros((4, 6, 3), dtype=np.uint8)
+    for timestamp in CAMERA_TIMESTAMPS:
+        cv2.imwrite(
+            str(tmp_path / "samples" / "CAM_FRONT" / "{}.png".format(timestamp)),
+            image,
+        )
+        cv2.imwrite(
+            str(tmp_path / "sweeps" / "CAM_FRONT" / "{}.png".format(timestamp + 1)),
+            image,
+        )
+
+    write_json(
+        [
+            {
+                "timestamp": timestamp,
+                "rotation": [1.0, 0.0, 0.0, 0.0],
+                "translation": [0.0, 0.0, 0.0],
+            }
+            for timestamp in range(900, 3200, 100)
+        ],
+        str(tmp_path / "ego_pose.json"),
+    )
+
+    return tmp_path
+
+
+def get_comparable_sample_data(scene):
+    """Replaces the tokens in the sample data with the timestamps/file names
+    they refer to so two builds of the same scene can be compared
+    """
+    sample_timestamps = {d["token"]: t for t, d in scene.SAMPLE_DICT.items()}
+    ego_timestamps = {d["token"]: t for t, d in scene.EGO_POSE_DICT.items()}
+    filenames = {t: d["filename"] for t, d in scene.SAMPLE_DATA_DICT.items()}
+    filenames[""] = ""
+
+    return [
+        {
+            **d,
+            "token": d["filename"],
+            "sample_token": sample_timestamps[d["sample_token"]],
+            "ego_pose_token": ego_timestamps[d["ego_pose_token"]],
+            "calibrated_sensor_token": "",
+            "prev": filenames[d["prev"]],
+            "next": filenames[d["next"]],
+        }
+        for d in scene.SAMPLE_DATA_DICT.values()
+    ]
+
+
+def test_scene_sample_data(scene_dir):
+    scene = Scene(str(scene_dir))
+
+    assert scene.SAMPLE_TIMESTAMPS == LIDAR_TIMESTAMPS
+    assert len(scene.SAMPLE_DATA_DICT) == 2 * len(CAMERA_TIMESTAMPS) + len(
+        LIDAR_TIMESTAMPS
+    )
+
+    camera_data = [
+        d
+        for d in get_comparable_sample_data(scene)
+        if d["is_key_frame"] and d["filename"].endswith(".png")
+    ]
+    assert [d["timestamp"] for d in camera_data] == CAMERA_TIMESTAMPS
+    assert [d["sample_token"] for d in camera_data] == [1000, 1000, 2000, 2000, 3000]
+    assert [d["ego_pose_token"] for d in camera_data] == [1000, 1500, 1500, 2000, 3000]
+    assert camera_data[0]["prev"] == ""
+    assert camera_data[0]["next"] == camera_data[1]["filename"]
+    assert camera_data[-1]["next"] == ""
+    assert all(d["width"] == 6 and d["height"] == 4 for d in camera_data)
+
+    lidar_data = [
+        d for d in scene.SAMPLE_DATA_DICT.values() if d["fileformat"] == ".pcd"
+    ]
+    assert all(d["num_points"] == 1 for d in lidar_data)
+    assert all(d["fields"] == ["x", "y", "z"] for d in lidar_data)
+
+    assert len(scene.SAMPLE_ANNOTATIONS) == 2 * len(LIDAR_TIMESTAMPS)
+    assert len(scene.INSTANCE_DATA_DICT) == 2
+
+    # The annotations of each instance are linked in timestamp order
+    tokens = {ann["token"]: ann for ann in scene.SAMPLE_ANNOTATIONS}
+    for instance in scene.INSTANCE_DATA_DICT.values():
+        ann = tokens[instance["first_annotation_token"]]
+        timestamps = [ann["timestamp"]]
+        while ann["next"]:
+            assert tokens[ann["next"]]["prev"] == ann["token"]
+            ann = tokens[ann["next"]]
+            timestamps.append(ann["timestamp"])
+        assert timestamps == LIDAR_TIMESTAMPS
+
+
+def test_scene_relative_input(scene_dir, monkeypatch):
+    monkeypatch.chdir(scene_dir.parent)
+
+    scene = Scene(scene_dir.name)
+
+    # The annotation files are found the same way as with an absolute path
+    assert len(scene.SAMPLE_ANNOTATIONS) == 2 * len(LIDAR_TIMESTAMPS)
+    assert {ann["instance_token"] for ann in scene.SAMPLE_ANNOTATIONS} == {
+        "car-0",
+        "car-1",
+    }
+
+
+def test_scene_workers_match_serial(scene_dir):
+    serial_scene = Scene(str(scene_dir))
+    parallel_scene = Scene(str(scene_dir), workers=2)
+
+    assert get_comparable_sample_data(serial_scene) == get_comparable_sample_data(
+        parallel_scene
+    )
+
+    # prev and next are annotation tokens
+    ignore_keys = ["token", "sample_token", "prev", "next"]
+    assert [
+        {k: v for k, v in d.items() if k not in ignore_keys}
+        for d in serial_scene.SAMPLE_ANNOTATIONS
+    ] == [
+        {k: v for k, v in d.items() if k not in ignore_keys}
+        for d in parallel_scene.SAMPLE_ANNOTATIONS
+    ]
+
+
+def test_scene_manifest_rebuild(scene_dir, tmp_path_factory, monkeypatch):
+    import universal_devkit.prepare_data.scene as scene_module
+
+    manifest_path = str(tmp_path_factory.mktemp("output") / "manifest.json")
+    first_scene = Scene(str(scene_dir), manifest_path=manifest_path)
+
+    # Relabel a single annotation file
+    relabeled_path = (
+        scene_dir / "samples" / "LIDAR_TOP" / "annotations" / "2000.pcd.json"
+    )
+    write_json(
+        [
+            {
+                "category_token": "truck",
+                "instance_token": "truck-0",
+                "translation": [0.0, 0.0, 0.0],
+                "size": [1.0, 1.0, 1.0],
+                "rotation": [1.0, 0.0, 0.0, 0.0],
+            }
+        ],
+        str(relabeled_path),
+    )
+
+    # Only the changed annotation file should be read again
+    read_files = []
+    get_sample_annotation = scene_module.get_sample_annotation
+
+    def tracked_get_sample_annotation(
+        root_data_dir, sample_dict, token_generator, radar_files
+    ):
+        annotations = get_sample_annotation(
+            root_data_dir, sample_dict, token_generator, radar_files
+        )
+        if annotations:
+            read_files.append(sample_dict["filename"])
+        return annotations
+
+    monkeypatch.setattr(
+        scene_module, "get_sample_annotation", tracked_get_sample_annotation
+    )
+    monkeypatch.setattr(scene_module, "get_file_data", None)
+
+    # The unchanged ego poses should be loaded from the cached table
+    monkeypatch.setattr(scene_module, "get_ego_pose_data", None)
+
+    second_scene = Scene(str(scene_dir), manifest_path=manifest_path)
+
+    assert read_files == [str(scene_dir / "samples" / "LIDAR_TOP" / "2000.pcd")]
+    assert second_scene.SCENE_TOKEN == first_scene.SCENE_TOKEN
+    assert list(second_scene.SAMPLE_DATA_DICT) == list(first_scene.SAMPLE_DATA_DICT)
+    assert second_scene.SAMPLE_DATA_DICT == first_scene.SAMPLE_DATA_DICT
+    assert second_scene.EGO_POSE_DICT == first_scene.EGO_POSE_DICT
+
+    first_annotations = {a["token"]: a for a in first_scene.SAMPLE_ANNOTATIONS}
+    second_annotations = {a["token"]: a for a in second_scene.SAMPLE_ANNOTATIONS}
+    assert len(second_annotations) == len(first_annotations) - 1
+    assert set(second_annotations) < set(first_annotations)
+    assert sorted(second_scene.INSTANCE_DATA_DICT) == ["car-0", "car-1", "truck-0"]
+
+
+def test_scene_manifest_rebuild_point_counts(scene_dir, tmp_path_factory):
+    manifest_path = str(tmp_path_factory.mktemp("output") / "manifest.json")
+    first_scene = Scene(str(scene_dir), manifest_path=manifest_path)
+    assert [ann["num_lidar_pts"] for ann in first_scene.SAMPLE_ANNOTATIONS] == [0] * 6
+
+    # Only the point cloud changes, not the annotation file
+    (scene_dir / "samples" / "LIDAR_TOP" / "2000.pcd").write_text(
+        PCD_HEADER + "0.0 0.0 0.0\n"
+    )
+
+    second_scene = Scene(str(scene_dir), manifest_path=manifest_path)
+
+    assert [ann["num_lidar_pts"] for ann in second_scene.SAMPLE_ANNOTATIONS] == [
+        0,
+        0,
+        1,
+        0,
+        0,
+        0,
+    ]
+    assert [ann["token"] for ann in second_scene.SAMPLE_ANNOTATIONS] == [
+        ann["token"] for ann in first_scene.SAMPLE_ANNOTATIONS
+    ]
+
+
+def test_scene_rebuild_tracked_instance_tokens(scene_dir, tmp_path_factory):
+    # Without instance tokens in the annotation files the objects are tracked
+    for annotation_path in (
+        scene_dir / "samples" / "LIDAR_TOP" / "annotations"
+    ).iterdir():
+        annotations = read_json(str(annotation_path))
+        for annotation in annotations:
+            del annotation["instance_token"]
+        write_json(annotations, str(annotation_path))
+
+    output_dir = tmp_path_factory.mktemp("output")
+
+    def build():
+        # Random tokens, so only the manifest keeps them the same
+        main(str(scene_dir), str(output_dir))
+        return read_json(str(output_dir / "sample_annotation.json"))
+
+    first_annotations = build()
+    second_annotations = build()
+
+    instance_tokens = [ann["instance_token"] for ann in first_annotations]
+    assert len(set(instance_tokens)) == 2
+    assert instance_tokens[::2] == [instance_tokens[0]] * 3
+    assert second_annotations == first_annotations
+
+
+def test_scene_deterministic_tokens(scene_dir):
+    first_scene = Scene(str(scene_dir), token_generator=TokenGenerator("scene"))
+    second_scene = Scene(
+        str(scene_dir), token_generator=TokenGenerator("scene"), workers=2
+    )
+
+    assert first_scene.SCENE_TOKEN == second_scene.SCENE_TOKEN
+    assert first_scene.SAMPLE_DATA_DICT == second_scene.SAMPLE_DATA_DICT
+    assert first_scene.SAMPLE_ANNOTATIONS == second_scene.SAMPLE_ANNOTATIONS
+
+
+def test_calibration_tokens_change_with_calibration(scene_dir):
+    sample_dir = str(scene_dir / "samples")
+    sensors = {"LIDAR_TOP": {"token": "lidar"}, "CAM_FRONT": {"token": "camera"}}
+
+    def get_tokens():
+        calibration = get_sensor_calibration(
+            sample_dir, sensors, token_generator=TokenGenerator("scene")
+        )
+        return {channel: calib["token"] for channel, calib in calibration.items()}
+
+    first_tokens = get_tokens()
+    assert get_tokens() == first_tokens
+
+    write_json(
+        {"translation": [0.0, 0.0, 1.5], "rotation": [1.0, 0.0, 0.0, 0.0]},
+        str(scene_dir / "samples" / "LIDAR_TOP" / "calibrated_sensor.json"),
+    )
+
+    second_tokens = get_tokens()
+    assert second_tokens["LIDAR_TOP"] != first_tokens["LIDAR_TOP"]
+    assert second_tokens["CAM_FRONT"] == first_tokens["CAM_FRONT"]
+
+
+def test_scene_write_tables(scene_dir, tmp_path_factory):
+    output_dir = tmp_path_factory.mktemp("output")
+    scene = Scene(str(scene_dir))
+
+    counts = scene.write_tables(str(output_dir))
+
+    sample_data = read_json(str(output_dir / "sample_data.json"))
+    assert counts["sample_data"] == len(sample_data) == len(scene.SAMPLE_DATA_DICT)
+    assert sample_data == list(scene.SAMPLE_DATA_DICT.values())
+    assert counts["sample_annotation"] == len(scene.SAMPLE_ANNOTATIONS)
+    assert counts["instance"] == 2
@@ -1,4 +1,6 @@
 import shutil
+import subprocess
+import sys
 
 from utils import equal_dicts, get_relative_path
 
@@ -44,3 +46,24 @@ def test_supervisely_3d_to_universal_single_file():
         assert equal_dicts(output_d, correct_d, ignore_keys=ignore_keys)
 
     shutil.rmtree(output_file_dir)
+
+
+def test_supervisely_3d_to_universal_lazy_imports(tmp_path):
+    # Converting without point clouds or objects to link shouldn't load numpy
+    code = (
+        "import sys\n"
+        "from universal_devkit.scripts.supervisely_3d_to_universal import (\n"
+        "    convert_supervisely_3d_to_universal,\n"
+        ")\n"
+        "convert_supervisely_3d_to_universal({!r}, {!r})\n"
+        "print('numpy' in sys.modules)\n"
+    ).format(
+        str(get_relative_path("assets/supervisely_annotations/single_file_input")),
+        str(tmp_path),
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+
+    assert output.strip() == "False"
+    assert (tmp_path / "input.pcd.json").exists()
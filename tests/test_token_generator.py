@@ -0,0 +1,41 @@
+import pickle
+
+from universal_devkit.utils import TokenGenerator, create_token
+
+
+def test_random_tokens_are_unique():
+    token_generator = TokenGenerator(batch_size=16)
+
+    tokens = [token_generator.create_token() for _ in range(100)]
+    tokens.extend(token_generator.create_tokens(range(100)))
+
+    assert len(set(tokens)) == 200
+    assert all(len(token) == 32 for token in tokens)
+    assert all(int(token, 16) >= 0 for token in tokens)
+
+
+def test_deterministic_tokens():
+    token_generator = TokenGenerator("scene-a")
+
+    token = token_generator.create_token("CAM_FRONT", 1532402927647951)
+
+    assert len(token) == 32
+    assert token == TokenGenerator("scene-a").create_token(
+        "CAM_FRONT", 1532402927647951
+    )
+    assert token != TokenGenerator("scene-b").create_token(
+        "CAM_FRONT", 1532402927647951
+    )
+    assert token != token_generator.create_token("CAM_FRONT", 1532402927647952)
+    assert token_generator.create_token("a/b") != token_generator.create_token("a", "b")
+    assert token_generator.create_tokens([("CAM_FRONT", 1532402927647951)]) == [token]
+    assert create_token(token_generator, ("CAM_FRONT", 1532402927647951)) == token
+
+
+def test_pickled_generator_does_not_share_buffer():
+    token_generator = TokenGenerator()
+    token_generator.create_token()
+
+    copy = pickle.loads(pickle.dumps(token_generator))
+
+    assert copy.create_token() != token_generator.create_token()
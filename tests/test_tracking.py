@@ -0,0 +1,193 @@
+import itertools
+import time
+
+import numpy as np
+import pytest
+
+from universal_devkit.prepare_data.tracking import (
+    linear_sum_assignment,
+    match_greedy,
+    match_hungarian,
+    track_instances,
+)
+from universal_devkit.scripts.supervisely_3d_to_universal import (
+    convert_supervisely_3d_to_universal,
+)
+from universal_devkit.utils.utils import TokenGenerator, read_json, write_json
+
+
+def create_annotation(token, x, y=0.0, category="car", instance_token=""):
+    return {
+        "token": token,
+        "instance_token": instance_token,
+        "category_token": category,
+        "translation": [x, y, 0.0],
+        "size": [4.0, 2.0, 1.5],
+        "rotation": [1.0, 0.0, 0.0, 0.0],
+        "prev": "",
+        "next": "",
+    }
+
+
+def create_frames(num_frames, num_objects, speed=0.5):
+    """Creates objects 10m apart that move along x"""
+    return [
+        [
+            create_annotation("{}-{}".format(frame, i), i * 10.0 + frame * speed)
+            for i in range(num_objects)
+        ]
+        for frame in range(num_frames)
+    ]
+
+
+def test_linear_sum_assignment():
+    rng = np.random.default_rng(0)
+
+    for _ in range(100):
+        num_rows, num_columns = (int(n) for n in rng.integers(1, 6, 2))
+        costs = rng.integers(0, 10, (num_rows, num_columns)).astype(float)
+
+        rows, columns = linear_sum_assignment(costs)
+
+        assert len(rows) == min(num_rows, num_columns)
+        assert len(set(rows)) == len(set(columns)) == len(rows)
+        # Try every way to assign the smaller side to the larger side
+        if num_rows <= num_columns:
+            best = min(
+                costs[range(num_rows), list(perm)].sum()
+                for perm in itertools.permutations(range(num_columns), num_rows)
+            )
+        else:
+            best = min(
+                costs[list(perm), range(num_columns)].sum()
+                for perm in itertools.permutations(range(num_rows), num_columns)
+            )
+        assert costs[rows, columns].sum() == pytest.approx(best)
+
+
+@pytest.mark.parametrize("match", [match_hungarian, match_greedy])
+def test_match_max_cost(match):
+    costs = np.array([[1.0, 0.5], [np.inf, 3.0]])
+
+    rows, columns = match(costs, 2.0)
+
+    assert rows.tolist() == [0]
+    assert columns.tolist() == [1]
+
+
+def test_hungarian_matches_more_than_greedy():
+    # Greedy takes (0, 0) first so row 1 can't be matched
+    costs = np.array([[0.1, 0.2], [0.3, 5.0]])
+
+    assert len(match_greedy(costs, 1.0)[0]) == 1
+    rows, columns = match_hungarian(costs, 1.0)
+    assert rows.tolist() == [0, 1]
+    assert columns.tolist() == [1, 0]
+
+
+@pytest.mark.parametrize("cost", ["distance", "iou"])
+@pytest.mark.parametrize("method", ["hungarian", "greedy"])
+def test_track_instances(cost, method):
+    frames = create_frames(5, 3)
+    # Change the order of the boxes in every other frame
+    for annotations in frames[1::2]:
+        annotations.reverse()
+
+    track_instances(frames, cost=cost, method=method)
+
+    annotations = [ann for annotations in frames for ann in annotations]
+    assert len({ann["instance_token"] for ann in annotations}) == 3
+
+    for i in range(3):
+        track = [ann for ann in annotations if ann["token"].endswith("-{}".format(i))]
+        tokens = [ann["token"] for ann in track]
+        assert len({ann["instance_token"] for ann in track}) == 1
+        assert [ann["prev"] for ann in track] == [""] + tokens[:-1]
+        assert [ann["next"] for ann in track] == tokens[1:] + [""]
+
+
+def test_track_instances_keeps_user_tokens():
+    frames = [
+        [create_annotation("a", 0.0, instance_token="user")],
+        [
+            create_annotation("b", 0.5),
+            create_annotation("c", 0.2, instance_token="user"),
+        ],
+        [create_annotation("d", 0.25)],
+    ]
+
+    track_instances(frames)
+
+    # "b" can't join the instance that "c" is already part of
+    assert frames[1][0]["instance_token"] not in ["", "user"]
+    assert frames[1][1]["instance_token"] == "user"
+    assert frames[2][0]["instance_token"] == "user"
+    assert frames[0][0]["next"] == "c"
+    assert frames[2][0]["prev"] == "c"
+
+
+def test_track_instances_new_objects():
+    frames = [
+        [create_annotation("a", 0.0)],
+        # Too far away and a different category
+        [create_annotation("b", 5.0), create_annotation("c", 0.1, category="truck")],
+        [],
+        # Frames without annotations end the tracks
+        [create_annotation("d", 5.0)],
+        [{"token": "e", "instance_token": "", "prev": "", "next": ""}],
+    ]
+
+    track_instances(frames, token_generator=TokenGenerator("tracking"))
+
+    tokens = [ann["instance_token"] for annotations in frames for ann in annotations]
+    assert len(set(tokens)) == len(tokens)
+    assert all(ann["prev"] == "" for annotations in frames for ann in annotations)
+
+
+def test_track_instances_random_tokens_are_stable():
+    # The same annotation tokens give the same new instance tokens
+    first_frames = create_frames(3, 2)
+    second_frames = create_frames(3, 2)
+
+    track_instances(first_frames)
+    track_instances(second_frames, token_generator=TokenGenerator())
+
+    assert first_frames == second_frames
+    assert first_frames[0][0]["instance_token"] != ""
+
+
+def test_track_instances_scales_linearly():
+    def get_time(num_frames):
+        frames = create_frames(num_frames, 10)
+        start = time.perf_counter()
+        track_instances(frames)
+        return time.perf_counter() - start
+
+    get_time(10)
+    # 5x the frames should take about 5x as long
+    assert get_time(1000) < 4 * 5 * get_time(200)
+
+
+def test_supervisely_instances(tmp_path):
+    for timestamp, x in [(1000, 0.0), (2000, 0.5)]:
+        figure = {
+            "key": "figure-{}".format(timestamp),
+            "objectKey": "object",
+            "labelerLogin": "labeler",
+            "createdAt": "2021-01-01T00:00:00.000Z",
+            "geometry": {
+                "position": {"x": x, "y": 0.0, "z": 0.0},
+                "dimensions": {"x": 4.0, "y": 2.0, "z": 1.5},
+                "rotation": {"x": 0.0, "y": 0.0, "z": 0.0},
+            },
+        }
+        path = tmp_path / "{}.pcd.json".format(timestamp)
+        write_json({"figures": [figure]}, str(path))
+
+    convert_supervisely_3d_to_universal(str(tmp_path), str(tmp_path / "output"))
+
+    first = read_json(str(tmp_path / "output" / "1000.pcd.json"))[0]
+    second = read_json(str(tmp_path / "output" / "2000.pcd.json"))[0]
+    assert first["instance_token"] == second["instance_token"]
+    assert first["next"] == second["token"]
+    assert second["prev"] == first["token"]
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from universal_devkit.prepare_data.transform_tree import TransformTree
+from universal_devkit.scripts.calculate_extrinsic_matrix import (
+    get_relative_transformation,
+    rotation_matrices_to_quaternions,
+    static_transform_to_extrinsic,
+)
+from universal_devkit.utils.utils import write_json
+
+# The static transforms from the __main__ block of calculate_extrinsic_matrix
+CAMERA_TO_BASE = static_transform_to_extrinsic([0.5080, 0.0, 0.1778, 0, 0.05, 0])
+LIDAR_TO_BASE = static_transform_to_extrinsic([0.4445, 0.0, 0.09525, 0.0, 0.06981, 0.0])
+
+
+def get_calibration(transform):
+    return {
+        "translation": transform[:3, 3].tolist(),
+        "rotation": rotation_matrices_to_quaternions(transform).tolist(),
+        "camera_intrinsic": [],
+    }
+
+
+@pytest.fixture
+def scene_dir(tmp_path):
+    for sensor, transform in [
+        ("CAM_FRONT", CAMERA_TO_BASE),
+        ("LIDAR_TOP", LIDAR_TO_BASE),
+    ]:
+        (tmp_path / "samples" / sensor).mkdir(parents=True)
+        write_json(
+            get_calibration(transform),
+            str(tmp_path / "samples" / sensor / "calibrated_sensor.json"),
+        )
+
+    # Sensors without a calibration are skipped
+    (tmp_path / "samples" / "RADAR_FRONT").mkdir()
+    return tmp_path
+
+
+def test_from_scene(scene_dir):
+    tree = TransformTree.from_scene(str(scene_dir))
+
+    assert tree.frames == ["CAM_FRONT", "LIDAR_TOP", "ego"]
+    assert np.allclose(tree.get_transform("CAM_FRONT", "ego"), CAMERA_TO_BASE)
+    assert np.allclose(
+        tree.get_transform("ego", "LIDAR_TOP"), np.linalg.inv(LIDAR_TO_BASE)
+    )
+    assert np.allclose(
+        tree.get_transform("LIDAR_TOP", "CAM_FRONT"),
+        get_relative_transformation(CAMERA_TO_BASE, LIDAR_TO_BASE),
+    )
+    assert np.allclose(tree.get_transform("LIDAR_TOP", "LIDAR_TOP"), np.eye(4))
+
+
+def test_transform_points(scene_dir):
+    tree = TransformTree.from_scene(str(scene_dir))
+    points = np.random.default_rng(0).uniform(-10, 10, size=(100, 3))
+
+    camera_points = tree.transform_points(points, "LIDAR_TOP", "CAM_FRONT")
+    lidar_points = tree.transform_points(camera_points, "CAM_FRONT", "LIDAR_TOP")
+    assert np.allclose(lidar_points, points)
+
+    homogeneous = np.hstack([points, np.ones((100, 1))])
+    transform = tree.get_transform("LIDAR_TOP", "CAM_FRONT")
+    assert np.allclose(camera_points, (homogeneous @ transform.T)[:, :3])
+
+
+def test_multi_level_paths():
+    tree = TransformTree()
+    tree.set_transform("CAM_FRONT", "CAMERA_RIG", CAMERA_TO_BASE)
+    tree.set_transform("CAMERA_RIG", "ego", LIDAR_TO_BASE)
+    tree.set_transform("LIDAR_TOP", "ego", LIDAR_TO_BASE)
+
+    cam_to_ego = LIDAR_TO_BASE @ CAMERA_TO_BASE
+    assert np.allclose(tree.get_transform("CAM_FRONT", "ego"), cam_to_ego)
+    assert np.allclose(
+        tree.get_transform("CAM_FRONT", "LIDAR_TOP"),
+        np.linalg.inv(LIDAR_TO_BASE) @ cam_to_ego,
+    )
+    assert np.allclose(
+        tree.get_transform("CAMERA_RIG", "CAM_FRONT"), np.linalg.inv(CAMERA_TO_BASE)
+    )
+
+    with pytest.raises(AssertionError, match="Unable to find"):
+        tree.get_transform("CAM_FRONT", "map")
+
+    with pytest.raises(AssertionError, match="cycle"):
+        tree.set_transform("ego", "CAM_FRONT", np.eye(4))
+
+
+def test_cache_invalidation():
+    tree = TransformTree()
+    tree.set_transform("CAM_FRONT", "ego", CAMERA_TO_BASE)
+    tree.set_transform("LIDAR_TOP", "ego", LIDAR_TO_BASE)
+    tree.set_transform("RADAR_FRONT", "ego", np.eye(4))
+
+    lidar_to_camera = tree.get_transform("LIDAR_TOP", "CAM_FRONT")
+    radar_to_lidar = tree.get_transform("RADAR_FRONT", "LIDAR_TOP")
+
+    # Cached transforms are returned without recomputing them
+    assert tree.get_transform("LIDAR_TOP", "CAM_FRONT") is lidar_to_camera
+    assert not lidar_to_camera.flags.writeable
+
+    # Updating the camera only invalidates entries that use the camera
+    tree.set_calibration("CAM_FRONT", get_calibration(np.eye(4)))
+    assert tree.get_transform("RADAR_FRONT", "LIDAR_TOP") is radar_to_lidar
+
+    updated = tree.get_transform("LIDAR_TOP", "CAM_FRONT")
+    assert updated is not lidar_to_camera
+    assert np.allclose(updated, LIDAR_TO_BASE)
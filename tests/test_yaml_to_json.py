@@ -0,0 +1,170 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from universal_devkit.prepare_data.yaml_to_json import (
+    main,
+    message_to_dict,
+    read_bag_messages,
+)
+from universal_devkit.utils.utils import read_json
+
+NUM_MESSAGES = 25
+
+
+class Message:
+    # Stand-in for a genpy message which stores its fields in __slots__
+    __slots__ = []
+
+    def __init__(self, **fields):
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+
+class Time(Message):
+    __slots__ = ["secs", "nsecs"]
+
+
+class Header(Message):
+    __slots__ = ["seq", "stamp", "frame_id"]
+
+
+class Vector3(Message):
+    __slots__ = ["x", "y", "z"]
+
+
+class Quaternion(Message):
+    __slots__ = ["x", "y", "z", "w"]
+
+
+class Imu(Message):
+    __slots__ = [
+        "header",
+        "orientation",
+        "orientation_covariance",
+        "angular_velocity",
+        "angular_velocity_covariance",
+        "linear_acceleration",
+        "linear_acceleration_covariance",
+    ]
+
+
+def create_imu_messages(num_messages):
+    rng = np.random.default_rng(0)
+
+    for i in range(num_messages):
+        yield Imu(
+            header=Header(
+                seq=i, stamp=Time(secs=1600000000 + i, nsecs=i * 1000), frame_id="imu"
+            ),
+            orientation=Quaternion(**dict(zip("xyzw", rng.normal(size=4)))),
+            orientation_covariance=(0.0,) * 9,
+            angular_velocity=Vector3(**dict(zip("xyz", rng.normal(size=3)))),
+            angular_velocity_covariance=(0.0,) * 9,
+            linear_acceleration=Vector3(**dict(zip("xyz", rng.normal(size=3)))),
+            linear_acceleration_covariance=(0.0,) * 9,
+        )
+
+
+def get_timestamp(i):
+    return (1600000000 + i) * 1000000000 + i * 1000
+
+
+def test_message_to_dict():
+    imu_dict = message_to_dict(next(create_imu_messages(1)))
+
+    assert imu_dict["header"] == {
+        "seq": 0,
+        "stamp": {"secs": 1600000000, "nsecs": 0},
+        "frame_id": "imu",
+    }
+    assert sorted(imu_dict["orientation"]) == ["w", "x", "y", "z"]
+    assert imu_dict["orientation_covariance"] == [0.0] * 9
+
+    # Dictionaries are passed through
+    assert message_to_dict(imu_dict) == imu_dict
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 1000])
+def test_write_json_files(tmp_path, batch_size):
+    messages = list(create_imu_messages(NUM_MESSAGES))
+    messages.append(None)
+
+    count = main(None, None, str(tmp_path), messages=messages, batch_size=batch_size)
+
+    assert count == NUM_MESSAGES
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        "{}.json".format(get_timestamp(i)) for i in range(NUM_MESSAGES)
+    )
+
+    imu_dict = read_json(os.path.join(tmp_path, "{}.json".format(get_timestamp(3))))
+    assert imu_dict == json.loads(json.dumps(message_to_dict(messages[3])))
+
+
+def test_write_json_lines(tmp_path):
+    messages = list(create_imu_messages(NUM_MESSAGES))
+    count = main(
+        None,
+        None,
+        str(tmp_path),
+        output_format="jsonl",
+        messages=messages,
+        batch_size=4,
+    )
+
+    assert count == NUM_MESSAGES
+    with open(os.path.join(tmp_path, "imu.jsonl")) as f:
+        lines = [json.loads(line) for line in f]
+
+    assert lines == [json.loads(json.dumps(message_to_dict(m))) for m in messages]
+
+
+def test_write_npz(tmp_path):
+    messages = list(create_imu_messages(NUM_MESSAGES))
+    count = main(
+        None, None, str(tmp_path), output_format="npz", messages=messages, batch_size=4
+    )
+
+    assert count == NUM_MESSAGES
+    arrays = np.load(os.path.join(tmp_path, "imu.npz"))
+
+    assert arrays["timestamp"].tolist() == [
+        get_timestamp(i) for i in range(NUM_MESSAGES)
+    ]
+    assert arrays["orientation"].shape == (NUM_MESSAGES, 4)
+    assert arrays["orientation"][5].tolist() == [
+        getattr(messages[5].orientation, axis) for axis in "xyzw"
+    ]
+    assert arrays["angular_velocity"].shape == (NUM_MESSAGES, 3)
+    assert arrays["linear_acceleration"][2].tolist() == [
+        getattr(messages[2].linear_acceleration, axis) for axis in "xyz"
+    ]
+
+
+def test_write_npz_without_messages(tmp_path):
+    assert main(None, None, str(tmp_path), output_format="npz", messages=[]) == 0
+
+    arrays = np.load(os.path.join(tmp_path, "imu.npz"))
+    assert arrays["timestamp"].shape == (0,)
+    assert arrays["orientation"].shape == (0, 4)
+
+
+def test_read_bag_messages():
+    class FakeBag:
+        closed = False
+
+        def read_messages(self, topics=None):
+            assert topics == ["/imu/data/raw"]
+            for i in range(3):
+                yield topics[0], i, i
+
+        def close(self):
+            FakeBag.closed = True
+
+    messages = read_bag_messages(
+        "test.bag", "/imu/data/raw", open_bag=lambda p: FakeBag()
+    )
+    assert list(messages) == [0, 1, 2]
+    assert FakeBag.closed